@@ -0,0 +1,140 @@
+"""
+Load test of the summary endpoint: sync views behind Django's threaded
+WSGI server versus the async views under uvicorn (ASGI). Both servers run
+in this process against the benchmark test database, with the stats cache
+disabled so every request computes its result.
+
+    pip install uvicorn
+    python -m benchmarks.bench_asgi --cities 50 --days 31 --requests 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+
+os.environ["STATS_CACHE_BACKEND"] = "django.core.cache.backends.dummy.DummyCache"
+
+from benchmarks.common import make_cities, make_hours, test_database, utc  # noqa: E402
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+SCENARIOS = {
+    "wsgi-sync": ("wsgi", "/api/summary/"),
+    "asgi-sync": ("asgi", "/api/summary/"),
+    "asgi-async": ("asgi", "/api/async/summary/"),
+}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_wsgi(port: int):
+    server = ThreadedWSGIServer(("127.0.0.1", port), QuietHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_asgi(port: int):
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The ASGI scenarios need uvicorn: pip install uvicorn")
+    server = uvicorn.Server(uvicorn.Config(get_asgi_application(), host="127.0.0.1", port=port,
+                                           log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return stop
+
+
+async def fetch(port: int, path: str) -> float:
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    if not response.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(response[:200].decode(errors="replace"))
+    return (time.perf_counter() - t0) * 1000
+
+
+async def load(port: int, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            latencies.append(await fetch(port, path))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+        "rps": round(requests / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=50, help="Cities per summary request")
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--timezone", default="UTC",
+                        help="Use a zone outside ROLLUP_TIMEZONES to measure the raw-hour path.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = []
+    with test_database():
+        cities = make_cities(args.cities)
+        make_hours(cities, utc(2024, 1, 1), args.days)
+        query = (f"?cities={','.join(c.name for c in cities)}&start=2024-01-01"
+                 f"&end=2024-01-{min(args.days, 31):02d}&timezone={args.timezone}")
+        for name in args.scenarios:
+            kind, path = SCENARIOS[name]
+            port = free_port()
+            stop = start_wsgi(port) if kind == "wsgi" else start_asgi(port)
+            try:
+                asyncio.run(load(port, path + query, min(args.concurrency, 4), args.concurrency))  # warm-up
+                stats = asyncio.run(load(port, path + query, args.requests, args.concurrency))
+            finally:
+                stop()
+            results.append({"scenario": name, **stats})
+            print(f"{name:>10} | p50 {stats['p50_ms']:>8.1f} ms | p99 {stats['p99_ms']:>8.1f} ms | "
+                  f"{stats['rps']:>7.1f} req/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "asgi", "cities": args.cities, "days": args.days,
+                       "requests": args.requests, "concurrency": args.concurrency,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
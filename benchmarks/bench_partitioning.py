@@ -0,0 +1,77 @@
+"""
+Range-query latency and insert throughput of HourlyWeather before and after
+converting it to a range-partitioned table with a BRIN index. PostgreSQL only.
+
+    python -m benchmarks.bench_partitioning --cities 20 --days 730 --interval month
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo
+
+from benchmarks.common import make_cities, make_hours, synthetic_series, test_database, timed, utc
+
+from django.db import connection
+from meteo.models import City, HourlyWeather
+from meteo.services import partitioning
+from meteo.services.aggregation import temperature_stats
+from meteo.services.ingest import save_hourly
+
+
+def measure(cities: list[City], first_day: date, days: int, repeat: int) -> dict:
+    tz = ZoneInfo("UTC")
+    mid = first_day + timedelta(days=days // 2)
+    city = cities[len(cities) // 2]
+    out = {
+        "city_month_stats": timed(lambda: temperature_stats(city, mid, mid + timedelta(days=30), tz,
+                                                            threshold=30.0, threshold_low=0.0), repeat),
+        "all_cities_week_count": timed(lambda: HourlyWeather.objects.filter(
+            date_time__range=(utc(mid.year, mid.month, mid.day),
+                              utc(mid.year, mid.month, mid.day) + timedelta(days=7))).count(), repeat),
+    }
+
+    newcomer = City.objects.create(name=f"Insert{time.monotonic_ns()}", country="Bench", latitude=0, longitude=0)
+    series = synthetic_series(utc(first_day.year, first_day.month, first_day.day), days * 24, seed=99)
+    t0 = time.perf_counter()
+    save_hourly(newcomer, series)
+    elapsed = time.perf_counter() - t0
+    out["insert_rows_per_s"] = round(len(series) / elapsed)
+    newcomer.delete()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--interval", choices=partitioning.INTERVALS, default="month")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    if connection.vendor != "postgresql":
+        raise SystemExit("This benchmark needs PostgreSQL.")
+
+    first_day = date(2022, 1, 1)
+    with test_database():
+        cities = make_cities(args.cities)
+        make_hours(cities, utc(2022, 1, 1), args.days)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {partitioning.TABLE}")
+        before = measure(cities, first_day, args.days, args.repeat)
+        t0 = time.perf_counter()
+        partitioning.convert_to_partitioned(args.interval, first_day + timedelta(days=args.days + 366))
+        conversion_s = round(time.perf_counter() - t0, 2)
+        after = measure(cities, first_day, args.days, args.repeat)
+
+    result = {"benchmark": "partitioning", "cities": args.cities, "days": args.days,
+              "interval": args.interval, "conversion_s": conversion_s, "before": before, "after": after}
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
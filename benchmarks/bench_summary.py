@@ -0,0 +1,63 @@
+"""
+Multi-city summary: per-city loop (one lookup and one set of aggregate
+queries per city) versus the batched ``summary_stats`` path.
+
+    python -m benchmarks.bench_summary --cities 1 10 50 100 --days 31
+"""
+import argparse
+import json
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo
+
+from benchmarks.common import make_cities, make_hours, test_database, timed, utc
+
+from meteo.models import City
+from meteo.services.aggregation import precipitation_stats, summary_stats, temperature_stats
+from meteo.services.cities import cities_by_name
+
+
+def per_city(names, start, end, tz):
+    for name in names:
+        city = City.objects.get(name__iexact=name)
+        temperature_stats(city, start, end, tz, by_day=False)
+        precipitation_stats(city, start, end, tz)
+
+
+def batched(names, start, end, tz):
+    cities = cities_by_name(names)
+    summary_stats(list(cities.values()), start, end, tz)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timezone", default="UTC",
+                        help="Use a zone outside ROLLUP_TIMEZONES to measure the raw-hour path.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    tz = ZoneInfo(args.timezone)
+    start = date(2024, 1, 1)
+    end = start + timedelta(days=args.days - 1)
+    results = []
+    with test_database():
+        cities = make_cities(max(args.cities))
+        make_hours(cities, utc(2024, 1, 1), args.days)
+        for n in args.cities:
+            names = [c.name for c in cities[:n]]
+            loop = timed(lambda: per_city(names, start, end, tz), args.repeat)
+            batch = timed(lambda: batched(names, start, end, tz), args.repeat)
+            results.append({"cities": n, "per_city": loop, "batched": batch,
+                            "speedup": round(loop["median_ms"] / batch["median_ms"], 2)})
+            print(f"{n:>5} cities | per-city {loop['median_ms']:>9.1f} ms | "
+                  f"batched {batch['median_ms']:>9.1f} ms | x{results[-1]['speedup']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "summary", "days": args.days, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
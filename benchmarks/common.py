@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throw-away test database created from the
+configured ``DATABASES`` (PostgreSQL by default). Point
+``DJANGO_SETTINGS_MODULE`` at another settings module to benchmark a
+different backend.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as py_timezone
+
+import django
+import numpy as np
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openmeteo_api.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from meteo.models import City, HourlyWeather  # noqa: E402
+from meteo.services.open_meteo import HourlySeries  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def make_cities(n: int, prefix: str = "City") -> list[City]:
+    rng = np.random.default_rng(n)
+    return City.objects.bulk_create([
+        City(name=f"{prefix}{i:05d}", country="Bench",
+             latitude=float(rng.uniform(-60, 70)), longitude=float(rng.uniform(-180, 180)))
+        for i in range(n)
+    ])
+
+
+def synthetic_series(start: datetime, hours: int, seed: int = 0) -> HourlySeries:
+    """Synthetic hourly series (daily temperature cycle plus noise, sparse rain)."""
+    rng = np.random.default_rng(seed)
+    offsets = np.arange(hours)
+    temps = 15 + 8 * np.sin(2 * np.pi * (offsets % 24) / 24) + rng.normal(0, 2, hours)
+    rain = np.where(rng.random(hours) < 0.1, rng.gamma(1.5, 1.2, hours), 0.0)
+    first = np.datetime64(start.astimezone(py_timezone.utc).replace(tzinfo=None), "s")
+    return HourlySeries(first + offsets.astype("timedelta64[h]"),
+                        np.round(temps, 1), np.round(rain, 1))
+
+
+def make_hours(cities: list[City], start: datetime, days: int, batch_size: int = 10_000) -> int:
+    """Insert ``days`` of synthetic hours per city with plain ``bulk_create`` (no rollup)."""
+    total = 0
+    for i, city in enumerate(cities):
+        series = synthetic_series(start, days * 24, seed=i)
+        HourlyWeather.objects.bulk_create(
+            [HourlyWeather(city=city, **row) for row in series.rows()],
+            batch_size=batch_size,
+        )
+        total += len(series)
+    return total
+
+
+def utc(year: int, month: int, day: int) -> datetime:
+    return datetime(year, month, day, tzinfo=py_timezone.utc)
+
+
+def timed(fn, repeat: int = 5) -> dict:
+    """Run ``fn`` ``repeat`` times and return timing stats in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
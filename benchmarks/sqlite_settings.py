@@ -0,0 +1,18 @@
+"""
+Run the benchmarks on SQLite instead of the configured PostgreSQL:
+
+    DJANGO_SETTINGS_MODULE=benchmarks.sqlite_settings python -m benchmarks.suite
+"""
+import os
+import tempfile
+
+from openmeteo_api.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(tempfile.gettempdir(), "openmeteo_bench.sqlite3"),
+        "OPTIONS": {"timeout": 30, "transaction_mode": "IMMEDIATE"},
+        "TEST": {"NAME": os.path.join(tempfile.gettempdir(), "openmeteo_bench_test.sqlite3")},
+    }
+}
@@ -0,0 +1,154 @@
+"""
+Benchmark suite for the ingest and query hot paths on synthetic data
+(N cities x M years of hourly rows served by the local Open-Meteo stub):
+
+- ``fetch_hourly`` parsing, row and columnar mode;
+- ``load_weather`` inserting every city, then a ``--force`` reload;
+- the temperature, precipitation and summary request paths, through the
+  daily rollup and through the raw hours (a zone outside ROLLUP_TIMEZONES).
+
+Results are written as JSON; ``--compare`` prints the change of every
+median against a previous run and exits non-zero past ``--threshold``.
+
+    python -m benchmarks.suite --cities 10 --years 2 --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.suite --compare bench-main.json
+    DJANGO_SETTINGS_MODULE=benchmarks.sqlite_settings python -m benchmarks.suite --cities 3 --years 1
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import date, datetime, timezone as py_timezone
+
+os.environ.setdefault("STATS_CACHE_BACKEND", "django.core.cache.backends.dummy.DummyCache")
+
+from benchmarks.common import test_database, timed  # noqa: E402
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from meteo.models import HourlyWeather  # noqa: E402
+from meteo.services import open_meteo  # noqa: E402
+from tests.stub_server import StubOpenMeteo  # noqa: E402
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_parse(stub: StubOpenMeteo, start: str, end: str, repeat: int) -> dict:
+    client = open_meteo.OpenMeteoClient(archive_url=stub.archive_url, geocode_url=stub.geocode_url)
+    return {
+        "fetch_hourly_rows": timed(lambda: client.fetch_hourly(40.0, -3.0, start, end), repeat),
+        "fetch_hourly_columnar": timed(lambda: client.fetch_hourly(40.0, -3.0, start, end, columnar=True), repeat),
+    }
+
+
+def bench_load(names: list[str], start: str, end: str) -> dict:
+    def load(*flags):
+        call_command("load_weather", cities=",".join(names), start=start, end=end, chunk="year",
+                     *flags, stdout=io.StringIO())
+
+    out = {"load_weather_insert": timed(load, 1)}
+    out["load_weather_insert"]["rows"] = HourlyWeather.objects.count()
+    out["load_weather_force_reload"] = timed(lambda: load("--force"), 1)
+    return out
+
+
+def bench_views(names: list[str], start: str, end: str, repeat: int) -> dict:
+    client = Client()
+    month_end = min(date.fromisoformat(end), date.fromisoformat(start).replace(day=28)).isoformat()
+    out = {}
+    for path_label, tz in (("rollup", settings.DEFAULT_TZ), ("raw", "UTC")):
+        for range_label, last in (("month", month_end), ("range", end)):
+            common = f"start={start}&end={last}&timezone={tz}"
+            urls = {
+                "temperature": f"/api/temperature/?city={names[0]}&{common}",
+                "precipitation": f"/api/precipitation/?city={names[0]}&{common}",
+                "summary": f"/api/summary/?cities={','.join(names)}&{common}",
+            }
+            for view, url in urls.items():
+                assert client.get(url).status_code == 200, url
+                out[f"{view}_{range_label}_{path_label}"] = timed(lambda: client.get(url), repeat)
+    return out
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> bool:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressed = False
+    print(f"\ncompared with {baseline_path}")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats["median_ms"] / baseline[name]["median_ms"] if baseline[name]["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, regressed = "  REGRESSION", True
+        print(f"{name:>34} | {baseline[name]['median_ms']:>10.1f} -> {stats['median_ms']:>10.1f} ms "
+              f"| {(ratio - 1) * 100:+6.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=10)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=["parse", "load", "views"],
+                        default=["parse", "load", "views"], help="Groups to run (views need load)")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative median slowdown reported as a regression (default 0.10).")
+    args = parser.parse_args()
+
+    first_year = 2023 - args.years + 1
+    start, end = f"{first_year}-01-01", "2023-12-31"
+    names = [f"Bench{i:05d}" for i in range(args.cities)]
+    results = {}
+    with test_database(), StubOpenMeteo() as stub:
+        open_meteo.ARCHIVE_URL, open_meteo.GEOCODE_URL = stub.archive_url, stub.geocode_url
+        if "parse" in args.only:
+            results.update(bench_parse(stub, start, end, args.repeat))
+        if "load" in args.only or "views" in args.only:
+            results.update(bench_load(names, start, end))
+        if "views" in args.only:
+            results.update(bench_views(names, start, end, args.repeat))
+        vendor = connection.vendor
+
+    for name, stats in results.items():
+        print(f"{name:>34} | median {stats['median_ms']:>10.1f} ms | min {stats['min_ms']:>10.1f} ms")
+
+    report = {
+        "benchmark": "suite",
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(py_timezone.utc).isoformat(timespec="seconds"),
+            "database": vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "cities": args.cities,
+            "years": args.years,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class MeteoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "meteo"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from .models import City
+        from .services.instrumentation import install_query_hook
+        from .services.cities import mark_cities_changed
+
+        connection_created.connect(install_query_hook, dispatch_uid="meteo_query_hook")
+        post_save.connect(mark_cities_changed, sender=City, dispatch_uid="meteo_city_saved")
+        post_delete.connect(mark_cities_changed, sender=City, dispatch_uid="meteo_city_deleted")
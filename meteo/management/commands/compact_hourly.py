@@ -0,0 +1,57 @@
+from datetime import date, timezone as py_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from meteo.models import City, HourlyWeather
+from meteo.services.cache import mark_city_updated
+from meteo.services.compact import cities_with_hours, pack_month
+from meteo.services.names import name_key
+from meteo.services.partitioning import next_period, period_start
+
+
+class Command(BaseCommand):
+    help = "Pack complete UTC months of HourlyWeather into PackedHourlyWeather (int16 arrays)."
+
+    def add_arguments(self, p):
+        p.add_argument("--city")
+        p.add_argument("--all", action="store_true", help="Compact every city with raw or packed hours")
+        p.add_argument("--before", help="YYYY-MM-DD, only pack months that end before this date "
+                                        "(default: start of the current month)")
+        p.add_argument("--drop-hourly", action="store_true",
+                       help="Delete the packed HourlyWeather rows (requires COMPACT_STORAGE=1)")
+
+    def handle(self, *args, **o):
+        if o["city"]:
+            cities = list(City.objects.filter(name_key=name_key(o["city"])))
+            if not cities:
+                raise CommandError(f"City not found: {o['city']}")
+        elif o["all"]:
+            cities = list(cities_with_hours())
+        else:
+            raise CommandError("You must provide --city or --all.")
+        if o["drop_hourly"] and not settings.COMPACT_STORAGE:
+            raise CommandError("--drop-hourly requires COMPACT_STORAGE=1: without it the packed months "
+                               "are not read back.")
+        try:
+            before = date.fromisoformat(o["before"]) if o["before"] else timezone.now().date()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        cutoff = period_start(before, "month")
+
+        for city in cities:
+            first = HourlyWeather.objects.filter(city=city).aggregate(first=Min("date_time"))["first"]
+            months = hours = 0
+            month = period_start(first.astimezone(py_timezone.utc).date(), "month") if first else cutoff
+            while month < cutoff:
+                stored = pack_month(city, month, drop_hourly=o["drop_hourly"])
+                months += bool(stored)
+                hours += stored
+                month = next_period(month, "month")
+            if o["drop_hourly"] and hours:
+                mark_city_updated(city)
+            self.stdout.write(self.style.SUCCESS(
+                f"{city} | before {cutoff.isoformat()} | months packed={months} hours={hours}"
+                + (" | hourly rows dropped" if o["drop_hourly"] else "")
+            ))
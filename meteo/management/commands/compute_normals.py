@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from meteo.models import City
+from meteo.services.compact import cities_with_hours
+from meteo.services.names import name_key
+from meteo.services.normals import YEARS, compute_normals
+from meteo.services.timebuckets import zone
+
+
+class Command(BaseCommand):
+    help = ("Precompute day-of-year / hour-of-day climate normals per city from the hourly data "
+            "(used by /api/anomaly/).")
+
+    def add_arguments(self, p):
+        p.add_argument("--city")
+        p.add_argument("--all", action="store_true", help="Compute normals for every city with raw or packed hours")
+        p.add_argument("--last-year", type=int,
+                       help="Last year of the reference period (default: the previous year)")
+        p.add_argument("--years", type=int, default=YEARS, help="Length of the reference period")
+        p.add_argument("--timezone", default=settings.DEFAULT_TZ,
+                       help="Zone defining local days and hours")
+
+    def handle(self, *args, **o):
+        if o["city"]:
+            cities = list(City.objects.filter(name_key=name_key(o["city"])))
+            if not cities:
+                raise CommandError(f"City not found: {o['city']}")
+        elif o["all"]:
+            cities = list(cities_with_hours())
+        else:
+            raise CommandError("You must provide --city or --all.")
+        if o["years"] < 1:
+            raise CommandError("--years must be at least 1.")
+        try:
+            tz = zone(o["timezone"])
+        except (KeyError, ValueError) as exc:
+            raise CommandError(f"Unknown time zone: {o['timezone']}") from exc
+        last_year = o["last_year"] or timezone.now().year - 1
+        first_year = last_year - o["years"] + 1
+
+        for city in cities:
+            row = compute_normals(city, first_year, last_year, tz)
+            if row is None:
+                self.stdout.write(self.style.WARNING(f"{city} | {first_year}-{last_year} | no hourly data"))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"{city} | {first_year}-{last_year} ({tz.key}) | years with data={row.years} hours={row.hours}"
+            ))
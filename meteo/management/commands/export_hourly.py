@@ -0,0 +1,52 @@
+import sys
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from meteo.services.cities import cities_by_name
+from meteo.services.export import CSV, FORMATS, export_chunks
+from meteo.services.names import name_key
+from meteo.services.timebuckets import utc_range, zone
+
+
+class Command(BaseCommand):
+    help = "Stream hourly data of one or more cities to a CSV, Arrow IPC or Parquet file."
+
+    def add_arguments(self, p):
+        p.add_argument("--city")
+        p.add_argument("--cities", help="Comma separated list of cities")
+        p.add_argument("--start", required=True, help="YYYY-MM-DD")
+        p.add_argument("--end", required=True, help="YYYY-MM-DD")
+        p.add_argument("--timezone", default=settings.DEFAULT_TZ, help="Time zone of --start/--end")
+        p.add_argument("--format", choices=FORMATS, default=CSV)
+        p.add_argument("--output", required=True, help="Output file, '-' for stdout")
+        p.add_argument("--chunk-size", type=int, help="Rows read from the database per chunk")
+
+    def handle(self, *args, **o):
+        names = [o["city"]] if o["city"] else []
+        if o["cities"]:
+            names += [c.strip() for c in o["cities"].split(",") if c.strip()]
+        if not names:
+            raise CommandError("You must provide --city or --cities.")
+        cities = cities_by_name(names)
+        missing = [name for name in names if name_key(name) not in cities]
+        if missing:
+            raise CommandError(f"City not found: {', '.join(missing)}")
+        try:
+            start, end = date.fromisoformat(o["start"]), date.fromisoformat(o["end"])
+            chunks = export_chunks(cities.values(), *utc_range(start, end, zone(o["timezone"])),
+                                   o["format"], chunk_size=o["chunk_size"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        written = 0
+        out = sys.stdout.buffer if o["output"] == "-" else open(o["output"], "wb")
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        if o["output"] != "-":
+            self.stdout.write(self.style.SUCCESS(f"{o['output']} | {o['format']} | {written} bytes"))
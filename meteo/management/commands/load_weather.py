@@ -1,48 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from meteo.models import City, HourlyWeather
-from meteo.services.open_meteo import geocode_city, fetch_hourly
+from django.db import connections
+from meteo.services import open_meteo
+from meteo.services.backfill import RateLimiter, split_range, with_retries
+from meteo.services.ingest import INSERT, UPSERT, get_or_create_city, missing_ranges, save_hourly
 
 
 class Command(BaseCommand):
-    help = "Load hourly data (temp and precip) for a city and date range."
+    help = "Load hourly data (temp and precip) for one or more cities and a date range."
 
     def add_arguments(self, p):
-        p.add_argument("--city", required=True)
+        p.add_argument("--city")
+        p.add_argument("--cities", help="Comma separated list of cities")
+        p.add_argument("--cities-file", help="File with one city per line")
         p.add_argument("--start", required=True, help="YYYY-MM-DD (pasado)")
         p.add_argument("--end", required=True, help="YYYY-MM-DD (pasado)")
+        p.add_argument("--chunk", choices=["none", "month", "year"], default="none",
+                       help="Split the range into chunks fetched and committed independently")
+        p.add_argument("--workers", type=int, default=1, help="Concurrent chunk downloads")
+        p.add_argument("--rate", type=float, default=0.0,
+                       help="Max requests per second to Open-Meteo (0 = unlimited)")
+        p.add_argument("--retries", type=int, default=3)
+        p.add_argument("--backoff", type=float, default=1.0,
+                       help="Initial retry delay in seconds, doubled on every attempt")
+        p.add_argument("--force", action="store_true",
+                       help="Fetch the whole range even if some days are already loaded")
+        p.add_argument("--upsert", action="store_true",
+                       help="Overwrite stored hours whose values changed (use with --force to pick up revisions)")
+        p.add_argument("--batch-size", type=int, default=settings.OPEN_METEO_BATCH_SIZE,
+                       help="Cities sharing a chunk fetched per multi-location archive request")
+
+    def city_names(self, o) -> list[str]:
+        names = []
+        if o.get("city"):
+            names.append(o["city"])
+        if o.get("cities"):
+            names += [c.strip() for c in o["cities"].split(",") if c.strip()]
+        if o.get("cities_file"):
+            with open(o["cities_file"], encoding="utf-8") as f:
+                names += [line.strip() for line in f
+                          if line.strip() and not line.lstrip().startswith("#")]
+        if not names:
+            raise CommandError("You must provide --city, --cities or --cities-file.")
+        return list(dict.fromkeys(names))
 
     def handle(self, *args, **o):
-        city_name, start, end = o["city"], o["start"], o["end"]
-
-        geo = geocode_city(city_name)
-        if not geo:
-            raise CommandError(f"City not found: {city_name}")
-
-        city, _ = City.objects.get_or_create(
-            name=city_name, country=geo.country,
-            defaults={"latitude": geo.latitude, "longitude": geo.longitude},
-        )
-        City.objects.filter(pk=city.pk).update(
-            latitude=geo.latitude,
-            longitude=geo.longitude
-        )
-
-        rows = fetch_hourly(geo.latitude, geo.longitude, start, end)
-        objs = [
-            HourlyWeather(
-                city=city,
-                date_time=r["date_time"],
-                temperature_2m=r["temperature_2m"],
-                precipitation=r["precipitation"],
-            )
-            for r in rows
-        ]
-
-        with transaction.atomic():
-            created = HourlyWeather.objects.bulk_create(objs,
-                                                        ignore_conflicts=True)
-
-        self.stdout.write(self.style.SUCCESS(
-            f"{city} | {start}..{end} | hours received={len(rows)} saved={len(created)}"
-        ))
+        names = self.city_names(o)
+        try:
+            start, end = date.fromisoformat(o["start"]), date.fromisoformat(o["end"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        limiter = RateLimiter(o["rate"])
+
+        def call(fn, *a, **kw):
+            return with_retries(lambda: fn(*a, **kw), retries=o["retries"],
+                                backoff=o["backoff"], limiter=limiter)
+
+        cities = []
+        for city_name in names:
+            city = call(get_or_create_city, city_name)
+            if city is None:
+                if len(names) == 1:
+                    raise CommandError(f"City not found: {city_name}")
+                self.stderr.write(f"City not found: {city_name}")
+                continue
+            cities.append(city)
+
+        def load_batch(batch, chunk_start, chunk_end):
+            """Fetch one chunk for every city of ``batch``; returns a result or the error per city."""
+            try:
+                if len(batch) == 1:
+                    city = batch[0]
+                    fetched = [call(open_meteo.fetch_hourly, city.latitude, city.longitude,
+                                    chunk_start.isoformat(), chunk_end.isoformat(), columnar=True)]
+                else:
+                    fetched = call(open_meteo.fetch_hourly_many, [(c.latitude, c.longitude) for c in batch],
+                                   chunk_start.isoformat(), chunk_end.isoformat(), batch_size=len(batch))
+                results = []
+                for city, rows in zip(batch, fetched):
+                    try:
+                        results.append(save_hourly(city, rows, mode=UPSERT if o["upsert"] else INSERT))
+                    except Exception as exc:
+                        results.append(exc)
+                return results
+            finally:
+                if o["workers"] > 1:
+                    connections.close_all()
+
+        tasks = []
+        for city in cities:
+            gaps = [(start, end)] if o["force"] else missing_ranges(city, start, end)
+            if not gaps:
+                self.stdout.write(f"{city} | {start.isoformat()}..{end.isoformat()} | already loaded")
+                continue
+            if not o["force"]:
+                self.stdout.write(f"{city} | gaps: " + ", ".join(f"{s.isoformat()}..{e.isoformat()}" for s, e in gaps))
+            for gap_start, gap_end in gaps:
+                tasks += [(city, s, e) for s, e in split_range(gap_start, gap_end, o["chunk"])]
+
+        # Cities needing the same chunk share multi-location requests.
+        by_chunk = {}
+        for city, s, e in tasks:
+            by_chunk.setdefault((s, e), []).append(city)
+        size = max(1, o["batch_size"])
+        batches = [(cities_[i:i + size], s, e)
+                   for (s, e), cities_ in by_chunk.items() for i in range(0, len(cities_), size)]
+        failures = []
+
+        def report(batch, run):
+            batch_cities, chunk_start, chunk_end = batch
+            try:
+                results = run()
+            except Exception as exc:
+                results = [exc] * len(batch_cities)
+            for city, result in zip(batch_cities, results):
+                label = f"{city} | {chunk_start.isoformat()}..{chunk_end.isoformat()}"
+                if isinstance(result, Exception):
+                    failures.append(label)
+                    self.stderr.write(f"{label} | failed: {result}")
+                    continue
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label} | gap filled | hours received={result.received} inserted={result.inserted} "
+                    f"updated={result.updated} unchanged={result.unchanged} days={result.days}"
+                ))
+
+        if o["workers"] <= 1:
+            for batch in batches:
+                report(batch, lambda: load_batch(*batch))
+        else:
+            with ThreadPoolExecutor(max_workers=o["workers"]) as pool:
+                futures = {pool.submit(load_batch, *batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    report(futures[future], future.result)
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(tasks)} chunks failed: " + "; ".join(sorted(failures)))
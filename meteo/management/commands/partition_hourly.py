@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from meteo.services import partitioning
+
+
+class Command(BaseCommand):
+    help = ("Convert HourlyWeather to a table range-partitioned on date_time (PostgreSQL), "
+            "or create the upcoming partitions if it already is.")
+
+    def add_arguments(self, p):
+        p.add_argument("--interval", choices=partitioning.INTERVALS, default="month")
+        p.add_argument("--ahead", type=int, default=12,
+                       help="Number of future periods to create partitions for")
+        p.add_argument("--start", help="YYYY-MM-DD, also create partitions from this date")
+        p.add_argument("--keep-old", action="store_true",
+                       help="Keep the original table as meteo_hourlyweather_unpartitioned")
+
+    def handle(self, *args, **o):
+        interval = o["interval"]
+        until = timezone.now().date()
+        for _ in range(o["ahead"]):
+            until = partitioning.next_period(until, interval)
+        start = date.fromisoformat(o["start"]) if o["start"] else timezone.now().date()
+
+        try:
+            if not partitioning.is_partitioned():
+                names = partitioning.convert_to_partitioned(interval, until, keep_old=o["keep_old"])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{partitioning.TABLE} converted | {len(names)} {interval} partitions + default"
+                ))
+                return
+            names = partitioning.ensure_partitions(start, until, interval)
+        except partitioning.PartitioningError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{partitioning.TABLE} | {len(names)} partitions created" + (f": {', '.join(names)}" if names else "")
+        ))
@@ -0,0 +1,124 @@
+import random
+import signal
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from meteo.models import City
+from meteo.services import open_meteo
+from meteo.services.backfill import RateLimiter, with_retries
+from meteo.services.ingest import UPSERT, save_hourly
+from meteo.services.timebuckets import zone
+
+
+class Command(BaseCommand):
+    help = ("Keep every known city up to date: periodically fetch the hours after each city's "
+            "loaded_until, several cities per archive request.")
+
+    def add_arguments(self, p):
+        p.add_argument("--interval", type=float, default=3600.0, help="Seconds between refresh passes")
+        p.add_argument("--jitter", type=float, default=0.1,
+                       help="Random +/- fraction applied to every interval")
+        p.add_argument("--once", action="store_true", help="Run a single pass and exit (cron mode)")
+        p.add_argument("--batch-size", type=int, default=settings.OPEN_METEO_BATCH_SIZE,
+                       help="Cities per archive request")
+        p.add_argument("--workers", type=int, default=4, help="Concurrent archive requests")
+        p.add_argument("--rate", type=float, default=0.0,
+                       help="Max requests per second to Open-Meteo (0 = unlimited)")
+        p.add_argument("--retries", type=int, default=3)
+        p.add_argument("--backoff", type=float, default=1.0)
+        p.add_argument("--lag-days", type=int, default=2,
+                       help="Days behind today the archive is requested up to")
+        p.add_argument("--initial-days", type=int, default=7,
+                       help="Days fetched for a city that has no data yet")
+        p.add_argument("--until", help="YYYY-MM-DD, last day to fetch (default: today - lag-days)")
+
+    def handle(self, *args, **o):
+        if o["batch_size"] < 1 or o["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be at least 1.")
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+
+        limiter = RateLimiter(o["rate"])
+        while not stop.is_set():
+            self.refresh_pass(o, limiter, stop)
+            if o["once"]:
+                break
+            stop.wait(max(0.0, o["interval"] * (1 + random.uniform(-o["jitter"], o["jitter"]))))
+
+    def windows(self, o) -> dict[tuple[date, date], list[City]]:
+        """Cities grouped by the local-day window they need, so each group shares requests."""
+        tz = zone(settings.DEFAULT_TZ)
+        until = (date.fromisoformat(o["until"]) if o["until"]
+                 else timezone.now().astimezone(tz).date() - timedelta(days=o["lag_days"]))
+        groups = defaultdict(list)
+        for city in City.objects.order_by("pk"):
+            if city.loaded_until is None:
+                start = until - timedelta(days=o["initial_days"] - 1)
+            else:
+                # The day of the next missing hour: a partially loaded day is fetched again.
+                start = (city.loaded_until + timedelta(hours=1)).astimezone(tz).date()
+            if start <= until:
+                groups[start, until].append(city)
+        return groups
+
+    def refresh_pass(self, o, limiter: RateLimiter, stop: threading.Event) -> None:
+        batches = []
+        for (start, end), cities in sorted(self.windows(o).items()):
+            batches += [(start, end, cities[i:i + o["batch_size"]])
+                        for i in range(0, len(cities), o["batch_size"])]
+        if not batches:
+            self.stdout.write("refresh | all cities up to date")
+            return
+
+        def run(start, end, cities):
+            """Per city, its IngestResult or the exception that stopped it (each save commits on its own)."""
+            try:
+                if stop.is_set():
+                    return []
+                series = with_retries(
+                    lambda: open_meteo.fetch_hourly_many([(c.latitude, c.longitude) for c in cities],
+                                                         start.isoformat(), end.isoformat(),
+                                                         batch_size=len(cities)),
+                    retries=o["retries"], backoff=o["backoff"], limiter=limiter,
+                )
+                results = []
+                for city, hours in zip(cities, series):
+                    try:
+                        results.append(save_hourly(city, hours, mode=UPSERT))
+                    except Exception as exc:
+                        results.append(exc)
+                return results
+            finally:
+                connections.close_all()
+
+        totals = {"cities": 0, "inserted": 0, "updated": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=o["workers"]) as pool:
+            futures = {pool.submit(run, *batch): batch for batch in batches}
+            for future in as_completed(futures):
+                start, end, cities = futures[future]
+                window = f"{start.isoformat()}..{end.isoformat()}"
+                try:
+                    results = future.result()
+                except Exception as exc:
+                    # The request failed: nothing of this batch was saved.
+                    results = [exc] * len(cities)
+                for city, result in zip(cities, results):
+                    if isinstance(result, Exception):
+                        totals["failed"] += 1
+                        self.stderr.write(f"refresh | {city} | {window} | failed: {result}")
+                        continue
+                    totals["cities"] += 1
+                    totals["inserted"] += result.inserted
+                    totals["updated"] += result.updated
+        self.stdout.write(self.style.SUCCESS(
+            f"refresh | requests={len(batches)} cities={totals['cities']} inserted={totals['inserted']} "
+            f"updated={totals['updated']} failed={totals['failed']}"
+        ))
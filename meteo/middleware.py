@@ -0,0 +1,53 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .services.instrumentation import end_request, start_request
+from .services.metrics import registry
+
+
+class InstrumentationMiddleware:
+    """
+    Count queries, DB time, rows and phase times of every request, expose
+    them in a ``Server-Timing`` header and feed the ``/metrics`` registry.
+    Works under WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = start_request()
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, stats, time.perf_counter() - t0)
+
+    async def __acall__(self, request):
+        stats, token = start_request()
+        t0 = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, stats, time.perf_counter() - t0)
+
+    @staticmethod
+    def finish(request, response, stats, seconds):
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match and match.url_name else "unmatched"
+        registry.observe(view, response.status_code, seconds, stats)
+        timings = [f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows"']
+        timings += [f"{name};dur={value * 1000:.1f}" for name, value in stats.phases.items()]
+        timings.append(f"total;dur={seconds * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(timings)
+        return response
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2025-09-24 18:02
+
+import django.db.models.deletion
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily(apps, schema_editor):
+    from meteo.services.rollup import HOURLY_FIELDS, daily_rows
+
+    HourlyWeather = apps.get_model("meteo", "HourlyWeather")
+    DailyWeather = apps.get_model("meteo", "DailyWeather")
+    known = {f.name for f in DailyWeather._meta.get_fields()}
+    city_ids = HourlyWeather.objects.values_list("city_id", flat=True).distinct()
+    for city_id in city_ids:
+        for tzname in settings.ROLLUP_TIMEZONES:
+            records = (HourlyWeather.objects
+                       .filter(city_id=city_id)
+                       .values_list(*HOURLY_FIELDS))
+            DailyWeather.objects.bulk_create([
+                DailyWeather(city_id=city_id, timezone=tzname,
+                             **{k: v for k, v in row.items() if k in known})
+                for row in daily_rows(records, ZoneInfo(tzname))
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0002_hourlyweather'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWeather',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True,
+                                           primary_key=True,
+                                           serialize=False,
+                                           verbose_name='ID'
+                                           )),
+                ('timezone', models.CharField(max_length=64)),
+                ('date', models.DateField()),
+                ('hours', models.PositiveIntegerField(default=0)),
+                ('temperature_hours', models.PositiveIntegerField(default=0)),
+                ('temperature_mean', models.FloatField(null=True)),
+                ('temperature_min', models.FloatField(null=True)),
+                ('temperature_min_at', models.DateTimeField(null=True)),
+                ('temperature_max', models.FloatField(null=True)),
+                ('temperature_max_at', models.DateTimeField(null=True)),
+                ('precipitation_total', models.FloatField(default=0.0)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                           related_name='daily',
+                                           to='meteo.city'
+                                           )),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('city', 'timezone', 'date'),
+                                                        name='uq_daily_city_tz_date')],
+            },
+        ),
+        migrations.RunPython(backfill_daily, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2025-09-26 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0003_dailyweather'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='data_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
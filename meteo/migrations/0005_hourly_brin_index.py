@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2025-10-02 09:15
+
+from django.db import migrations, models
+
+BRIN_INDEX = "meteo_hourly_date_time_brin"
+
+
+def create_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {BRIN_INDEX} ON meteo_hourlyweather "
+        "USING brin (date_time) WITH (pages_per_range = 32)"
+    )
+
+
+def drop_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {BRIN_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0004_city_data_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='hourlyweather',
+            name='meteo_hourl_city_id_82c812_idx',
+        ),
+        migrations.AlterField(
+            model_name='hourlyweather',
+            name='date_time',
+            field=models.DateTimeField(),
+        ),
+        migrations.RunPython(create_brin, drop_brin),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2025-10-06 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0005_hourly_brin_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackedHourlyWeather',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True,
+                                           primary_key=True,
+                                           serialize=False,
+                                           verbose_name='ID'
+                                           )),
+                ('month', models.DateField()),
+                ('hours', models.PositiveSmallIntegerField()),
+                ('temperature_2m', models.BinaryField()),
+                ('precipitation', models.BinaryField()),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                           related_name='packed',
+                                           to='meteo.city'
+                                           )),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('city', 'month'),
+                                                        name='uq_packed_city_month')],
+            },
+        ),
+    ]
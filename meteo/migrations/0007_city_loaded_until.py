@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2025-10-07 10:05
+
+from datetime import datetime, time, timedelta, timezone
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_loaded_until(apps, schema_editor):
+    City = apps.get_model("meteo", "City")
+    HourlyWeather = apps.get_model("meteo", "HourlyWeather")
+    PackedHourlyWeather = apps.get_model("meteo", "PackedHourlyWeather")
+    latest = dict(HourlyWeather.objects
+                  .filter(models.Q(temperature_2m__isnull=False) | models.Q(precipitation__isnull=False))
+                  .values("city_id").annotate(last=Max("date_time")).values_list("city_id", "last"))
+    for city_id, month, hours in (PackedHourlyWeather.objects.order_by("city_id", "month")
+                                  .values_list("city_id", "month", "hours")):
+        month_end = datetime.combine(month, time.min, timezone.utc) + timedelta(hours=hours - 1)
+        if latest.get(city_id) is None or latest[city_id] < month_end:
+            latest[city_id] = month_end
+    for city_id, last in latest.items():
+        City.objects.filter(pk=city_id).update(loaded_until=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0006_packedhourlyweather'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='loaded_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_loaded_until, migrations.RunPython.noop),
+    ]
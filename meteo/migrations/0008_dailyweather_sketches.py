@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2025-10-08 09:40
+
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from django.db import migrations, models
+
+
+def _records(HourlyWeather, PackedHourlyWeather, city_id):
+    """Raw hours plus packed months; a raw hour wins over the packed value."""
+    from meteo.services.compact import decode
+
+    hours = {}
+    for packed in PackedHourlyWeather.objects.filter(city_id=city_id):
+        first = datetime.combine(packed.month, time.min, timezone.utc)
+        temps, precs = decode(packed.temperature_2m), decode(packed.precipitation)
+        for i in range(packed.hours):
+            hours[first + timedelta(hours=i)] = (
+                None if temps[i] != temps[i] else float(temps[i]),
+                None if precs[i] != precs[i] else float(precs[i]),
+            )
+    for date_time, temperature, precipitation in (HourlyWeather.objects.filter(city_id=city_id)
+                                                  .values_list("date_time", "temperature_2m", "precipitation")):
+        hours[date_time] = (temperature, precipitation)
+    return [(date_time, *values) for date_time, values in sorted(hours.items())]
+
+
+def backfill_sketches(apps, schema_editor):
+    from meteo.services.rollup import daily_rows
+
+    DailyWeather = apps.get_model("meteo", "DailyWeather")
+    HourlyWeather = apps.get_model("meteo", "HourlyWeather")
+    PackedHourlyWeather = apps.get_model("meteo", "PackedHourlyWeather")
+    pairs = DailyWeather.objects.values_list("city_id", "timezone").distinct()
+    for city_id, tzname in pairs:
+        rows = {row["date"]: row for row in daily_rows(
+            _records(HourlyWeather, PackedHourlyWeather, city_id), ZoneInfo(tzname))}
+        days = list(DailyWeather.objects.filter(city_id=city_id, timezone=tzname))
+        for day in days:
+            row = rows.get(day.date)
+            if row is not None:
+                day.temperature_sketch = row["temperature_sketch"]
+                day.precipitation_histogram = row["precipitation_histogram"]
+        DailyWeather.objects.bulk_update(days, ["temperature_sketch", "precipitation_histogram"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0007_city_loaded_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyweather',
+            name='temperature_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='dailyweather',
+            name='precipitation_histogram',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
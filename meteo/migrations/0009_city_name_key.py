@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2025-10-09 11:20
+
+from django.db import migrations, models
+
+
+def backfill_name_key(apps, schema_editor):
+    from meteo.services.names import name_key
+
+    City = apps.get_model("meteo", "City")
+    cities = list(City.objects.only("pk", "name"))
+    for city in cities:
+        city.name_key = name_key(city.name)
+    City.objects.bulk_update(cities, ["name_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0008_dailyweather_sketches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=120),
+        ),
+        migrations.RunPython(backfill_name_key, migrations.RunPython.noop),
+    ]
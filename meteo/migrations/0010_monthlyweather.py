@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2025-10-10 08:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_monthly(apps, schema_editor):
+    from meteo.services.rollup import monthly_row
+
+    DailyWeather = apps.get_model("meteo", "DailyWeather")
+    MonthlyWeather = apps.get_model("meteo", "MonthlyWeather")
+    for city_id, tzname in DailyWeather.objects.values_list("city_id", "timezone").distinct():
+        by_month = {}
+        for day in DailyWeather.objects.filter(city_id=city_id, timezone=tzname).order_by("date"):
+            by_month.setdefault(day.date.replace(day=1), []).append(day)
+        MonthlyWeather.objects.bulk_create([
+            MonthlyWeather(city_id=city_id, timezone=tzname, month=month, **monthly_row(days))
+            for month, days in by_month.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0009_city_name_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyWeather',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True,
+                                           primary_key=True,
+                                           serialize=False,
+                                           verbose_name='ID'
+                                           )),
+                ('timezone', models.CharField(max_length=64)),
+                ('month', models.DateField()),
+                ('hours', models.PositiveIntegerField(default=0)),
+                ('temperature_hours', models.PositiveIntegerField(default=0)),
+                ('temperature_mean', models.FloatField(null=True)),
+                ('temperature_min', models.FloatField(null=True)),
+                ('temperature_min_at', models.DateTimeField(null=True)),
+                ('temperature_max', models.FloatField(null=True)),
+                ('temperature_max_at', models.DateTimeField(null=True)),
+                ('precipitation_total', models.FloatField(default=0.0)),
+                ('precipitation_days', models.PositiveSmallIntegerField(default=0)),
+                ('precipitation_max_date', models.DateField(null=True)),
+                ('precipitation_max', models.FloatField(null=True)),
+                ('temperature_sketch', models.BinaryField(default=b'')),
+                ('precipitation_histogram', models.BinaryField(default=b'')),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                           related_name='monthly',
+                                           to='meteo.city'
+                                           )),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('city', 'timezone', 'month'),
+                                                        name='uq_monthly_city_tz_month')],
+            },
+        ),
+        migrations.RunPython(backfill_monthly, migrations.RunPython.noop),
+    ]
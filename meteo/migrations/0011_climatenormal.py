@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2025-10-11 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meteo', '0010_monthlyweather'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClimateNormal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True,
+                                           primary_key=True,
+                                           serialize=False,
+                                           verbose_name='ID'
+                                           )),
+                ('timezone', models.CharField(max_length=64)),
+                ('first_year', models.PositiveSmallIntegerField()),
+                ('last_year', models.PositiveSmallIntegerField()),
+                ('years', models.PositiveSmallIntegerField(default=0)),
+                ('hours', models.PositiveIntegerField(default=0)),
+                ('temperature', models.BinaryField()),
+                ('precipitation', models.BinaryField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                           related_name='normals',
+                                           to='meteo.city'
+                                           )),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('city', 'timezone'),
+                                                        name='uq_normal_city_tz')],
+            },
+        ),
+    ]
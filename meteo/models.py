@@ -1,35 +1,156 @@
 from django.db import models
 
+from meteo.services.names import name_key
+
 
 class City(models.Model):
     name = models.CharField(max_length=120)
+    # Accent/case-folded lookup key (meteo.services.names.name_key), kept in sync by save().
+    name_key = models.CharField(max_length=120, db_index=True, default="", editable=False)
     country = models.CharField(max_length=120, blank=True, default="")
     latitude = models.FloatField()
     longitude = models.FloatField()
+    data_updated_at = models.DateTimeField(null=True, blank=True)
+    loaded_until = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["name", "country"], name="uq_city_country")
         ]
 
+    def save(self, *args, **kwargs):
+        self.name_key = name_key(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_key"}
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"{self.name} ({self.country})" if self.country else self.name
 
 
 class HourlyWeather(models.Model):
     city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="hourly")
-    date_time = models.DateTimeField(db_index=True)
+    date_time = models.DateTimeField()
     temperature_2m = models.FloatField(null=True)
     precipitation = models.FloatField(null=True)
 
     class Meta:
+        # uq_city_datetime already serves (city, date_time) lookups; on
+        # PostgreSQL date_time-only range scans use a BRIN index (migration
+        # 0005), which stays tiny because rows arrive in time order.
         constraints = [
             models.UniqueConstraint(fields=["city", "date_time"],
                                     name="uq_city_datetime")
         ]
-        indexes = [
-            models.Index(fields=["city", "date_time"]),
-        ]
 
     def __str__(self) -> str:
         return f"{self.city} @ {self.date_time.isoformat()}"
+
+
+class DailyWeather(models.Model):
+    """Per-day rollup of HourlyWeather for a city, bucketed in ``timezone``."""
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="daily")
+    timezone = models.CharField(max_length=64)
+    date = models.DateField()
+    hours = models.PositiveIntegerField(default=0)
+    temperature_hours = models.PositiveIntegerField(default=0)
+    temperature_mean = models.FloatField(null=True)
+    temperature_min = models.FloatField(null=True)
+    temperature_min_at = models.DateTimeField(null=True)
+    temperature_max = models.FloatField(null=True)
+    temperature_max_at = models.DateTimeField(null=True)
+    precipitation_total = models.FloatField(default=0.0)
+    # Mergeable distribution summaries (meteo.services.sketches).
+    temperature_sketch = models.BinaryField(default=b"")
+    precipitation_histogram = models.BinaryField(default=b"")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["city", "timezone", "date"],
+                                    name="uq_daily_city_tz_date")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.city} @ {self.date.isoformat()} ({self.timezone})"
+
+
+class MonthlyWeather(models.Model):
+    """
+    Per-month rollup of DailyWeather for a city and ``timezone`` (local
+    calendar months), used by the stats query planner for whole months.
+    """
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="monthly")
+    timezone = models.CharField(max_length=64)
+    month = models.DateField()
+    hours = models.PositiveIntegerField(default=0)
+    temperature_hours = models.PositiveIntegerField(default=0)
+    temperature_mean = models.FloatField(null=True)
+    temperature_min = models.FloatField(null=True)
+    temperature_min_at = models.DateTimeField(null=True)
+    temperature_max = models.FloatField(null=True)
+    temperature_max_at = models.DateTimeField(null=True)
+    precipitation_total = models.FloatField(default=0.0)
+    precipitation_days = models.PositiveSmallIntegerField(default=0)
+    precipitation_max_date = models.DateField(null=True)
+    precipitation_max = models.FloatField(null=True)
+    temperature_sketch = models.BinaryField(default=b"")
+    precipitation_histogram = models.BinaryField(default=b"")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["city", "timezone", "month"],
+                                    name="uq_monthly_city_tz_month")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.city} @ {self.month:%Y-%m} ({self.timezone})"
+
+
+class ClimateNormal(models.Model):
+    """
+    Climatological normals of a city in ``timezone`` over
+    ``first_year..last_year`` (see meteo.services.normals): little-endian
+    float32 arrays of the mean temperature per (day of year, local hour)
+    and the mean precipitation total per day of year.
+    """
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="normals")
+    timezone = models.CharField(max_length=64)
+    first_year = models.PositiveSmallIntegerField()
+    last_year = models.PositiveSmallIntegerField()
+    years = models.PositiveSmallIntegerField(default=0)
+    hours = models.PositiveIntegerField(default=0)
+    temperature = models.BinaryField()
+    precipitation = models.BinaryField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["city", "timezone"],
+                                    name="uq_normal_city_tz")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.city} normals {self.first_year}-{self.last_year} ({self.timezone})"
+
+
+class PackedHourlyWeather(models.Model):
+    """
+    One UTC month of a city's hours stored as scaled int16 arrays (compact
+    storage, see meteo.services.compact). Slot ``i`` is ``month`` 00:00 UTC
+    plus ``i`` hours.
+    """
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="packed")
+    month = models.DateField()
+    hours = models.PositiveSmallIntegerField()
+    temperature_2m = models.BinaryField()
+    precipitation = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["city", "month"],
+                                    name="uq_packed_city_month")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.city} @ {self.month:%Y-%m} (packed)"
@@ -1,6 +1,9 @@
 from django.conf import settings
 from rest_framework import serializers
 
+from .services.export import CSV, FORMATS
+from .services.resample import AGGREGATES, RESOLUTIONS
+
 
 class TemperatureQuerySerializer(serializers.Serializer):
     city = serializers.CharField(required=True)
@@ -29,3 +32,115 @@ class SummaryQuerySerializer(serializers.Serializer):
         if not (attrs.get("city") or attrs.get("cities")):
             raise serializers.ValidationError("You must provide 'city' or 'cities'.")
         return attrs
+
+
+class SeriesQuerySerializer(serializers.Serializer):
+    city = serializers.CharField(required=True)
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    timezone = serializers.CharField(required=False, default=settings.DEFAULT_TZ)
+    resolution = serializers.ChoiceField(choices=RESOLUTIONS, required=False, default="day")
+    aggregate = serializers.ChoiceField(choices=AGGREGATES, required=False, default="mean")
+    percentile = serializers.FloatField(required=False, default=50.0, min_value=0.0, max_value=100.0)
+    limit = serializers.IntegerField(required=False, default=settings.SERIES_PAGE_SIZE,
+                                     min_value=1, max_value=settings.SERIES_MAX_PAGE_SIZE)
+    cursor = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        cursor = attrs.get("cursor")
+        if cursor is not None and not attrs["start"] <= cursor <= attrs["end"]:
+            raise serializers.ValidationError("'cursor' must be within 'start'..'end'.")
+        return attrs
+
+
+class DistributionQuerySerializer(serializers.Serializer):
+    city = serializers.CharField(required=False, allow_blank=True)
+    cities = serializers.CharField(required=False, allow_blank=True)
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    timezone = serializers.CharField(required=False, default=settings.DEFAULT_TZ)
+    percentiles = serializers.CharField(required=False, default=settings.DEFAULT_PERCENTILES)
+    base_temperature = serializers.FloatField(required=False, default=settings.DEFAULT_DEGREE_DAY_BASE)
+
+    def validate_percentiles(self, value):
+        try:
+            percentiles = [float(p) for p in value.split(",") if p.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Expected a comma separated list of numbers.")
+        if not percentiles or not all(0.0 <= p <= 100.0 for p in percentiles):
+            raise serializers.ValidationError("Percentiles must be between 0 and 100.")
+        return percentiles
+
+    def validate(self, attrs):
+        if not (attrs.get("city") or attrs.get("cities")):
+            raise serializers.ValidationError("You must provide 'city' or 'cities'.")
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        return attrs
+
+
+class AnomalyQuerySerializer(serializers.Serializer):
+    city = serializers.CharField(required=False, allow_blank=True)
+    cities = serializers.CharField(required=False, allow_blank=True)
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    timezone = serializers.CharField(required=False, default=settings.DEFAULT_TZ)
+
+    def validate(self, attrs):
+        if not (attrs.get("city") or attrs.get("cities")):
+            raise serializers.ValidationError("You must provide 'city' or 'cities'.")
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        return attrs
+
+
+class RegionQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    timezone = serializers.CharField(required=False, default=settings.DEFAULT_TZ)
+    bbox = serializers.CharField(required=False)
+    lat = serializers.FloatField(required=False, min_value=-90.0, max_value=90.0)
+    lon = serializers.FloatField(required=False, min_value=-180.0, max_value=180.0)
+    radius_km = serializers.FloatField(required=False, min_value=0.0)
+    nearest = serializers.IntegerField(required=False, min_value=1, max_value=settings.REGION_MAX_CITIES)
+    limit = serializers.IntegerField(required=False, default=settings.REGION_MAX_CITIES,
+                                     min_value=1, max_value=settings.REGION_MAX_CITIES)
+
+    def validate_bbox(self, value):
+        try:
+            min_lat, min_lon, max_lat, max_lon = (float(v) for v in value.split(","))
+        except ValueError:
+            raise serializers.ValidationError("Expected 'min_lat,min_lon,max_lat,max_lon'.")
+        if not (-90.0 <= min_lat <= max_lat <= 90.0):
+            raise serializers.ValidationError("Latitudes must satisfy -90 <= min_lat <= max_lat <= 90.")
+        if not all(-180.0 <= lon <= 180.0 for lon in (min_lon, max_lon)):
+            raise serializers.ValidationError("Longitudes must be between -180 and 180.")
+        return [min_lat, min_lon, max_lat, max_lon]
+
+    def validate(self, attrs):
+        point = "lat" in attrs and "lon" in attrs
+        selectors = ["bbox" in attrs, point and "radius_km" in attrs, point and "nearest" in attrs]
+        if sum(selectors) != 1:
+            raise serializers.ValidationError(
+                "Provide exactly one of 'bbox', 'lat'+'lon'+'radius_km' or 'lat'+'lon'+'nearest'.")
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    city = serializers.CharField(required=False, allow_blank=True)
+    cities = serializers.CharField(required=False, allow_blank=True)
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    timezone = serializers.CharField(required=False, default=settings.DEFAULT_TZ)
+    output = serializers.ChoiceField(choices=FORMATS, required=False, default=CSV)
+
+    def validate(self, attrs):
+        if not (attrs.get("city") or attrs.get("cities")):
+            raise serializers.ValidationError("You must provide 'city' or 'cities'.")
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        return attrs
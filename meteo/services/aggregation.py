@@ -0,0 +1,438 @@
+import asyncio
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone as py_timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Avg, Count, Max, Min, Q, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+from meteo.models import City, HourlyWeather
+from meteo.services.compact import hourly_series, hourly_series_many
+from meteo.services.hotcache import hot_series
+from meteo.services.instrumentation import phase
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.planner import Periods, planned_periods
+from meteo.services.sketches import TemperatureSketch
+from meteo.services.timebuckets import local_dates, utc_range
+
+
+@dataclass
+class Extreme:
+    value: float
+    date_time: datetime
+
+
+@dataclass
+class TemperatureAggregate:
+    hours: int = 0
+    temperature_hours: int = 0
+    """Hours with a temperature, the weight of ``average``."""
+    average: float | None = None
+    average_by_day: dict[date, float | None] = field(default_factory=dict)
+    max: Extreme | None = None
+    min: Extreme | None = None
+    hours_above: int = 0
+    hours_below: int = 0
+
+
+@dataclass
+class PeriodPrecipitation:
+    """Precipitation of a whole rolled-up period (month) whose days are not listed."""
+    total: float
+    days_with_precipitation: int
+    max_day: tuple[date, float] | None
+
+
+@dataclass
+class PrecipitationAggregate:
+    hours: int = 0
+    total_by_day: dict[date, float] = field(default_factory=dict)
+    periods: list[PeriodPrecipitation] = field(default_factory=list)
+
+    @property
+    def total(self) -> float:
+        return float(sum(self.total_by_day.values()) + sum(p.total for p in self.periods))
+
+    @property
+    def days_with_precipitation(self) -> int:
+        return (sum(1 for v in self.total_by_day.values() if v > 0)
+                + sum(p.days_with_precipitation for p in self.periods))
+
+    @property
+    def max_day(self) -> tuple[date, float] | None:
+        """Wettest day; the earliest one on ties."""
+        candidates = list(self.total_by_day.items()) + [p.max_day for p in self.periods if p.max_day]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda item: (-item[1], item[0]))
+
+
+def hourly_in_range(city: City, start: date, end: date, tz: ZoneInfo) -> QuerySet[HourlyWeather]:
+    return HourlyWeather.objects.filter(city=city, date_time__range=utc_range(start, end, tz))
+
+
+def _threshold_counts(qs: QuerySet[HourlyWeather], threshold: float | None,
+                      threshold_low: float | None) -> dict:
+    aggregates = {}
+    if threshold is not None:
+        aggregates["hours_above"] = Count("pk", filter=Q(temperature_2m__gt=threshold))
+    if threshold_low is not None:
+        aggregates["hours_below"] = Count("pk", filter=Q(temperature_2m__lt=threshold_low))
+    return aggregates
+
+
+def _temperature_from_periods(
+    periods: Periods, tz: ZoneInfo, threshold: float | None, threshold_low: float | None,
+) -> TemperatureAggregate:
+    """
+    Merge planned rollup periods: hour-weighted mean, extremes by value with
+    the earliest hour on ties, threshold hours from the temperature sketches.
+    """
+    rows = periods.months + periods.days
+    result = TemperatureAggregate(hours=sum(r.hours for r in rows))
+    result.average_by_day = {d.date: d.temperature_mean for d in periods.days}
+    with_temp = [r for r in rows if r.temperature_hours]
+    if not with_temp:
+        return result
+    result.temperature_hours = sum(r.temperature_hours for r in with_temp)
+    result.average = sum(r.temperature_mean * r.temperature_hours for r in with_temp) / result.temperature_hours
+    hottest = min(with_temp, key=lambda r: (-r.temperature_max, r.temperature_max_at))
+    coldest = min(with_temp, key=lambda r: (r.temperature_min, r.temperature_min_at))
+    result.max = Extreme(value=hottest.temperature_max, date_time=hottest.temperature_max_at.astimezone(tz))
+    result.min = Extreme(value=coldest.temperature_min, date_time=coldest.temperature_min_at.astimezone(tz))
+    if threshold is not None or threshold_low is not None:
+        with phase("merge"):
+            sketch = TemperatureSketch.merge(TemperatureSketch.from_bytes(r.temperature_sketch) for r in with_temp)
+        if threshold is not None:
+            result.hours_above = sketch.count_above(threshold)
+        if threshold_low is not None:
+            result.hours_below = sketch.count_below(threshold_low)
+    return result
+
+
+def _precipitation_from_periods(periods: Periods) -> PrecipitationAggregate:
+    return PrecipitationAggregate(
+        hours=sum(r.hours for r in periods.months + periods.days),
+        total_by_day={d.date: d.precipitation_total for d in periods.days},
+        periods=[PeriodPrecipitation(m.precipitation_total, m.precipitation_days,
+                                     (m.precipitation_max_date, m.precipitation_max)
+                                     if m.precipitation_max_date else None)
+                 for m in periods.months],
+    )
+
+
+def local_days(series: HourlySeries, tz: ZoneInfo) -> np.ndarray:
+    """Local calendar day (``datetime64[D]``) of every hour of ``series``."""
+    with phase("tz_convert"):
+        return local_dates(series.date_time, tz)
+
+
+def _series_extreme(series: HourlySeries, index: int, tz: ZoneInfo) -> Extreme:
+    epoch = int(series.date_time[index].astype("datetime64[s]").astype(np.int64))
+    return Extreme(value=float(series.temperature_2m[index]),
+                   date_time=datetime.fromtimestamp(epoch, tz=py_timezone.utc).astimezone(tz))
+
+
+def temperature_from_series(
+    series: HourlySeries,
+    tz: ZoneInfo,
+    threshold: float | None = None,
+    threshold_low: float | None = None,
+    by_day: bool = True,
+) -> TemperatureAggregate:
+    """Same aggregates as :func:`temperature_stats`, computed with NumPy over a time-ordered series."""
+    result = TemperatureAggregate(hours=len(series))
+    temps = series.temperature_2m
+    valid = ~np.isnan(temps)
+    if not result.hours or not valid.any():
+        return result
+
+    result.temperature_hours = int(valid.sum())
+    result.average = float(temps[valid].mean())
+    result.max = _series_extreme(series, int(np.nanargmax(temps)), tz)
+    result.min = _series_extreme(series, int(np.nanargmin(temps)), tz)
+    with np.errstate(invalid="ignore"):
+        if threshold is not None:
+            result.hours_above = int(np.sum(temps > threshold))
+        if threshold_low is not None:
+            result.hours_below = int(np.sum(temps < threshold_low))
+    if by_day:
+        hour_days = local_days(series, tz)
+        with phase("groupby"):
+            days, inverse = np.unique(hour_days, return_inverse=True)
+            sums = np.bincount(inverse, weights=np.where(valid, temps, 0.0), minlength=len(days))
+            counts = np.bincount(inverse, weights=valid, minlength=len(days))
+        result.average_by_day = {
+            day.item(): (float(total / n) if n else None)
+            for day, total, n in zip(days, sums, counts)
+        }
+    return result
+
+
+def precipitation_from_series(series: HourlySeries, tz: ZoneInfo) -> PrecipitationAggregate:
+    """Same aggregates as :func:`precipitation_stats`, computed with NumPy over a series."""
+    result = PrecipitationAggregate(hours=len(series))
+    if not result.hours:
+        return result
+    hour_days = local_days(series, tz)
+    with phase("groupby"):
+        days, inverse = np.unique(hour_days, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.nan_to_num(series.precipitation, nan=0.0), minlength=len(days))
+    result.total_by_day = {day.item(): float(total) for day, total in zip(days, totals)}
+    return result
+
+
+def _compact_series(city: City, start: date, end: date, tz: ZoneInfo) -> HourlySeries | None:
+    """Hours to aggregate with NumPy from compact storage when enabled, otherwise None (database path)."""
+    if settings.COMPACT_STORAGE:
+        return hourly_series(city, *utc_range(start, end, tz))
+    return None
+
+
+def _extreme(qs: QuerySet[HourlyWeather], order: str, tz: ZoneInfo) -> Extreme | None:
+    row = (qs.filter(temperature_2m__isnull=False)
+           .order_by(order, "date_time")
+           .values("date_time", "temperature_2m")
+           .first())
+    if row is None:
+        return None
+    return Extreme(value=float(row["temperature_2m"]),
+                   date_time=row["date_time"].astimezone(tz))
+
+
+def temperature_stats(
+    city: City,
+    start: date,
+    end: date,
+    tz: ZoneInfo,
+    threshold: float | None = None,
+    threshold_low: float | None = None,
+    by_day: bool = True,
+) -> TemperatureAggregate:
+    """
+    Temperature aggregates computed in the database (with NumPy for ranges
+    in the hot cache, or over compact storage when there is no rollup).
+
+    When ``tz`` is rolled up the figures come from the planned rollup
+    periods (see :mod:`planner`): whole months when ``by_day`` is off,
+    otherwise days, with threshold hours read from the daily temperature
+    sketches and raw hours only for days missing a rollup. Otherwise days are
+    bucketed in ``tz`` (``AT TIME ZONE`` on PostgreSQL), threshold hours are
+    counted with ``COUNT(*) FILTER (...)`` and the extremes are looked up with
+    an ordered ``LIMIT 1`` so only a handful of rows are read back.
+    """
+    series = hot_series(city, *utc_range(start, end, tz))
+    if series is not None:
+        return temperature_from_series(series, tz, threshold, threshold_low, by_day)
+
+    periods = planned_periods([city], start, end, tz, months=not by_day).get(city.pk)
+    if periods is not None:
+        return _temperature_from_periods(periods, tz, threshold, threshold_low)
+
+    series = _compact_series(city, start, end, tz)
+    if series is not None:
+        return temperature_from_series(series, tz, threshold, threshold_low, by_day)
+
+    qs = hourly_in_range(city, start, end, tz)
+
+    aggregates = {"hours": Count("pk"), "temperature_hours": Count("temperature_2m"),
+                  "average": Avg("temperature_2m"), **_threshold_counts(qs, threshold, threshold_low)}
+    totals = qs.aggregate(**aggregates)
+    result = TemperatureAggregate(hours=totals["hours"])
+    if not result.hours:
+        return result
+
+    result.temperature_hours = totals["temperature_hours"]
+    result.average = totals["average"]
+    result.hours_above = totals.get("hours_above", 0)
+    result.hours_below = totals.get("hours_below", 0)
+    result.max = _extreme(qs, "-temperature_2m", tz)
+    result.min = _extreme(qs, "temperature_2m", tz)
+    if by_day:
+        daily = (qs.annotate(day=TruncDate("date_time", tzinfo=tz))
+                 .values("day")
+                 .annotate(average=Avg("temperature_2m"))
+                 .order_by("day"))
+        result.average_by_day = {row["day"]: row["average"] for row in daily}
+    return result
+
+
+def precipitation_stats(city: City, start: date, end: date, tz: ZoneInfo) -> PrecipitationAggregate:
+    """Daily precipitation totals (missing hours count as 0), from the rollup when available."""
+    series = hot_series(city, *utc_range(start, end, tz))
+    if series is not None:
+        return precipitation_from_series(series, tz)
+
+    periods = planned_periods([city], start, end, tz, months=False).get(city.pk)
+    if periods is not None:
+        return _precipitation_from_periods(periods)
+
+    series = _compact_series(city, start, end, tz)
+    if series is not None:
+        return precipitation_from_series(series, tz)
+
+    daily = (hourly_in_range(city, start, end, tz)
+             .annotate(day=TruncDate("date_time", tzinfo=tz))
+             .values("day")
+             .annotate(hours=Count("pk"), total=Coalesce(Sum("precipitation"), Value(0.0)))
+             .order_by("day"))
+    result = PrecipitationAggregate()
+    for row in daily:
+        result.hours += row["hours"]
+        result.total_by_day[row["day"]] = float(row["total"])
+    return result
+
+
+def _extremes_by_city(qs: QuerySet[HourlyWeather], values: dict[int, float], tz: ZoneInfo) -> dict[int, Extreme]:
+    """Earliest hour of each city whose temperature equals the given value."""
+    if not values:
+        return {}
+    match = Q()
+    for city_id, value in values.items():
+        match |= Q(city_id=city_id, temperature_2m=value)
+    out = {}
+    for row in qs.filter(match).order_by("date_time").values("city_id", "date_time", "temperature_2m"):
+        out.setdefault(row["city_id"], Extreme(value=float(row["temperature_2m"]),
+                                               date_time=row["date_time"].astimezone(tz)))
+    return out
+
+
+def _summary_from_hours(
+    city_ids: list[int], start: date, end: date, tz: ZoneInfo,
+) -> dict[int, tuple[TemperatureAggregate, PrecipitationAggregate]]:
+    qs = HourlyWeather.objects.filter(city_id__in=city_ids, date_time__range=utc_range(start, end, tz))
+    out = {city_id: (TemperatureAggregate(), PrecipitationAggregate()) for city_id in city_ids}
+
+    maxima, minima = {}, {}
+    totals = (qs.values("city_id")
+              .annotate(hours=Count("pk"), temperature_hours=Count("temperature_2m"),
+                        average=Avg("temperature_2m"), max=Max("temperature_2m"), min=Min("temperature_2m"))
+              .order_by())
+    for row in totals:
+        temperature = out[row["city_id"]][0]
+        temperature.hours = row["hours"]
+        temperature.temperature_hours = row["temperature_hours"]
+        temperature.average = row["average"]
+        if row["max"] is not None:
+            maxima[row["city_id"]] = row["max"]
+            minima[row["city_id"]] = row["min"]
+
+    daily = (qs.annotate(day=TruncDate("date_time", tzinfo=tz))
+             .values("city_id", "day")
+             .annotate(hours=Count("pk"), total=Coalesce(Sum("precipitation"), Value(0.0)))
+             .order_by("city_id", "day"))
+    for row in daily:
+        precipitation = out[row["city_id"]][1]
+        precipitation.hours += row["hours"]
+        precipitation.total_by_day[row["day"]] = float(row["total"])
+
+    for city_id, extreme in _extremes_by_city(qs, maxima, tz).items():
+        out[city_id][0].max = extreme
+    for city_id, extreme in _extremes_by_city(qs, minima, tz).items():
+        out[city_id][0].min = extreme
+    return out
+
+
+def summary_stats(
+    cities: list[City], start: date, end: date, tz: ZoneInfo,
+) -> dict[int, tuple[TemperatureAggregate, PrecipitationAggregate]]:
+    """
+    Temperature and precipitation aggregates for many cities at once, keyed
+    by city id. The number of queries does not depend on ``len(cities)``:
+    cities with an up-to-date hot cache file are read from it (stale files
+    are left for the next single-city read to rebuild), rolled-up cities
+    are answered from the planned MonthlyWeather and DailyWeather periods
+    and the rest from grouped (city, day) aggregations over the hourly
+    table, or from one batched read of the packed months and raw rows with
+    compact storage.
+    """
+    out = {}
+    for city in cities:
+        series = hot_series(city, *utc_range(start, end, tz), rebuild=False)
+        if series is not None:
+            out[city.pk] = (temperature_from_series(series, tz, by_day=False),
+                            precipitation_from_series(series, tz))
+    rest = [city for city in cities if city.pk not in out]
+    if not rest:
+        return out
+
+    for city_id, periods in planned_periods(rest, start, end, tz).items():
+        out[city_id] = (_temperature_from_periods(periods, tz, None, None),
+                        _precipitation_from_periods(periods))
+    missing = [city for city in {c.pk: c for c in rest}.values() if city.pk not in out]
+    if not missing:
+        return out
+    if settings.COMPACT_STORAGE:
+        for city_id, series in hourly_series_many(missing, *utc_range(start, end, tz)).items():
+            out[city_id] = (temperature_from_series(series, tz, by_day=False),
+                            precipitation_from_series(series, tz))
+    else:
+        out.update(_summary_from_hours([city.pk for city in missing], start, end, tz))
+    return out
+
+
+async def asummary_stats(
+    cities: list[City],
+    start: date,
+    end: date,
+    tz: ZoneInfo,
+    concurrency: int | None = None,
+) -> dict[int, tuple[TemperatureAggregate, PrecipitationAggregate]]:
+    """
+    :func:`summary_stats` for async callers. The cities are split into at
+    most ``concurrency`` (default ``SUMMARY_CONCURRENCY``) groups, each
+    aggregated with the batched queries in its own worker thread and
+    database connection.
+    """
+    cities = list({c.pk: c for c in cities}.values())
+    concurrency = max(1, concurrency or settings.SUMMARY_CONCURRENCY)
+    if len(cities) <= 1 or concurrency == 1:
+        return await sync_to_async(summary_stats)(cities, start, end, tz)
+
+    def run(group):
+        try:
+            return summary_stats(group, start, end, tz)
+        finally:
+            connections.close_all()
+
+    size = math.ceil(len(cities) / concurrency)
+    groups = [cities[i:i + size] for i in range(0, len(cities), size)]
+    out = {}
+    for result in await asyncio.gather(*(sync_to_async(run, thread_sensitive=False)(g) for g in groups)):
+        out.update(result)
+    return out
+
+
+@dataclass
+class RegionAggregate:
+    cities: int = 0
+    average: float | None = None
+    max: tuple[int, Extreme] | None = None
+    min: tuple[int, Extreme] | None = None
+    precipitation_mean: float | None = None
+    precipitation_max: tuple[int, float] | None = None
+
+
+def region_stats(stats: dict[int, tuple[TemperatureAggregate, PrecipitationAggregate]]) -> RegionAggregate:
+    """
+    Combine the :func:`summary_stats` results of the cities of a region:
+    average temperature weighted by the hours with a temperature, the hottest and coldest hours with
+    their city id, and the mean and largest city precipitation totals.
+    """
+    result = RegionAggregate(cities=len(stats))
+    measured = [(pk, t) for pk, (t, _) in stats.items() if t.average is not None]
+    if measured:
+        weight = sum(t.temperature_hours for _, t in measured)
+        result.average = sum(t.average * t.temperature_hours for _, t in measured) / weight
+        result.max = max(((pk, t.max) for pk, t in measured if t.max), key=lambda m: m[1].value, default=None)
+        result.min = min(((pk, t.min) for pk, t in measured if t.min), key=lambda m: m[1].value, default=None)
+    totals = [(pk, p.total) for pk, (_, p) in stats.items() if p.hours]
+    if totals:
+        result.precipitation_mean = sum(total for _, total in totals) / len(totals)
+        result.precipitation_max = max(totals, key=lambda item: item[1])
+    return result
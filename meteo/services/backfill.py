@@ -0,0 +1,80 @@
+import threading
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+
+import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def split_range(start: date, end: date, chunk: str | None) -> list[tuple[date, date]]:
+    """Split ``start..end`` (inclusive) at calendar month or year boundaries."""
+    if chunk not in (None, "", "none", "month", "year"):
+        raise ValueError(f"Unknown chunk size: {chunk}")
+    if end < start:
+        return []
+    if chunk in (None, "", "none"):
+        return [(start, end)]
+
+    out = []
+    current = start
+    while current <= end:
+        if chunk == "year":
+            boundary = date(current.year + 1, 1, 1)
+        elif current.month == 12:
+            boundary = date(current.year + 1, 1, 1)
+        else:
+            boundary = date(current.year, current.month + 1, 1)
+        chunk_end = min(boundary - timedelta(days=1), end)
+        out.append((current, chunk_end))
+        current = chunk_end + timedelta(days=1)
+    return out
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float | None, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in RETRY_STATUS
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def with_retries(
+    fn: Callable,
+    retries: int = 3,
+    backoff: float = 1.0,
+    limiter: RateLimiter | None = None,
+    sleep=time.sleep,
+):
+    """Call ``fn`` with exponential backoff on transient HTTP errors."""
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= retries or not is_retryable(exc):
+                raise
+            sleep(backoff * (2 ** attempt))
+            attempt += 1
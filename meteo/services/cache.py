@@ -0,0 +1,63 @@
+import hashlib
+import json
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from meteo.models import City
+
+KEY_PREFIX = "meteo:stats"
+
+
+def stats_cache():
+    return caches[settings.STATS_CACHE_ALIAS]
+
+
+def _digest(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cache_key(view: str, params: dict, cities: Iterable[City]) -> str:
+    """
+    Key for a stats result. Each city contributes its ``data_updated_at``, so
+    a load for that city moves its requests to fresh keys and the old
+    entries simply age out (TTL / MAX_ENTRIES), in every worker process.
+    """
+    versions = sorted((c.pk, c.data_updated_at.isoformat() if c.data_updated_at else "") for c in cities)
+    return f"{KEY_PREFIX}:{view}:{_digest([params, versions])}"
+
+
+def last_modified(cities: Iterable[City]) -> datetime | None:
+    stamps = [c.data_updated_at for c in cities if c.data_updated_at]
+    return max(stamps) if stamps else None
+
+
+def get_or_compute(key: str, compute: Callable[[], dict]) -> tuple[dict, str]:
+    """Cached ``(payload, etag)`` for ``key``, computing and storing it on a miss."""
+    cache = stats_cache()
+    entry = cache.get(key)
+    if entry is None:
+        payload = compute()
+        entry = {"payload": payload, "etag": f'"{_digest(payload)}"'}
+        cache.set(key, entry)
+    return entry["payload"], entry["etag"]
+
+
+async def aget_or_compute(key: str, compute: Callable[[], Awaitable[dict]]) -> tuple[dict, str]:
+    """Async :func:`get_or_compute`; ``compute`` is a coroutine function."""
+    cache = stats_cache()
+    entry = await cache.aget(key)
+    if entry is None:
+        payload = await compute()
+        entry = {"payload": payload, "etag": f'"{_digest(payload)}"'}
+        await cache.aset(key, entry)
+    return entry["payload"], entry["etag"]
+
+
+def mark_city_updated(city: City) -> None:
+    """Record that ``city`` received new rows, invalidating its cached results."""
+    city.data_updated_at = timezone.now()
+    City.objects.filter(pk=city.pk).update(data_updated_at=city.data_updated_at)
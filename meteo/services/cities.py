@@ -0,0 +1,138 @@
+"""
+City name resolution shared by the views, ingest and commands.
+
+Names are matched on ``City.name_key`` (see :mod:`names`), an indexed
+accent- and case-folded column. Each process remembers which city pk a
+key resolved to, so repeated lookups become primary-key fetches (always
+one query, and the rows, with their ``data_updated_at`` cache versions,
+are always current), and builds an in-memory trigram index for "did you
+mean" suggestions on first use. Both are dropped when the cities version
+token in the stats cache changes (City saves and deletes replace it). The
+token is only shared between processes when the stats cache is (Redis,
+Memcached, file or database cache); with the default ``LocMemCache``
+other workers keep their structures until they restart.
+"""
+import threading
+import uuid
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from meteo.models import City
+from meteo.services.cache import stats_cache
+from meteo.services.names import name_key, trigrams
+
+VERSION_KEY = "meteo:cities:version"
+SIMILARITY = 0.25
+
+
+def _bump_version() -> str:
+    token = uuid.uuid4().hex
+    stats_cache().set(VERSION_KEY, token, None)
+    return token
+
+
+def mark_cities_changed(**kwargs) -> None:
+    """Invalidate the per-process city structures now and again once the current transaction commits."""
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def cities_version() -> str:
+    return stats_cache().get(VERSION_KEY) or _bump_version()
+
+
+class NameIndex:
+    def __init__(self, rows):
+        self.pks: dict[str, int] = {}
+        self.names: list[str] = []
+        postings = defaultdict(list)
+        sizes = []
+        for pk, name, key in rows:
+            if key in self.pks:
+                continue
+            self.pks[key] = pk
+            grams = trigrams(key)
+            for gram in grams:
+                postings[gram].append(len(self.names))
+            self.names.append(name)
+            sizes.append(len(grams))
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.int64)
+
+    @classmethod
+    def from_db(cls) -> "NameIndex":
+        return cls(City.objects.order_by("pk").values_list("pk", "name", "name_key"))
+
+    def suggest(self, name: str, limit: int = 3) -> list[str]:
+        """Names of up to ``limit`` cities whose trigram similarity to ``name`` is at least ``SIMILARITY``."""
+        grams = trigrams(name_key(name))
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        candidates = np.flatnonzero(shared)
+        scores = shared[candidates] / (len(grams) + self.sizes[candidates] - shared[candidates])
+        keep = scores >= SIMILARITY
+        candidates, scores = candidates[keep], scores[keep]
+        order = np.lexsort((candidates, -scores))[:limit]
+        return [self.names[i] for i in candidates[order]]
+
+
+_lock = threading.Lock()
+_index: NameIndex | None = None
+_resolved: dict[str, int] = {}
+_version: str | None = None
+
+
+def _sync(version: str) -> None:
+    global _index, _version
+    if version != _version:
+        _index, _version = None, version
+        _resolved.clear()
+
+
+def name_index() -> NameIndex:
+    global _index
+    version = cities_version()
+    with _lock:
+        _sync(version)
+        if _index is None:
+            _index = NameIndex.from_db()
+        return _index
+
+
+def cities_by_name(names: list[str]) -> dict[str, City]:
+    """
+    Resolve city names (any case or accents) with one query, keyed by
+    ``name_key``. When several cities share a key the oldest wins.
+    """
+    keys = {name_key(n) for n in names}
+    if not keys:
+        return {}
+    version = cities_version()
+    with _lock:
+        _sync(version)
+        known = {key: _resolved[key] for key in keys if key in _resolved}
+    match = Q(pk__in=known.values()) if known else Q()
+    if keys - known.keys():
+        match |= Q(name_key__in=keys - known.keys())
+    found = {}
+    for city in City.objects.filter(match).order_by("pk"):
+        if city.name_key in keys:
+            found.setdefault(city.name_key, city)
+    with _lock:
+        if version == _version:
+            _resolved.update((key, city.pk) for key, city in found.items())
+    return found
+
+
+def resolve_city(name: str) -> City | None:
+    return cities_by_name([name]).get(name_key(name))
+
+
+def suggest(name: str, limit: int = 3) -> list[str]:
+    """'Did you mean' candidates for an unknown city name."""
+    return name_index().suggest(name, limit)
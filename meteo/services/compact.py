@@ -0,0 +1,158 @@
+"""
+Compact storage for hourly measurements.
+
+Each PackedHourlyWeather row holds one UTC month of a city as two int16
+arrays scaled by 10 (Open-Meteo reports both variables with 0.1
+precision), with ``MISSING`` marking empty slots: about 3 KB per
+city-month instead of ~744 heap tuples plus their index entries.
+``hourly_series`` (``hourly_series_many`` for a batch of cities) expands
+packed months and raw HourlyWeather rows back into the
+:class:`HourlySeries` the rest of the code consumes.
+"""
+from datetime import date, datetime, timezone as py_timezone
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+
+from meteo.models import City, HourlyWeather, PackedHourlyWeather
+from meteo.services.instrumentation import phase
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.partitioning import next_period
+
+SCALE = 10.0
+MISSING = np.iinfo(np.int16).min
+DTYPE = np.dtype("<i2")
+
+
+def _month_bounds(month: date) -> tuple[np.datetime64, int]:
+    first = np.datetime64(month.isoformat(), "s")
+    last = np.datetime64(next_period(month, "month").isoformat(), "s")
+    return first, int((last - first) // np.timedelta64(1, "h"))
+
+
+def encode(values: np.ndarray) -> bytes:
+    scaled = np.round(values * SCALE)
+    scaled = np.where(np.isnan(values), MISSING, np.clip(scaled, MISSING + 1, np.iinfo(np.int16).max))
+    return scaled.astype(DTYPE).tobytes()
+
+
+def decode(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(bytes(data), dtype=DTYPE)
+    return np.where(raw == MISSING, np.nan, raw / SCALE)
+
+
+def cities_with_hours() -> QuerySet[City]:
+    """Cities with raw or packed hours (raw rows may have been dropped after packing), by pk."""
+    return (City.objects
+            .filter(Exists(HourlyWeather.objects.filter(city=OuterRef("pk")))
+                    | Exists(PackedHourlyWeather.objects.filter(city=OuterRef("pk"))))
+            .order_by("pk"))
+
+
+def _empty() -> HourlySeries:
+    return HourlySeries(np.array([], dtype="datetime64[s]"), np.array([]), np.array([]))
+
+
+def _raw_series(city_ids: list[int], start: datetime, end: datetime) -> dict[int, HourlySeries]:
+    rows: dict[int, list[dict]] = {}
+    for city_id, dt, temperature, precipitation in (HourlyWeather.objects
+                                                     .filter(city_id__in=city_ids, date_time__range=(start, end))
+                                                     .order_by("city_id", "date_time")
+                                                     .values_list("city_id", "date_time", "temperature_2m",
+                                                                  "precipitation")):
+        rows.setdefault(city_id, []).append(
+            {"date_time": dt, "temperature_2m": temperature, "precipitation": precipitation})
+    with phase("dataframe"):
+        return {city_id: HourlySeries.from_rows(rows[city_id]) if city_id in rows else _empty()
+                for city_id in city_ids}
+
+
+def _packed_series(city_ids: list[int], start: datetime, end: datetime) -> dict[int, HourlySeries]:
+    first_month = date(start.astimezone(py_timezone.utc).year, start.astimezone(py_timezone.utc).month, 1)
+    parts: dict[int, tuple[list, list, list]] = {}
+    for packed in (PackedHourlyWeather.objects
+                   .filter(city_id__in=city_ids,
+                           month__range=(first_month, end.astimezone(py_timezone.utc).date()))
+                   .order_by("city_id", "month")):
+        first, _ = _month_bounds(packed.month)
+        with phase("decode"):
+            temperature = decode(packed.temperature_2m)
+            precipitation = decode(packed.precipitation)
+        present = ~(np.isnan(temperature) & np.isnan(precipitation))
+        slots = np.flatnonzero(present)
+        times, temps, precs = parts.setdefault(packed.city_id, ([], [], []))
+        times.append(first + slots.astype("timedelta64[h]"))
+        temps.append(temperature[slots])
+        precs.append(precipitation[slots])
+    return {city_id: HourlySeries(np.concatenate(parts[city_id][0]).astype("datetime64[s]"),
+                                  np.concatenate(parts[city_id][1]), np.concatenate(parts[city_id][2]))
+            if city_id in parts else _empty()
+            for city_id in city_ids}
+
+
+def _merge(preferred: HourlySeries, other: HourlySeries) -> HourlySeries:
+    """Union of two series ordered by time; ``preferred`` wins on equal timestamps."""
+    times = np.concatenate([preferred.date_time, other.date_time])
+    _, first = np.unique(times, return_index=True)
+    return HourlySeries(times[first],
+                        np.concatenate([preferred.temperature_2m, other.temperature_2m])[first],
+                        np.concatenate([preferred.precipitation, other.precipitation])[first])
+
+
+def hourly_series_many(cities: list[City], start: datetime, end: datetime) -> dict[int, HourlySeries]:
+    """
+    :func:`hourly_series` of every city, keyed by pk, with one query for the
+    packed months and one for the raw rows whatever the number of cities.
+    """
+    city_ids = list(dict.fromkeys(city.pk for city in cities))
+    if not city_ids:
+        return {}
+    lo = np.datetime64(start.astimezone(py_timezone.utc).replace(tzinfo=None), "s")
+    hi = np.datetime64(end.astimezone(py_timezone.utc).replace(tzinfo=None), "s")
+    raw = _raw_series(city_ids, start, end)
+    out = {}
+    for city_id, packed in _packed_series(city_ids, start, end).items():
+        keep = (packed.date_time >= lo) & (packed.date_time <= hi)
+        packed = HourlySeries(packed.date_time[keep], packed.temperature_2m[keep], packed.precipitation[keep])
+        out[city_id] = _merge(raw[city_id], packed) if len(packed) else raw[city_id]
+    return out
+
+
+def hourly_series(city: City, start: datetime, end: datetime) -> HourlySeries:
+    """
+    Hours of ``city`` in ``start..end`` (inclusive) from packed months and
+    raw rows; a raw row overrides the packed value for the same hour.
+    """
+    return hourly_series_many([city], start, end)[city.pk]
+
+
+def pack_month(city: City, month: date, drop_hourly: bool = False) -> int:
+    """
+    Pack (or re-pack) one UTC month of ``city`` from its raw hours, keeping
+    previously packed values for hours without a raw row. With
+    ``drop_hourly`` the raw rows are deleted afterwards. Returns the number
+    of hours stored in the packed row.
+    """
+    first, hours = _month_bounds(month)
+    start = datetime.fromisoformat(month.isoformat()).replace(tzinfo=py_timezone.utc)
+    end = datetime.fromisoformat(next_period(month, "month").isoformat()).replace(tzinfo=py_timezone.utc)
+    with transaction.atomic():
+        series = hourly_series(city, start, end)
+        slots = ((series.date_time - first) // np.timedelta64(1, "h")).astype(np.int64)
+        inside = (slots >= 0) & (slots < hours)
+        temperature = np.full(hours, np.nan)
+        precipitation = np.full(hours, np.nan)
+        temperature[slots[inside]] = series.temperature_2m[inside]
+        precipitation[slots[inside]] = series.precipitation[inside]
+        stored = int(inside.sum())
+        if stored:
+            PackedHourlyWeather.objects.update_or_create(
+                city=city, month=month,
+                defaults={"hours": hours,
+                          "temperature_2m": encode(temperature),
+                          "precipitation": encode(precipitation)},
+            )
+        if drop_hourly:
+            HourlyWeather.objects.filter(city=city, date_time__gte=start, date_time__lt=end).delete()
+    return stored
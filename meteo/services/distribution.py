@@ -0,0 +1,72 @@
+"""
+Temperature percentiles, precipitation intensity histograms and degree
+days over arbitrary ranges, merged from the per-day sketches of the daily
+rollup (see :mod:`sketches`) instead of rescanning the hours. Days without
+a rollup row and time zones that are not rolled up are summarised from
+the hours (packed months included with compact storage) with the same
+code.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from zoneinfo import ZoneInfo
+
+from meteo.models import City, DailyWeather
+from meteo.services.instrumentation import phase
+from meteo.services.planner import planned_periods
+from meteo.services.rollup import daily_rows, hourly_records
+from meteo.services.sketches import PrecipitationHistogram, TemperatureSketch
+
+
+@dataclass
+class DistributionAggregate:
+    days: int = 0
+    temperature: TemperatureSketch = field(default_factory=TemperatureSketch.empty)
+    precipitation: PrecipitationHistogram = field(default_factory=PrecipitationHistogram.empty)
+    heating_degree_days: float = 0.0
+    cooling_degree_days: float = 0.0
+
+    @classmethod
+    def merge(cls, aggregates: list["DistributionAggregate"]) -> "DistributionAggregate":
+        return cls(
+            days=sum(a.days for a in aggregates),
+            temperature=TemperatureSketch.merge(a.temperature for a in aggregates),
+            precipitation=PrecipitationHistogram.merge(a.precipitation for a in aggregates),
+            heating_degree_days=sum(a.heating_degree_days for a in aggregates),
+            cooling_degree_days=sum(a.cooling_degree_days for a in aggregates),
+        )
+
+
+def from_days(days: list[DailyWeather], base: float) -> DistributionAggregate:
+    """
+    Merge the sketches of rollup days. Degree days use the daily mean
+    temperature against ``base`` (days without temperatures are skipped).
+    """
+    means = [d.temperature_mean for d in days if d.temperature_hours]
+    return DistributionAggregate(
+        days=len(days),
+        temperature=TemperatureSketch.merge(TemperatureSketch.from_bytes(d.temperature_sketch) for d in days),
+        precipitation=PrecipitationHistogram.merge(
+            PrecipitationHistogram.from_bytes(d.precipitation_histogram) for d in days),
+        heating_degree_days=sum(max(base - m, 0.0) for m in means),
+        cooling_degree_days=sum(max(m - base, 0.0) for m in means),
+    )
+
+
+def distribution_stats(
+    cities: list[City], start: date, end: date, tz: ZoneInfo, base: float,
+) -> dict[int, DistributionAggregate]:
+    """
+    Per city pk, the distribution of the local days ``start..end`` in
+    ``tz``. Rolled-up cities use the planned days (see :mod:`planner`),
+    which fill days missing a rollup row from their raw hours.
+    """
+    rolled = {pk: periods.days for pk, periods in planned_periods(cities, start, end, tz, months=False).items()}
+
+    result = {}
+    for city in cities:
+        days = rolled.get(city.pk)
+        if days is None:
+            days = [DailyWeather(**row) for row in daily_rows(hourly_records(city, start, end, tz), tz)]
+        with phase("merge"):
+            result[city.pk] = from_days(days, base)
+    return result
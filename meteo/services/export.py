@@ -0,0 +1,224 @@
+"""
+Streaming bulk export of hourly data as CSV, Arrow IPC or Parquet.
+
+Rows are read in fixed-size chunks (a server-side cursor through
+``.iterator(chunk_size=...)``, or ``COPY ... TO STDOUT`` for CSV on
+PostgreSQL) and every chunk is encoded and handed to the caller before the
+next one is read, so memory stays flat whatever the range. Arrow and
+Parquet need the optional ``pyarrow`` package.
+"""
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, timezone as py_timezone
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from meteo.models import City, HourlyWeather
+from meteo.services.compact import hourly_series
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.partitioning import next_period
+
+CSV = "csv"
+ARROW = "arrow"
+PARQUET = "parquet"
+FORMATS = (CSV, ARROW, PARQUET)
+CONTENT_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    ARROW: "application/vnd.apache.arrow.stream",
+    PARQUET: "application/vnd.apache.parquet",
+}
+EXTENSIONS = {CSV: "csv", ARROW: "arrows", PARQUET: "parquet"}
+COLUMNS = ("city", "date_time", "temperature_2m", "precipitation")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def available_formats() -> list[str]:
+    return list(FORMATS) if _pyarrow() else [CSV]
+
+
+def _series_from_values(rows: list[tuple]) -> HourlySeries:
+    _, times, temps, precs = zip(*rows)
+    epochs = np.array([int(t.timestamp()) for t in times], dtype=np.int64)
+    return HourlySeries(epochs.astype("datetime64[s]"),
+                        np.array(temps, dtype=np.float64),
+                        np.array(precs, dtype=np.float64))
+
+
+def _raw_batches(cities: list[City], start: datetime, end: datetime, chunk_size: int):
+    names = {c.pk: c.name for c in cities}
+    rows = (HourlyWeather.objects
+            .filter(city__in=cities, date_time__range=(start, end))
+            .order_by("city_id", "date_time")
+            .values_list("city_id", "date_time", "temperature_2m", "precipitation")
+            .iterator(chunk_size=chunk_size))
+    while chunk := list(islice(rows, chunk_size)):
+        yield np.array([names[row[0]] for row in chunk], dtype=object), _series_from_values(chunk)
+
+
+def _compact_batches(cities: list[City], start: datetime, end: datetime):
+    # One UTC month per batch (at most 744 hours), read through the packed storage.
+    for city in sorted(cities, key=lambda c: c.pk):
+        month = date(start.year, start.month, 1)
+        while month <= end.date():
+            lo = max(start, datetime.combine(month, datetime.min.time(), py_timezone.utc))
+            upper = next_period(month, "month")
+            hi = min(end, datetime.combine(upper, datetime.min.time(), py_timezone.utc))
+            series = hourly_series(city, lo, hi)
+            if hi < end:
+                keep = series.date_time < np.datetime64(hi.replace(tzinfo=None), "s")
+                series = HourlySeries(series.date_time[keep], series.temperature_2m[keep],
+                                      series.precipitation[keep])
+            if len(series):
+                yield np.full(len(series), city.name, dtype=object), series
+            month = upper
+
+
+def batches(cities: list[City], start: datetime, end: datetime, chunk_size: int | None = None):
+    """``(city names, HourlySeries)`` chunks of ``start..end`` ordered by city and time."""
+    start, end = start.astimezone(py_timezone.utc), end.astimezone(py_timezone.utc)
+    if settings.COMPACT_STORAGE:
+        return _compact_batches(cities, start, end)
+    return _raw_batches(cities, start, end, chunk_size or settings.EXPORT_CHUNK_SIZE)
+
+
+def _csv_values(values: np.ndarray) -> list[str]:
+    """
+    Floats as PostgreSQL prints ``double precision`` (see :func:`_copy_float`):
+    the shortest round-trip digits, exponent notation from ``1e+15`` on and
+    ``Infinity``, with ``.0`` kept on whole numbers.
+    """
+    text = values.astype(str)
+    wide = np.isfinite(values) & (np.abs(values) >= 1e15) & (np.abs(values) < 1e16)
+    for i in np.flatnonzero(wide):
+        text[i] = np.format_float_scientific(values[i], unique=True, trim="-", exp_digits=2)
+    text = np.where(np.isinf(values), np.where(values > 0, "Infinity", "-Infinity"), text)
+    return np.where(np.isnan(values), "", text).tolist()
+
+
+def _csv_chunks(chunks) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for names, series in chunks:
+        times = np.char.add(np.datetime_as_string(series.date_time, unit="s"), "Z").tolist()
+        writer.writerows(zip(names.tolist(), times,
+                             _csv_values(series.temperature_2m), _csv_values(series.precipitation)))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _copy_float(column: str) -> str:
+    """
+    SQL text of a float column in the format of :func:`_csv_values`: the
+    ``::text`` output of ``double precision`` (shortest round-trip digits
+    with ``extra_float_digits`` above 0), plus ``.0`` on plain whole numbers.
+    """
+    return (f"CASE WHEN {column}::text ~ '^-?[0-9]+$' THEN {column}::text || '.0' "
+            f"ELSE {column}::text END AS {column.split('.')[-1]}")
+
+
+def _copy_csv(cities: list[City], start: datetime, end: datetime) -> Iterator[bytes]:
+    """
+    CSV through ``COPY ... TO STDOUT``, byte-identical to :func:`_csv_chunks`.
+    Chunks are the blocks psycopg receives, not ``EXPORT_CHUNK_SIZE`` rows.
+    """
+    hourly = connection.ops.quote_name(HourlyWeather._meta.db_table)
+    city = connection.ops.quote_name(City._meta.db_table)
+    sql = (
+        "COPY (SELECT c.name AS city, "
+        "to_char(h.date_time AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS\"Z\"') AS date_time, "
+        f"{_copy_float('h.temperature_2m')}, {_copy_float('h.precipitation')} "
+        f"FROM {hourly} h JOIN {city} c ON c.id = h.city_id "
+        "WHERE h.city_id = ANY(%s) AND h.date_time BETWEEN %s AND %s "
+        "ORDER BY h.city_id, h.date_time) TO STDOUT WITH (FORMAT csv, HEADER)"
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL extra_float_digits = 1")
+        with cursor.cursor.copy(sql, [[c.pk for c in cities], start, end]) as copy:
+            for block in copy:
+                yield bytes(block)
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file object whose content is drained after every chunk."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _arrow_chunks(chunks, fmt: str) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = pa.schema([
+        ("city", pa.string()),
+        ("date_time", pa.timestamp("s", tz="UTC")),
+        ("temperature_2m", pa.float64()),
+        ("precipitation", pa.float64()),
+    ])
+    sink = _Sink()
+    writer = (pa.ipc.new_stream(sink, schema) if fmt == ARROW
+              else pa.parquet.ParquetWriter(sink, schema, compression="zstd"))
+    try:
+        for names, series in chunks:
+            writer.write_table(pa.Table.from_arrays([
+                pa.array(names, pa.string()),
+                pa.array(series.date_time, pa.timestamp("s", tz="UTC")),
+                pa.array(series.temperature_2m, pa.float64(), from_pandas=True),
+                pa.array(series.precipitation, pa.float64(), from_pandas=True),
+            ], schema=schema))
+            if data := sink.drain():
+                yield data
+    finally:
+        writer.close()
+    if data := sink.drain():
+        yield data
+
+
+def export_chunks(
+    cities: Iterable[City],
+    start: datetime,
+    end: datetime,
+    fmt: str = CSV,
+    chunk_size: int | None = None,
+) -> Iterator[bytes]:
+    """
+    Encoded ``fmt`` chunks with the hours of ``cities`` in ``start..end``
+    (inclusive). Raises ValueError for an unknown or unavailable format
+    before anything is read.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt not in available_formats():
+        raise ValueError(f"The {fmt} export requires pyarrow.")
+    cities = list(cities)
+    if fmt == CSV and connection.vendor == "postgresql" and not settings.COMPACT_STORAGE:
+        return _copy_csv(cities, start, end)
+    chunks = batches(cities, start, end, chunk_size)
+    return _csv_chunks(chunks) if fmt == CSV else _arrow_chunks(chunks, fmt)
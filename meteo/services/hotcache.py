@@ -0,0 +1,243 @@
+"""
+Read-through cache of the recent hours of every city in memory-mapped
+files, shared by all the worker processes of a host.
+
+``HOT_CACHE_DIR`` holds one file per city with the hours of the last
+``HOT_CACHE_DAYS`` days as three columns: int32 epoch hours, float32
+temperatures and float32 precipitation. A 32-byte header records the
+city's ``data_updated_at`` at build time, the first hour covered and the
+sub-hour offset shared by all the timestamps (0 unless the data was
+fetched in a zone with a fractional offset). Every process maps the file
+once and remaps it when it is replaced; requests slice the mapped columns
+without copying them and only the slice is widened to float64.
+
+A file is only trusted while its stamp equals the city's
+``data_updated_at``, so a load that did not refresh the file simply
+sends requests back to the database. ``save_hourly`` refreshes it after
+commit, re-reading only the hours it touched.
+"""
+import os
+import tempfile
+import threading
+import time as clock
+from dataclasses import dataclass
+from datetime import datetime, timezone as py_timezone
+
+import numpy as np
+from django.conf import settings
+
+from meteo.models import City, HourlyWeather
+from meteo.services.compact import SCALE, hourly_series
+from meteo.services.instrumentation import phase
+from meteo.services.open_meteo import HourlySeries
+
+HOUR = 3600
+MAGIC = b"MHC1"
+_HEADER = np.dtype([("magic", "S4"), ("offset", "<i4"), ("stamp", "<i8"),
+                    ("covered_from", "<i8"), ("n", "<i8")])
+_END = datetime(9999, 12, 31, tzinfo=py_timezone.utc)
+
+
+def enabled() -> bool:
+    return bool(settings.HOT_CACHE_DIR)
+
+
+def stamp(updated_at: datetime | None) -> int:
+    """``data_updated_at`` as integer microseconds (0 when unset)."""
+    if updated_at is None:
+        return 0
+    return int(updated_at.timestamp()) * 1_000_000 + updated_at.microsecond
+
+
+def window_start() -> int:
+    """First epoch hour kept in the cache."""
+    return int(clock.time()) // HOUR - settings.HOT_CACHE_DAYS * 24
+
+
+def path(city_id: int) -> str:
+    return os.path.join(settings.HOT_CACHE_DIR, f"city-{city_id}.hot")
+
+
+@dataclass
+class Columns:
+    stamp: int
+    covered_from: int
+    offset: int
+    hours: np.ndarray
+    temperature_2m: np.ndarray
+    precipitation: np.ndarray
+
+    def series(self, start: datetime, end: datetime) -> HourlySeries:
+        """Hours in ``start..end`` (inclusive) as float64 values on the 0.1 grid of the source data."""
+        lo = np.searchsorted(self.hours, -(-(int(start.timestamp()) - self.offset) // HOUR))
+        hi = np.searchsorted(self.hours, (int(end.timestamp()) - self.offset) // HOUR, side="right")
+        epochs = self.hours[lo:hi].astype(np.int64) * HOUR + self.offset
+        return HourlySeries(epochs.astype("datetime64[s]"),
+                            np.rint(self.temperature_2m[lo:hi].astype(np.float64) * SCALE) / SCALE,
+                            np.rint(self.precipitation[lo:hi].astype(np.float64) * SCALE) / SCALE)
+
+
+_lock = threading.Lock()
+_mapped: dict[str, tuple[tuple[int, int, int], Columns]] = {}
+_uncacheable: dict[int, int] = {}
+"""Stamp of the cities whose hours cannot be cached (mixed sub-hour offsets), one entry per city."""
+
+
+def _map(city_id: int) -> Columns | None:
+    """
+    The mapped columns of the city's file, remapped when the file was
+    replaced; None when the file is missing, truncated or not a cache file.
+    """
+    filename = path(city_id)
+    try:
+        info = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    identity = (info.st_ino, info.st_mtime_ns, info.st_size)
+    with _lock:
+        entry = _mapped.get(filename)
+    if entry is not None and entry[0] == identity:
+        return entry[1]
+
+    if info.st_size < _HEADER.itemsize:
+        return None
+    try:
+        data = np.memmap(filename, dtype=np.uint8, mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+    header = data[:_HEADER.itemsize].view(_HEADER)[0]
+    n = int(header["n"])
+    first = _HEADER.itemsize
+    if header["magic"] != MAGIC or n < 0 or len(data) != first + 12 * n:
+        # Truncated or foreign file: the caller rebuilds it.
+        return None
+    columns = Columns(
+        stamp=int(header["stamp"]), covered_from=int(header["covered_from"]), offset=int(header["offset"]),
+        hours=data[first:first + 4 * n].view("<i4"),
+        temperature_2m=data[first + 4 * n:first + 8 * n].view("<f4"),
+        precipitation=data[first + 8 * n:first + 12 * n].view("<f4"),
+    )
+    with _lock:
+        _mapped[filename] = (identity, columns)
+    return columns
+
+
+def _write(city_id: int, stamp_: int, covered_from: int, offset: int,
+           hours: np.ndarray, temperature: np.ndarray, precipitation: np.ndarray) -> None:
+    """Write a new file next to the old one and swap it in atomically."""
+    header = np.zeros(1, dtype=_HEADER)
+    header[0] = (MAGIC, offset, stamp_, covered_from, len(hours))
+    os.makedirs(settings.HOT_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=settings.HOT_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header.tobytes())
+            f.write(np.asarray(hours, dtype="<i4").tobytes())
+            f.write(np.asarray(temperature, dtype="<f4").tobytes())
+            f.write(np.asarray(precipitation, dtype="<f4").tobytes())
+        os.replace(tmp, path(city_id))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _fetch(city: City, start: datetime, end: datetime = _END) -> HourlySeries:
+    if settings.COMPACT_STORAGE:
+        return hourly_series(city, start, end)
+    rows = list(HourlyWeather.objects
+                .filter(city=city, date_time__range=(start, end))
+                .order_by("date_time")
+                .values_list("date_time", "temperature_2m", "precipitation"))
+    if not rows:
+        return HourlySeries(np.array([], dtype="datetime64[s]"), np.array([]), np.array([]))
+    times, temps, precs = zip(*rows)
+    epochs = np.array([int(t.timestamp()) for t in times], dtype=np.int64)
+    return HourlySeries(epochs.astype("datetime64[s]"),
+                        np.array(temps, dtype=np.float64), np.array(precs, dtype=np.float64))
+
+
+def _split(series: HourlySeries) -> tuple[np.ndarray, int] | None:
+    """Epoch hours and the shared sub-hour offset of ``series``, or None if the offsets differ."""
+    epochs = series.date_time.astype("datetime64[s]").astype(np.int64)
+    offsets = epochs % HOUR
+    if len(offsets) and (offsets != offsets[0]).any():
+        return None
+    return epochs // HOUR, int(offsets[0]) if len(offsets) else 0
+
+
+def build(city: City) -> Columns | None:
+    """(Re)build the city's file from the database with the hours of the current window."""
+    current = City.objects.filter(pk=city.pk).values_list("data_updated_at", flat=True).first()
+    covered_from = window_start()
+    series = _fetch(city, datetime.fromtimestamp(covered_from * HOUR, tz=py_timezone.utc))
+    split = _split(series)
+    if split is None:
+        with _lock:
+            _uncacheable[city.pk] = stamp(current)
+        return None
+    hours, offset = split
+    with _lock:
+        _uncacheable.pop(city.pk, None)
+    _write(city.pk, stamp(current), covered_from, offset, hours, series.temperature_2m, series.precipitation)
+    return _map(city.pk)
+
+
+def refresh(city: City, start: datetime, end: datetime, previous: datetime | None) -> None:
+    """
+    Bring the city's file up to date after its hours ``start..end`` were
+    written and ``data_updated_at`` moved on from ``previous``. When the file
+    matched ``previous`` only those hours are re-read (and the window is
+    slid forward); otherwise the file is rebuilt.
+    """
+    if not enabled():
+        return
+    columns = _map(city.pk)
+    if columns is None or columns.stamp != stamp(previous):
+        build(city)
+        return
+
+    covered_from = max(columns.covered_from, window_start())
+    lo = max(int(start.timestamp()) // HOUR, covered_from)
+    hi = int(end.timestamp()) // HOUR
+    keep = (columns.hours >= covered_from) & ((columns.hours < lo) | (columns.hours > hi))
+    fresh = _fetch(city, datetime.fromtimestamp(lo * HOUR, tz=py_timezone.utc),
+                   datetime.fromtimestamp((hi + 1) * HOUR - 1, tz=py_timezone.utc)) if lo <= hi else None
+    if fresh is not None and len(fresh):
+        split = _split(fresh)
+        if split is None or split[1] != columns.offset:
+            build(city)
+            return
+        hours = np.concatenate([columns.hours[keep], split[0]])
+        order = np.argsort(hours, kind="stable")
+        temperature = np.concatenate([columns.temperature_2m[keep], fresh.temperature_2m])[order]
+        precipitation = np.concatenate([columns.precipitation[keep], fresh.precipitation])[order]
+        hours = hours[order]
+    else:
+        hours, temperature, precipitation = (columns.hours[keep], columns.temperature_2m[keep],
+                                             columns.precipitation[keep])
+    _write(city.pk, stamp(city.data_updated_at), covered_from, columns.offset, hours, temperature, precipitation)
+
+
+def hot_series(city: City, start: datetime, end: datetime, rebuild: bool = True) -> HourlySeries | None:
+    """
+    Hours of ``city`` in ``start..end`` from the hot cache, or None when the
+    cache is disabled or the range starts before the cached window. A
+    missing or outdated file is rebuilt first (read-through) unless
+    ``rebuild`` is off: then the caller gets None and reads the database,
+    which lets batched callers keep a fixed number of queries.
+    """
+    if not enabled() or int(start.timestamp()) < window_start() * HOUR:
+        return None
+    current = stamp(city.data_updated_at)
+    with _lock:
+        if _uncacheable.get(city.pk) == current:
+            return None
+    columns = _map(city.pk)
+    if columns is None or columns.stamp != current or int(start.timestamp()) < columns.covered_from * HOUR:
+        if not rebuild:
+            return None
+        columns = build(city)
+        if columns is None or columns.stamp != current:
+            return None
+    with phase("hot_cache"):
+        return columns.series(start, end)
@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone as py_timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+from meteo.models import City, HourlyWeather
+from meteo.services import open_meteo
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.aggregation import local_days
+from meteo.services.compact import hourly_series
+from meteo.services.cache import mark_city_updated
+from meteo.services.cities import mark_cities_changed, resolve_city
+from meteo.services import hotcache
+from meteo.services.rollup import refresh_daily
+from meteo.services.timebuckets import utc_range, zone
+
+
+COPY_BLOCK_SIZE = 10_000
+INSERT = "insert"
+UPSERT = "upsert"
+
+
+@dataclass
+class IngestResult:
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    days: int = 0
+
+
+def get_or_create_city(city_name: str) -> City | None:
+    """
+    City row for ``city_name``. Known cities are answered from the City
+    table without calling the geocoding API; new ones are geocoded and
+    stored under the name the user typed.
+    """
+    known = resolve_city(city_name)
+    if known is not None:
+        return known
+
+    geo = open_meteo.geocode_city(city_name)
+    if not geo:
+        return None
+
+    city, _ = City.objects.get_or_create(
+        name=city_name, country=geo.country,
+        defaults={"latitude": geo.latitude, "longitude": geo.longitude},
+    )
+    City.objects.filter(pk=city.pk).update(
+        latitude=geo.latitude,
+        longitude=geo.longitude
+    )
+    if (city.latitude, city.longitude) != (geo.latitude, geo.longitude):
+        mark_cities_changed()
+    city.latitude, city.longitude = geo.latitude, geo.longitude
+    return city
+
+
+def save_hourly(city: City, rows: HourlySeries | list[dict], mode: str = INSERT) -> IngestResult:
+    """
+    Store fetched hours, then refresh the daily rollup for the touched days
+    and invalidate the city's cached stats, all in one transaction. After
+    commit the touched hours are re-read into the hot cache, if enabled.
+
+    ``rows`` is either an :class:`HourlySeries` or the row dicts returned by
+    ``fetch_hourly``. In ``insert`` mode existing hours are left alone,
+    except hours stored without any value, which are filled when the new
+    row has one; ``upsert`` also overwrites hours whose values changed (ERA5
+    revisions).
+    The result reports how many hours were inserted, updated or unchanged.
+    """
+    if mode not in (INSERT, UPSERT):
+        raise ValueError(f"Unknown ingest mode: {mode}")
+    series = rows if isinstance(rows, HourlySeries) else HourlySeries.from_rows(rows)
+    result = IngestResult(received=len(series))
+    if not len(series):
+        return result
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            _copy_hourly(city, series, mode, result)
+        else:
+            _orm_hourly(city, series, mode, result)
+        _advance_loaded_until(city, series)
+        if result.inserted or result.updated:
+            first, last = (datetime.fromtimestamp(int(t), tz=py_timezone.utc)
+                           for t in (series.date_time.min().astype(np.int64),
+                                     series.date_time.max().astype(np.int64)))
+            result.days = refresh_daily(city, first, last)
+            previous = city.data_updated_at
+            mark_city_updated(city)
+            if hotcache.enabled():
+                transaction.on_commit(lambda: hotcache.refresh(city, first, last, previous))
+    return result
+
+
+def _copy_column(values: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(values), "\\N", values.astype(str))
+
+
+def _copy_blocks(series: HourlySeries):
+    """COPY text-format blocks built with vectorised string operations."""
+    for i in range(0, len(series), COPY_BLOCK_SIZE):
+        block = slice(i, i + COPY_BLOCK_SIZE)
+        lines = np.char.add(np.datetime_as_string(series.date_time[block], unit="s"), "+00\t")
+        lines = np.char.add(np.char.add(lines, _copy_column(series.temperature_2m[block])), "\t")
+        lines = np.char.add(np.char.add(lines, _copy_column(series.precipitation[block])), "\n")
+        yield "".join(lines.tolist())
+
+
+def _copy_hourly(city: City, series: HourlySeries, mode: str, result: IngestResult) -> None:
+    """COPY the rows into a temporary staging table and merge with one INSERT ... ON CONFLICT."""
+    table = connection.ops.quote_name(HourlyWeather._meta.db_table)
+    if mode == UPSERT:
+        conflict = (
+            "DO UPDATE SET temperature_2m = EXCLUDED.temperature_2m, precipitation = EXCLUDED.precipitation "
+            f"WHERE ({table}.temperature_2m, {table}.precipitation) "
+            "IS DISTINCT FROM (EXCLUDED.temperature_2m, EXCLUDED.precipitation)"
+        )
+    else:
+        conflict = (
+            "DO UPDATE SET temperature_2m = EXCLUDED.temperature_2m, precipitation = EXCLUDED.precipitation "
+            f"WHERE {table}.temperature_2m IS NULL AND {table}.precipitation IS NULL "
+            "AND (EXCLUDED.temperature_2m IS NOT NULL OR EXCLUDED.precipitation IS NOT NULL)"
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS meteo_hourly_stage")
+        cursor.execute(
+            "CREATE TEMPORARY TABLE meteo_hourly_stage ("
+            "date_time timestamptz NOT NULL, temperature_2m double precision, precipitation double precision"
+            ") ON COMMIT DROP"
+        )
+        with cursor.cursor.copy(
+            "COPY meteo_hourly_stage (date_time, temperature_2m, precipitation) FROM STDIN"
+        ) as copy:
+            for block in _copy_blocks(series):
+                copy.write(block)
+        cursor.execute(
+            f"INSERT INTO {table} (city_id, date_time, temperature_2m, precipitation) "
+            "SELECT DISTINCT ON (date_time) %s, date_time, temperature_2m, precipitation "
+            "FROM meteo_hourly_stage ORDER BY date_time "
+            f"ON CONFLICT (city_id, date_time) {conflict} "
+            "RETURNING (xmax = 0)",
+            [city.pk],
+        )
+        flags = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT count(DISTINCT date_time) FROM meteo_hourly_stage")
+        staged = cursor.fetchone()[0]
+    result.inserted = sum(flags)
+    result.updated = len(flags) - result.inserted
+    result.unchanged = staged - len(flags)
+
+
+def _orm_hourly(city: City, series: HourlySeries, mode: str, result: IngestResult) -> None:
+    """Portable path for non-PostgreSQL backends, with the same counting rules."""
+    incoming = {r["date_time"]: (r["temperature_2m"], r["precipitation"]) for r in series.rows()}
+    existing = {
+        dt: (pk, (temperature, precipitation))
+        for pk, dt, temperature, precipitation in (
+            HourlyWeather.objects
+            .filter(city=city, date_time__range=(min(incoming), max(incoming)))
+            .values_list("pk", "date_time", "temperature_2m", "precipitation")
+        )
+    }
+    new, changed = [], []
+    for dt, (temperature, precipitation) in incoming.items():
+        if dt not in existing:
+            new.append(HourlyWeather(city=city, date_time=dt,
+                                     temperature_2m=temperature, precipitation=precipitation))
+        elif (existing[dt][1] != (temperature, precipitation)
+              and (mode == UPSERT or existing[dt][1] == (None, None))):
+            changed.append(HourlyWeather(pk=existing[dt][0], city=city, date_time=dt,
+                                         temperature_2m=temperature, precipitation=precipitation))
+
+    HourlyWeather.objects.bulk_create(new, ignore_conflicts=True)
+    HourlyWeather.objects.bulk_update(changed, ["temperature_2m", "precipitation"])
+    result.inserted = len(new)
+    result.updated = len(changed)
+    result.unchanged = len(incoming) - len(new) - len(changed)
+
+
+def _advance_loaded_until(city: City, series: HourlySeries) -> None:
+    """Move ``City.loaded_until`` to the last received hour that has a value."""
+    present = ~(np.isnan(series.temperature_2m) & np.isnan(series.precipitation))
+    if not present.any():
+        return
+    last = datetime.fromtimestamp(int(series.date_time[present].max().astype(np.int64)), tz=py_timezone.utc)
+    if city.loaded_until is None or city.loaded_until < last:
+        (City.objects
+         .filter(pk=city.pk)
+         .filter(Q(loaded_until__isnull=True) | Q(loaded_until__lt=last))
+         .update(loaded_until=last))
+        city.loaded_until = last
+
+
+def expected_hours(day: date, tz: ZoneInfo) -> int:
+    """Hours in the local day ``day`` (23 or 25 on DST changes)."""
+    start = datetime.combine(day, time.min).replace(tzinfo=tz).astimezone(py_timezone.utc)
+    end = datetime.combine(day + timedelta(days=1), time.min).replace(tzinfo=tz).astimezone(py_timezone.utc)
+    return round((end - start).total_seconds() / 3600)
+
+
+def missing_ranges(city: City, start: date, end: date, tzname: str | None = None) -> list[tuple[date, date]]:
+    """
+    Local-day sub-ranges of ``start..end`` that are not fully loaded for
+    ``city``. Days are counted in the zone used to fetch them (DEFAULT_TZ),
+    with one grouped query returning a row per loaded day. Only hours with
+    a value count, so days the archive served as nulls are fetched again.
+    """
+    tz = zone(tzname or settings.DEFAULT_TZ)
+    if settings.COMPACT_STORAGE:
+        series = hourly_series(city, *utc_range(start, end, tz))
+        present = ~(np.isnan(series.temperature_2m) & np.isnan(series.precipitation))
+        days, counts = np.unique(local_days(series, tz)[present], return_counts=True)
+        loaded = {day.item(): int(n) for day, n in zip(days, counts)}
+    else:
+        loaded = dict(
+            HourlyWeather.objects
+            .filter(Q(temperature_2m__isnull=False) | Q(precipitation__isnull=False),
+                    city=city, date_time__range=utc_range(start, end, tz))
+            .annotate(day=TruncDate("date_time", tzinfo=tz))
+            .values("day")
+            .annotate(n=Count("pk"))
+            .values_list("day", "n")
+        )
+    ranges: list[tuple[date, date]] = []
+    day = start
+    while day <= end:
+        if loaded.get(day, 0) < expected_hours(day, tz):
+            if ranges and ranges[-1][1] == day - timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        day += timedelta(days=1)
+    return ranges
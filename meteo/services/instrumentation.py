@@ -0,0 +1,88 @@
+"""
+Per-request performance counters: SQL queries, DB time, rows fetched and
+time spent in named computation phases.
+
+:class:`~meteo.middleware.InstrumentationMiddleware` opens a
+:class:`RequestStats` for every request in a context variable. Every
+database connection gets :func:`record_query` as an execute wrapper when
+it is created, and the services wrap their CPU-heavy steps in
+:func:`phase`. Both are no-ops outside a request, and the context
+variable follows ``sync_to_async`` into worker threads.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.db import connections
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+    phases: dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add_query(self, seconds: float, rows: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+            self.rows += max(rows, 0)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("meteo_request_stats", default=None)
+
+
+def current() -> RequestStats | None:
+    return _current.get()
+
+
+def start_request() -> tuple[RequestStats, object]:
+    """Open a new :class:`RequestStats`; returns it and the token for :func:`end_request`."""
+    for connection in connections.all(initialized_only=True):
+        install_query_hook(connection)
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def phase(name: str):
+    """Add the wall time of the block to phase ``name`` of the current request."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_phase(name, time.perf_counter() - t0)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        # rowcount is the number of rows returned by a SELECT on PostgreSQL;
+        # drivers that do not report it (SQLite) give -1 and count as 0.
+        stats.add_query(time.perf_counter() - t0, getattr(context["cursor"].cursor, "rowcount", -1))
+
+
+def install_query_hook(connection, **kwargs) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,90 @@
+"""
+In-process Prometheus metrics (text exposition format 0.0.4) for the API
+requests. Values are per process: scrape every worker, or aggregate them
+in front of the scraper.
+"""
+import bisect
+import threading
+
+from django.conf import settings
+
+from meteo.services.instrumentation import RequestStats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {cumulative}")
+        return out
+
+
+class Registry:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.latency: dict[str, Histogram] = {}
+        self.db_latency: dict[str, Histogram] = {}
+        self.requests: dict[tuple[str, int], int] = {}
+        self.counters: dict[tuple[str, str], float] = {}
+        self.phases: dict[tuple[str, str], float] = {}
+
+    def observe(self, view: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            self.latency.setdefault(view, Histogram(self.buckets)).observe(seconds)
+            self.db_latency.setdefault(view, Histogram(self.buckets)).observe(stats.db_seconds)
+            self.requests[view, status] = self.requests.get((view, status), 0) + 1
+            for name, value in (("queries", stats.queries), ("db_seconds", stats.db_seconds),
+                                ("rows", stats.rows)):
+                self.counters[view, name] = self.counters.get((view, name), 0) + value
+            for name, value in stats.phases.items():
+                self.phases[view, name] = self.phases.get((view, name), 0.0) + value
+
+    def render(self) -> str:
+        with self._lock:
+            out = [
+                "# HELP meteo_request_duration_seconds Request latency per view.",
+                "# TYPE meteo_request_duration_seconds histogram",
+            ]
+            for view, histogram in sorted(self.latency.items()):
+                out += histogram.lines("meteo_request_duration_seconds", f'view="{view}"')
+            out += [
+                "# HELP meteo_request_db_seconds Time spent in SQL queries per request.",
+                "# TYPE meteo_request_db_seconds histogram",
+            ]
+            for view, histogram in sorted(self.db_latency.items()):
+                out += histogram.lines("meteo_request_db_seconds", f'view="{view}"')
+            out += ["# HELP meteo_requests_total Requests per view and status.",
+                    "# TYPE meteo_requests_total counter"]
+            out += [f'meteo_requests_total{{view="{view}",status="{status}"}} {count}'
+                    for (view, status), count in sorted(self.requests.items())]
+            for name, help_text in (("queries", "SQL queries executed"),
+                                    ("db_seconds", "Seconds spent in SQL queries"),
+                                    ("rows", "Rows returned by SQL queries")):
+                out += [f"# HELP meteo_{name}_total {help_text}.", f"# TYPE meteo_{name}_total counter"]
+                out += [f'meteo_{name}_total{{view="{view}"}} {value:g}'
+                        for (view, counter), value in sorted(self.counters.items()) if counter == name]
+            out += ["# HELP meteo_phase_seconds_total Seconds spent per computation phase.",
+                    "# TYPE meteo_phase_seconds_total counter"]
+            out += [f'meteo_phase_seconds_total{{view="{view}",phase="{name}"}} {value:.6f}'
+                    for (view, name), value in sorted(self.phases.items())]
+        return "\n".join(out) + "\n"
+
+
+registry = Registry(tuple(settings.METRICS_LATENCY_BUCKETS))
@@ -0,0 +1,26 @@
+"""
+City name normalization: the lookup key stored in ``City.name_key`` and
+the trigrams used for "did you mean" suggestions. Pure functions, so the
+model and migrations can use them without importing the ORM layer.
+"""
+import re
+import unicodedata
+
+_SEPARATORS = re.compile(r"[^\w]+|_")
+
+
+def name_key(name: str) -> str:
+    """Accent-folded, case-folded, whitespace-collapsed form of ``name`` ("  MÁLAGA " -> "malaga")."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(key: str) -> set[str]:
+    """pg_trgm style trigrams: every word padded with two leading blanks and one trailing blank."""
+    grams = set()
+    for word in _SEPARATORS.split(key):
+        if word:
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
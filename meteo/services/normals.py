@@ -0,0 +1,243 @@
+"""
+Climatological normals and anomalies.
+
+The normals of a city are the mean temperature of every (day of year,
+local hour) slot and the mean precipitation total of every day of year,
+over a range of years. Days are indexed by their position in a leap year,
+so 29 February has its own slot and 1 March is the same slot every year.
+Slots without data (29 February outside leap years, gaps in the archive)
+are interpolated from the neighbouring days.
+
+``compute_normals`` reads one year of hours at a time and accumulates
+sums and counts with ``bincount``; ``anomalies`` compares a window of
+hours with the stored normals in one vectorized pass.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+
+from meteo.models import City, ClimateNormal, HourlyWeather
+from meteo.services.compact import hourly_series_many
+from meteo.services.hotcache import hot_series
+from meteo.services.instrumentation import phase
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.timebuckets import DAY, key_date, to_epochs, utc_offsets, utc_range
+
+YEARS = 30
+"""Default length of the reference period (the WMO standard)."""
+
+DAYS = 366
+HOURS = 24
+_DTYPE = "<f4"
+_MONTH_STARTS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+def day_of_year(days: np.ndarray) -> np.ndarray:
+    """Slot 0..365 of every day key, counting 29 February in every year."""
+    dates = np.asarray(days).astype("datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    return (_MONTH_STARTS[months.astype(np.int64) % 12]
+            + (dates - months.astype("datetime64[D]")).astype(np.int64))
+
+
+def _local_slots(series: HourlySeries, tz: ZoneInfo) -> tuple[np.ndarray, np.ndarray]:
+    """Local day key and hour of day of every hour of ``series``."""
+    epochs = to_epochs(series.date_time)
+    local = epochs + utc_offsets(epochs, tz)
+    return local // DAY, (local % DAY) // 3600
+
+
+def _daily_precipitation(days: np.ndarray, precipitation: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Day keys present in ``days`` and their totals (missing hours count as 0)."""
+    keys, inverse = np.unique(days, return_inverse=True)
+    return keys, np.bincount(inverse, weights=np.nan_to_num(precipitation), minlength=len(keys))
+
+
+def _fill_days(values: np.ndarray) -> np.ndarray:
+    """Interpolate NaN slots along the (circular) day axis of a 1-D or 2-D array."""
+    values = values.reshape(DAYS, -1).copy()
+    slots = np.arange(DAYS)
+    for column in values.T:
+        known = ~np.isnan(column)
+        if known.any() and not known.all():
+            column[~known] = np.interp(slots[~known], slots[known], column[known], period=DAYS)
+    return values
+
+
+def hours_by_city(cities: list[City], first_day: date, last_day: date, tz: ZoneInfo) -> dict[int, HourlySeries]:
+    """
+    Hours of the local days ``first_day..last_day`` per city pk: from the
+    hot cache when the range is in it (stale files are only rebuilt for a
+    single city), otherwise with a single query (two through compact
+    storage when enabled).
+    """
+    bounds = utc_range(first_day, last_day, tz)
+    hot = {city.pk: series for city in cities
+           if (series := hot_series(city, *bounds, rebuild=len(cities) == 1)) is not None}
+    cities = [city for city in cities if city.pk not in hot]
+    if not cities:
+        return hot
+    if settings.COMPACT_STORAGE:
+        return {**hot, **hourly_series_many(cities, *bounds)}
+    rows = list(HourlyWeather.objects
+                .filter(city__in=cities, date_time__range=bounds)
+                .order_by("city_id", "date_time")
+                .values_list("city_id", "date_time", "temperature_2m", "precipitation"))
+    out = {**hot, **{city.pk: HourlySeries(np.array([], dtype="datetime64[s]"), np.array([]), np.array([]))
+                     for city in cities}}
+    if not rows:
+        return out
+    with phase("dataframe"):
+        city_ids, times, temps, precs = zip(*rows)
+        city_ids = np.array(city_ids, dtype=np.int64)
+        times = np.array([int(t.timestamp()) for t in times], dtype=np.int64).astype("datetime64[s]")
+        temps, precs = np.array(temps, dtype=np.float64), np.array(precs, dtype=np.float64)
+        pks, starts = np.unique(city_ids, return_index=True)
+        for pk, lo, hi in zip(pks.tolist(), starts, [*starts[1:], len(rows)]):
+            out[pk] = HourlySeries(times[lo:hi], temps[lo:hi], precs[lo:hi])
+    return out
+
+
+@dataclass
+class Normals:
+    temperature: np.ndarray
+    """Mean temperature, shape ``(DAYS, HOURS)``."""
+    precipitation: np.ndarray
+    """Mean daily precipitation total, shape ``(DAYS,)``."""
+
+    @classmethod
+    def from_row(cls, row: ClimateNormal) -> "Normals":
+        return cls(np.frombuffer(bytes(row.temperature), dtype=_DTYPE).astype(float).reshape(DAYS, HOURS),
+                   np.frombuffer(bytes(row.precipitation), dtype=_DTYPE).astype(float))
+
+
+@dataclass
+class Accumulator:
+    """Running sums of the normals, fed one batch of hours at a time."""
+    temperature_sum: np.ndarray = field(default_factory=lambda: np.zeros(DAYS * HOURS))
+    temperature_count: np.ndarray = field(default_factory=lambda: np.zeros(DAYS * HOURS, dtype=np.int64))
+    precipitation_sum: np.ndarray = field(default_factory=lambda: np.zeros(DAYS))
+    precipitation_days: np.ndarray = field(default_factory=lambda: np.zeros(DAYS, dtype=np.int64))
+    hours: int = 0
+    years: set[int] = field(default_factory=set)
+
+    def add(self, series: HourlySeries, tz: ZoneInfo) -> None:
+        if not len(series):
+            return
+        days, hours = _local_slots(series, tz)
+        slots = day_of_year(days)
+        temperature = series.temperature_2m
+        known = ~np.isnan(temperature)
+        cells = slots[known] * HOURS + hours[known]
+        self.temperature_sum += np.bincount(cells, weights=temperature[known], minlength=DAYS * HOURS)
+        self.temperature_count += np.bincount(cells, minlength=DAYS * HOURS)
+
+        keys, totals = _daily_precipitation(days, series.precipitation)
+        day_slots = day_of_year(keys)
+        self.precipitation_sum += np.bincount(day_slots, weights=totals, minlength=DAYS)
+        self.precipitation_days += np.bincount(day_slots, minlength=DAYS)
+        self.hours += len(series)
+        years = keys.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+        self.years.update(np.unique(years).tolist())
+
+    def normals(self) -> Normals:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            temperature = self.temperature_sum / self.temperature_count
+            precipitation = self.precipitation_sum / self.precipitation_days
+        return Normals(_fill_days(temperature.reshape(DAYS, HOURS)), _fill_days(precipitation).ravel())
+
+
+def compute_normals(city: City, first_year: int, last_year: int, tz: ZoneInfo) -> ClimateNormal | None:
+    """
+    Compute and store the normals of ``city`` over the local years
+    ``first_year..last_year``, reading one year of hours per query.
+    Returns None (and keeps any stored normals) when there are no hours.
+    """
+    accumulator = Accumulator()
+    for year in range(first_year, last_year + 1):
+        accumulator.add(hours_by_city([city], date(year, 1, 1), date(year, 12, 31), tz)[city.pk], tz)
+    if not accumulator.hours:
+        return None
+
+    normals = accumulator.normals()
+    row, _ = ClimateNormal.objects.update_or_create(
+        city=city, timezone=tz.key,
+        defaults={
+            "first_year": first_year,
+            "last_year": last_year,
+            "years": len(accumulator.years),
+            "hours": accumulator.hours,
+            "temperature": normals.temperature.astype(_DTYPE).tobytes(),
+            "precipitation": normals.precipitation.astype(_DTYPE).tobytes(),
+        },
+    )
+    return row
+
+
+@dataclass
+class Anomaly:
+    hours: int = 0
+    observed_mean: float | None = None
+    normal_mean: float | None = None
+    by_day: dict[date, float] = field(default_factory=dict)
+    precipitation_days: int = 0
+    observed_precipitation: float = 0.0
+    normal_precipitation: float = 0.0
+
+    @property
+    def temperature(self) -> float | None:
+        if self.observed_mean is None:
+            return None
+        return self.observed_mean - self.normal_mean
+
+    @property
+    def precipitation(self) -> float:
+        return self.observed_precipitation - self.normal_precipitation
+
+
+def anomalies(series: HourlySeries, normals: Normals, tz: ZoneInfo) -> Anomaly:
+    """
+    Compare the hours of ``series`` with ``normals``: every hour with a
+    temperature against the normal of its (day of year, local hour) slot,
+    and the precipitation total of every day present against the normal
+    total of its day of year.
+    """
+    if not len(series):
+        return Anomaly()
+    with phase("normals"):
+        days, hours = _local_slots(series, tz)
+        slots = day_of_year(days)
+        expected = normals.temperature[slots, hours]
+        known = ~np.isnan(series.temperature_2m) & ~np.isnan(expected)
+        difference = series.temperature_2m[known] - expected[known]
+
+        keys, inverse = np.unique(days[known], return_inverse=True)
+        sums = np.bincount(inverse, weights=difference, minlength=len(keys))
+        counts = np.bincount(inverse, minlength=len(keys))
+
+        rain_days, totals = _daily_precipitation(days, series.precipitation)
+        result = Anomaly(
+            hours=int(known.sum()),
+            by_day={key_date(k): float(s / n) for k, s, n in zip(keys.tolist(), sums, counts)},
+            precipitation_days=len(rain_days),
+            observed_precipitation=float(totals.sum()),
+            normal_precipitation=float(np.nansum(normals.precipitation[day_of_year(rain_days)])),
+        )
+        if result.hours:
+            result.observed_mean = float(series.temperature_2m[known].mean())
+            result.normal_mean = float(expected[known].mean())
+    return result
+
+
+def anomaly_stats(
+    cities: list[City], normals: dict[int, ClimateNormal], start: date, end: date, tz: ZoneInfo,
+) -> dict[int, Anomaly]:
+    """Per city pk with stored normals, the anomaly of the local days ``start..end``."""
+    cities = [city for city in cities if city.pk in normals]
+    if not cities:
+        return {}
+    series = hours_by_city(cities, start, end, tz)
+    return {city.pk: anomalies(series[city.pk], Normals.from_row(normals[city.pk]), tz) for city in cities}
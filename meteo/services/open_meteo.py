@@ -1,11 +1,20 @@
+import codecs
+import json
+import threading
 import requests
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
 from dataclasses import dataclass
 from django.conf import settings
-from datetime import datetime
+from datetime import datetime, timezone as py_timezone
 from zoneinfo import ZoneInfo
+from requests.adapters import HTTPAdapter
 
 GEOCODE_URL = settings.OPEN_METEO_GEOCODE_URL
 ARCHIVE_URL = settings.OPEN_METEO_ARCHIVE_URL
+HOURLY_VARIABLES = ("temperature_2m", "precipitation")
+STREAM_CHUNK_SIZE = 1 << 16
 
 
 @dataclass
@@ -16,19 +25,355 @@ class GeocodeResult:
     longitude: float
 
 
-def geocode_city(city: str) -> GeocodeResult | None:
-    result = requests.get(GEOCODE_URL, params={"name": city, "count": 1})
-    result.raise_for_status()
-    data = result.json()
-    if not data.get("results"):
+@dataclass
+class HourlySeries:
+    """Column-oriented hourly data: UTC ``datetime64[s]`` plus float64 values (NaN = missing)."""
+    date_time: np.ndarray
+    temperature_2m: np.ndarray
+    precipitation: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.date_time)
+
+    @classmethod
+    def from_rows(cls, rows: list[dict]) -> "HourlySeries":
+        def values(key):
+            return np.array([np.nan if r[key] is None else r[key] for r in rows], dtype=np.float64)
+
+        epochs = np.array([int(r["date_time"].timestamp()) for r in rows], dtype=np.int64)
+        return cls(epochs.astype("datetime64[s]"), values("temperature_2m"), values("precipitation"))
+
+    def rows(self):
+        """Row dicts with aware UTC datetimes and None for missing values, as ``fetch_hourly`` returns."""
+        epochs = self.date_time.astype("datetime64[s]").astype(np.int64).tolist()
+        temps = np.where(np.isnan(self.temperature_2m), None, self.temperature_2m).tolist()
+        precs = np.where(np.isnan(self.precipitation), None, self.precipitation).tolist()
+        for epoch, temperature, precipitation in zip(epochs, temps, precs):
+            yield {
+                "date_time": datetime.fromtimestamp(epoch, tz=py_timezone.utc),
+                "temperature_2m": temperature,
+                "precipitation": precipitation,
+            }
+
+
+class HourlyStreamParser:
+    """
+    Incremental parser for an archive response. The small metadata part is
+    scanned character by character to track the key path; the arrays under
+    ``hourly`` are split on commas in bulk and converted to NumPy blocks as
+    the chunks arrive, so the body never exists as a list of Python objects.
+
+    A multi-location response (a top-level list with one object per
+    location) is demultiplexed: every location gets its own blocks.
+    """
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self, columns=("time",) + HOURLY_VARIABLES):
+        self.columns = tuple(columns)
+        self.targets = set(columns)
+        self.locations: list[dict[str, list[np.ndarray]]] = []
+        self.time_kind = None
+        self._buf = ""
+        self._stack: list[dict] = []
+        self._active = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, data: bytes) -> None:
+        self._buf += self._decoder.decode(data)
+        self._scan()
+
+    def _convert(self, name: str, text: str) -> None:
+        if not text.strip():
+            return
+        if name == "time":
+            if text.lstrip().startswith('"'):
+                self.time_kind = "iso"
+                block = np.array([p.strip().strip('"') for p in text.split(",")], dtype="datetime64[m]")
+            else:
+                self.time_kind = "unix"
+                block = np.array(text.split(","), dtype=np.int64)
+        else:
+            # Strict conversion: a malformed token raises instead of truncating the block.
+            block = np.array(text.replace("null", "nan").split(","), dtype=np.float64)
+        self.locations[-1][name].append(block)
+
+    def _base(self) -> int:
+        """Depth of the location objects: 1 inside a top-level list, else 0."""
+        return 1 if self._stack and self._stack[0]["kind"] == "[" else 0
+
+    def _in_target(self) -> str | None:
+        base = self._base()
+        if len(self._stack) == base + 2 and self._stack[base].get("key") == "hourly":
+            key = self._stack[base + 1].get("key")
+            if key in self.targets:
+                return key
         return None
-    x = data["results"][0]
-    return GeocodeResult(
-        name=x.get("name", city),
-        country=x.get("country", "") or "",
-        latitude=float(x["latitude"]),
-        longitude=float(x["longitude"]),
-    )
+
+    def _scan(self) -> None:
+        buf, i = self._buf, 0
+        while i < len(buf):
+            if self._active is not None:
+                end = buf.find("]", i)
+                if end < 0:
+                    cut = buf.rfind(",", i)
+                    if cut >= 0:
+                        self._convert(self._active, buf[i:cut])
+                        i = cut + 1
+                    break
+                self._convert(self._active, buf[i:end])
+                self._active = None
+                i = end + 1
+                continue
+
+            ch = buf[i]
+            top = self._stack[-1] if self._stack else None
+            if ch in self.WHITESPACE or ch == ":":
+                if ch == ":" and top is not None:
+                    top["expect_key"] = False
+                i += 1
+            elif ch == ",":
+                if top is not None and top["kind"] == "{":
+                    top["expect_key"] = True
+                i += 1
+            elif ch == "{":
+                if len(self._stack) == self._base():
+                    self.locations.append({c: [] for c in self.columns})
+                self._stack.append({"kind": "{", "key": None, "expect_key": True})
+                i += 1
+            elif ch == "[":
+                target = self._in_target()
+                if target is not None:
+                    self._active = target
+                else:
+                    self._stack.append({"kind": "["})
+                i += 1
+            elif ch in "}]":
+                self._stack.pop()
+                i += 1
+            elif ch == '"':
+                end = i + 1
+                while True:
+                    end = buf.find('"', end)
+                    if end < 0:
+                        break
+                    backslashes = len(buf[i + 1:end]) - len(buf[i + 1:end].rstrip("\\"))
+                    if backslashes % 2 == 0:
+                        break
+                    end += 1
+                if end < 0:
+                    break
+                if top is not None and top["kind"] == "{" and top["expect_key"]:
+                    top["key"] = json.loads(buf[i:end + 1])
+                i = end + 1
+            else:
+                end = i
+                while end < len(buf) and buf[end] not in ",]}" + self.WHITESPACE:
+                    end += 1
+                if end == len(buf):
+                    break
+                i = end
+        self._buf = buf[i:]
+
+    @property
+    def location_count(self) -> int:
+        return len(self.locations)
+
+    def column(self, name: str, dtype, location: int = 0) -> np.ndarray:
+        blocks = self.locations[location].get(name) if location < len(self.locations) else None
+        return np.concatenate(blocks) if blocks else np.array([], dtype=dtype)
+
+
+def _series_from_parser(parser: HourlyStreamParser, tz: str, location: int = 0) -> HourlySeries:
+    times = parser.column("time", np.int64, location)
+    if parser.time_kind == "iso":
+        local = pd.DatetimeIndex(times.astype("datetime64[ns]"))
+        utc = local.tz_localize(tz, ambiguous=np.ones(len(local), dtype=bool),
+                                nonexistent="shift_forward").tz_convert("UTC")
+        times = utc.tz_localize(None).to_numpy().astype("datetime64[s]")
+    else:
+        times = times.astype("datetime64[s]")
+    n = len(times)
+
+    def values(name):
+        col = parser.column(name, np.float64, location)
+        if len(col) != n:
+            raise ValueError(f"Archive response has {len(col)} {name} values for {n} hours")
+        return col
+
+    return HourlySeries(times, values("temperature_2m"), values("precipitation"))
+
+
+class OpenMeteoClient:
+    """
+    Open-Meteo client sharing one pooled ``requests.Session`` (keep-alive
+    connections are reused across calls and threads) with configurable
+    timeouts and an in-process LRU of geocoding answers. URLs default to the
+    module settings, read at call time.
+    """
+
+    def __init__(
+        self,
+        geocode_url: str | None = None,
+        archive_url: str | None = None,
+        timeout: tuple[float, float] | None = None,
+        pool_size: int | None = None,
+        geocode_cache_size: int | None = None,
+        session: requests.Session | None = None,
+    ):
+        self.geocode_url = geocode_url
+        self.archive_url = archive_url
+        self.timeout = timeout or (settings.OPEN_METEO_CONNECT_TIMEOUT, settings.OPEN_METEO_READ_TIMEOUT)
+        self.geocode_cache_size = (settings.OPEN_METEO_GEOCODE_CACHE_SIZE
+                                   if geocode_cache_size is None else geocode_cache_size)
+        self._geocode_cache: OrderedDict[str, GeocodeResult | None] = OrderedDict()
+        self._lock = threading.Lock()
+        if session is None:
+            pool_size = pool_size or settings.OPEN_METEO_POOL_SIZE
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def close(self) -> None:
+        self.session.close()
+
+    def geocode_city(self, city: str) -> GeocodeResult | None:
+        key = city.strip().lower()
+        with self._lock:
+            if key in self._geocode_cache:
+                self._geocode_cache.move_to_end(key)
+                return self._geocode_cache[key]
+
+        result = self.session.get(self.geocode_url or GEOCODE_URL,
+                                  params={"name": city, "count": 1}, timeout=self.timeout)
+        result.raise_for_status()
+        data = result.json()
+        geo = None
+        if data.get("results"):
+            x = data["results"][0]
+            geo = GeocodeResult(
+                name=x.get("name", city),
+                country=x.get("country", "") or "",
+                latitude=float(x["latitude"]),
+                longitude=float(x["longitude"]),
+            )
+
+        if self.geocode_cache_size:
+            with self._lock:
+                self._geocode_cache[key] = geo
+                self._geocode_cache.move_to_end(key)
+                while len(self._geocode_cache) > self.geocode_cache_size:
+                    self._geocode_cache.popitem(last=False)
+        return geo
+
+    def fetch_hourly(
+        self,
+        lat: float,
+        lon: float,
+        start: str,
+        end: str,
+        tz: str = None,
+        columnar: bool = False,
+    ):
+        """
+        Hourly temperature and precipitation for one point.
+
+        Returns a list of row dicts by default. With ``columnar=True`` the
+        response is requested with unix timestamps, parsed incrementally while
+        it downloads and returned as an :class:`HourlySeries`.
+        """
+        tz = tz or settings.DEFAULT_TZ
+        url = self.archive_url or ARCHIVE_URL
+        params = {
+            "latitude": lat, "longitude": lon,
+            "start_date": start, "end_date": end,
+            "hourly": ",".join(HOURLY_VARIABLES),
+            "timezone": tz,
+        }
+        if columnar:
+            params["timeformat"] = "unixtime"
+            return _series_from_parser(self._stream(url, params), tz)
+
+        result = self.session.get(url, params=params, timeout=self.timeout)
+        result.raise_for_status()
+        j = result.json()
+        hourly = j.get("hourly", {})
+        times = hourly.get("time", []) or []
+        temps = hourly.get("temperature_2m", []) or []
+        precs = hourly.get("precipitation", []) or []
+        tzinfo = ZoneInfo(tz)
+        out = []
+        for i, t in enumerate(times):
+            dt = datetime.fromisoformat(t).replace(tzinfo=tzinfo)
+            out.append({
+                "date_time": dt,
+                "temperature_2m": temps[i] if i < len(temps) else None,
+                "precipitation": precs[i] if i < len(precs) else None,
+            })
+        return out
+
+    def _stream(self, url: str, params: dict) -> HourlyStreamParser:
+        """Download an archive response through :class:`HourlyStreamParser`."""
+        with self.session.get(url, params=params, stream=True, timeout=self.timeout) as result:
+            result.raise_for_status()
+            parser = HourlyStreamParser()
+            for chunk in result.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                parser.feed(chunk)
+        return parser
+
+    def fetch_hourly_many(
+        self,
+        points: list[tuple[float, float]],
+        start: str,
+        end: str,
+        tz: str = None,
+        batch_size: int | None = None,
+    ) -> list[HourlySeries]:
+        """
+        Hourly series for many points, in order. The points are sent in
+        groups of ``batch_size`` (default ``OPEN_METEO_BATCH_SIZE``) comma
+        separated coordinates per archive request; every response is
+        streamed through :class:`HourlyStreamParser` and split per location.
+        """
+        tz = tz or settings.DEFAULT_TZ
+        size = max(1, batch_size or settings.OPEN_METEO_BATCH_SIZE)
+        out = []
+        for i in range(0, len(points), size):
+            out += self._fetch_group(points[i:i + size], start, end, tz)
+        return out
+
+    def _fetch_group(self, points: list[tuple[float, float]], start: str, end: str, tz: str) -> list[HourlySeries]:
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in points),
+            "longitude": ",".join(str(lon) for _, lon in points),
+            "start_date": start, "end_date": end,
+            "hourly": ",".join(HOURLY_VARIABLES),
+            "timezone": tz,
+            "timeformat": "unixtime",
+        }
+        parser = self._stream(self.archive_url or ARCHIVE_URL, params)
+        if parser.location_count != len(points):
+            raise ValueError(f"Expected {len(points)} locations in the archive response, "
+                             f"got {parser.location_count}")
+        return [_series_from_parser(parser, tz, i) for i in range(len(points))]
+
+
+_default_client: OpenMeteoClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> OpenMeteoClient:
+    """Process-wide client, so every caller shares the same connection pool."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OpenMeteoClient()
+        return _default_client
+
+
+def geocode_city(city: str) -> GeocodeResult | None:
+    return default_client().geocode_city(city)
 
 
 def fetch_hourly(
@@ -36,28 +381,17 @@ def fetch_hourly(
     lon: float,
     start: str,
     end: str,
-    tz: str = None
+    tz: str = None,
+    columnar: bool = False,
 ):
-    tz = tz or settings.DEFAULT_TZ
-    result = requests.get(ARCHIVE_URL, params={
-        "latitude": lat, "longitude": lon,
-        "start_date": start, "end_date": end,
-        "hourly": "temperature_2m,precipitation",
-        "timezone": tz,
-    })
-    result.raise_for_status()
-    j = result.json()
-    hourly = j.get("hourly", {})
-    times = hourly.get("time", []) or []
-    temps = hourly.get("temperature_2m", []) or []
-    precs = hourly.get("precipitation", []) or []
-    tzinfo = ZoneInfo(tz)
-    out = []
-    for i, t in enumerate(times):
-        dt = datetime.fromisoformat(t).replace(tzinfo=tzinfo)
-        out.append({
-            "date_time": dt,
-            "temperature_2m": temps[i] if i < len(temps) else None,
-            "precipitation": precs[i] if i < len(precs) else None,
-        })
-    return out
+    return default_client().fetch_hourly(lat, lon, start, end, tz=tz, columnar=columnar)
+
+
+def fetch_hourly_many(
+    points: list[tuple[float, float]],
+    start: str,
+    end: str,
+    tz: str = None,
+    batch_size: int | None = None,
+) -> list[HourlySeries]:
+    return default_client().fetch_hourly_many(points, start, end, tz=tz, batch_size=batch_size)
@@ -0,0 +1,150 @@
+"""
+Declarative range partitioning of HourlyWeather by ``date_time`` (PostgreSQL).
+
+The table keeps its name and its ``uq_city_datetime`` constraint, so the ORM,
+the COPY ingest and the migrations keep working unchanged. Partitions are
+named ``meteo_hourlyweather_pYYYY`` or ``meteo_hourlyweather_pYYYYMM`` and a
+DEFAULT partition catches rows outside the created ranges.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+
+from meteo.models import HourlyWeather
+
+TABLE = HourlyWeather._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+BRIN_INDEX = "meteo_hourly_date_time_brin"
+INTERVALS = ("month", "year")
+
+
+def period_start(day: date, interval: str) -> date:
+    return date(day.year, 1, 1) if interval == "year" else date(day.year, day.month, 1)
+
+
+def next_period(day: date, interval: str) -> date:
+    start = period_start(day, interval)
+    if interval == "year" or start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+def partition_ranges(start: date, end: date, interval: str) -> list[tuple[str, date, date]]:
+    """``(name, lower, upper)`` for every period touching ``start..end``; ``upper`` is exclusive."""
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown partition interval: {interval}")
+    out = []
+    lower = period_start(start, interval)
+    while lower <= end:
+        upper = next_period(lower, interval)
+        suffix = f"{lower:%Y}" if interval == "year" else f"{lower:%Y%m}"
+        out.append((f"{TABLE}_p{suffix}", lower, upper))
+        lower = upper
+    return out
+
+
+class PartitioningError(Exception):
+    """Partitioning is not available on this database."""
+
+
+def _require_postgresql() -> None:
+    if connection.vendor != "postgresql":
+        raise PartitioningError("Partitioning requires PostgreSQL.")
+
+
+def is_partitioned() -> bool:
+    _require_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def _bounds(lower: date, upper: date) -> tuple[str, str]:
+    # Inlined into DDL (partition bounds cannot be bound parameters); built from dates only.
+    return f"{lower.isoformat()} 00:00:00+00", f"{upper.isoformat()} 00:00:00+00"
+
+
+def ensure_partitions(start: date, end: date, interval: str) -> list[str]:
+    """
+    Create the missing partitions for ``start..end``. Rows of the new ranges
+    that already landed in the DEFAULT partition are moved into them; the
+    DEFAULT partition is detached and re-attached once for the whole call.
+    Returns the names of the partitions created.
+    """
+    _require_postgresql()
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        missing = []
+        for name, lower, upper in partition_ranges(start, end, interval):
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is None:
+                missing.append((name, *_bounds(lower, upper)))
+        if not missing:
+            return created
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+        for name, lo, hi in missing:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ('{lo}') TO ('{hi}')")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE date_time >= %s AND date_time < %s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+                [lo, hi],
+            )
+            created.append(name)
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    return created
+
+
+def convert_to_partitioned(interval: str, ahead: date, keep_old: bool = False) -> list[str]:
+    """
+    Rebuild HourlyWeather as a table partitioned by range on ``date_time``,
+    copy every row into it and swap the names, in one transaction. The old
+    heap table is dropped unless ``keep_old`` (then it is kept as
+    ``meteo_hourlyweather_unpartitioned``, without its foreign key so cities
+    can still be deleted). Partitions are created from the first stored hour
+    up to ``ahead``.
+    """
+    _require_postgresql()
+    new, old = f"{TABLE}_partitioned", f"{TABLE}_unpartitioned"
+    seq = f"{TABLE}_part_id_seq"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT min(date_time)::date, max(date_time)::date, max(id) FROM {TABLE}")
+        first, last, max_id = cursor.fetchone()
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME CONSTRAINT uq_city_datetime TO uq_city_datetime_old")
+        cursor.execute(f"DROP INDEX IF EXISTS {BRIN_INDEX}")
+        cursor.execute(f"CREATE TABLE {new} (LIKE {TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (date_time)")
+        cursor.execute(f"CREATE SEQUENCE {seq} OWNED BY {new}.id")
+        cursor.execute(f"ALTER TABLE {new} ALTER COLUMN id SET DEFAULT nextval('{seq}')")
+        cursor.execute(f"SELECT setval('{seq}', %s)", [max_id or 1])
+        cursor.execute(f"ALTER TABLE {new} ADD PRIMARY KEY (id, date_time)")
+        cursor.execute(f"ALTER TABLE {new} ADD CONSTRAINT uq_city_datetime UNIQUE (city_id, date_time)")
+        cursor.execute(
+            f"ALTER TABLE {new} ADD CONSTRAINT {TABLE}_city_id_part_fk FOREIGN KEY (city_id) "
+            "REFERENCES meteo_city (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {new} DEFAULT")
+
+        names = []
+        for name, lower, upper in partition_ranges(first or ahead, max(last or ahead, ahead), interval):
+            lo, hi = _bounds(lower, upper)
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {new} FOR VALUES FROM ('{lo}') TO ('{hi}')")
+            names.append(name)
+        cursor.execute(
+            f"CREATE INDEX {BRIN_INDEX} ON {new} USING brin (date_time) WITH (pages_per_range = 32)"
+        )
+
+        cursor.execute(f"INSERT INTO {new} SELECT * FROM {TABLE}")
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {old}")
+        cursor.execute(f"ALTER TABLE {new} RENAME TO {TABLE}")
+        if keep_old:
+            cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                           [old])
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {old} DROP CONSTRAINT "{constraint}"')
+        else:
+            cursor.execute(f"DROP TABLE {old}")
+        cursor.execute(f"ANALYZE {TABLE}")
+    return names
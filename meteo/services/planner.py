@@ -0,0 +1,168 @@
+"""
+Long-range query planning for the stats layer.
+
+A local date range is split into the calendar months it fully covers,
+answered from MonthlyWeather, and the edge days around them, answered
+from DailyWeather. Days that have no rollup row (and whole months without
+a monthly row fall back to their days) are aggregated from the raw hours
+of just those days, with one query for every city (plus one for the
+packed months with compact storage). The partial results are merged by
+the callers in :mod:`aggregation`, so the work grows with the number of
+periods instead of the number of hours.
+
+Cities without any rollup row in the range are left to the raw-hour
+aggregation, as before.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from meteo.models import City, DailyWeather, HourlyWeather, MonthlyWeather
+from meteo.services.compact import hourly_series_many
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.partitioning import next_period
+from meteo.services.rollup import HOURLY_FIELDS, daily_rows
+from meteo.services.timebuckets import to_epochs, utc_range
+
+
+@dataclass
+class Plan:
+    months: list[date] = field(default_factory=list)
+    """First day of every month fully inside the range."""
+    edges: list[tuple[date, date]] = field(default_factory=list)
+    """Day ranges before the first and after the last whole month."""
+
+
+@dataclass
+class Periods:
+    months: list[MonthlyWeather] = field(default_factory=list)
+    days: list[DailyWeather] = field(default_factory=list)
+
+
+def plan_range(start: date, end: date, months: bool = True) -> Plan:
+    """Split ``start..end`` into whole months (when ``months``) and the remaining edge day ranges."""
+    first = start if start.day == 1 else next_period(start, "month")
+    last = next_period(end, "month") - timedelta(days=1)
+    if not months or first > end:
+        return Plan(edges=[(start, end)])
+    upper = end + timedelta(days=1) if end == last else end.replace(day=1)
+    plan = Plan()
+    month = first
+    while month < upper:
+        plan.months.append(month)
+        month = next_period(month, "month")
+    if not plan.months:
+        return Plan(edges=[(start, end)])
+    if start < first:
+        plan.edges.append((start, first - timedelta(days=1)))
+    if month <= end:
+        plan.edges.append((month, end))
+    return plan
+
+
+def _day_ranges(days: list[date]) -> list[tuple[date, date]]:
+    ranges: list[tuple[date, date]] = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day - timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def _days(first: date, last: date):
+    day = first
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def planned_periods(
+    cities: list[City], start: date, end: date, tz: ZoneInfo, months: bool = True,
+) -> dict[int, Periods]:
+    """
+    Rollup periods covering ``start..end`` for every city that has rollup
+    rows in the range, keyed by city pk. Gaps up to the city's
+    ``loaded_until`` are filled from the raw hours as unsaved DailyWeather.
+    """
+    if tz.key not in settings.ROLLUP_TIMEZONES:
+        return {}
+    plan = plan_range(start, end, months)
+    out: dict[int, Periods] = {}
+    day_ranges = list(plan.edges)
+    monthly: dict[int, set[date]] = {}
+    if plan.months:
+        for row in (MonthlyWeather.objects
+                    .filter(city__in=cities, timezone=tz.key, month__in=plan.months)
+                    .order_by("city_id", "month")):
+            out.setdefault(row.city_id, Periods()).months.append(row)
+            monthly.setdefault(row.city_id, set()).add(row.month)
+        # Months without a monthly row for some city are read day by day.
+        uncovered = [m for m in plan.months if any(m not in monthly.get(c.pk, ()) for c in cities)]
+        day_ranges += [(m, next_period(m, "month") - timedelta(days=1)) for m in uncovered]
+
+    if day_ranges:
+        ranges = Q()
+        for first, last in day_ranges:
+            ranges |= Q(date__range=(first, last))
+        for row in (DailyWeather.objects
+                    .filter(ranges, city__in=cities, timezone=tz.key)
+                    .order_by("city_id", "date")):
+            if row.date.replace(day=1) not in monthly.get(row.city_id, ()):
+                out.setdefault(row.city_id, Periods()).days.append(row)
+
+    gaps: dict[int, list[tuple[datetime, datetime]]] = {}
+    for city in cities:
+        periods = out.get(city.pk)
+        if periods is None:
+            continue
+        have = {d.date for d in periods.days}
+        whole = monthly.get(city.pk, set())
+        last = min(end, city.loaded_until.astimezone(tz).date()) if city.loaded_until else end
+        missing = [day for first, final in day_ranges for day in _days(first, min(final, last))
+                   if day not in have and day.replace(day=1) not in whole]
+        for first, final in _day_ranges(missing):
+            gaps.setdefault(city.pk, []).append(utc_range(first, final, tz))
+    if gaps:
+        for city_id, rows in _gap_records(cities, gaps).items():
+            periods = out[city_id]
+            periods.days = sorted(periods.days + [DailyWeather(city_id=city_id, timezone=tz.key, **row)
+                                                  for row in daily_rows(rows, tz)],
+                                  key=lambda d: d.date)
+    return out
+
+
+def _gap_records(cities: list[City], gaps: dict[int, list[tuple[datetime, datetime]]]) -> dict[int, list[tuple]]:
+    """
+    ``HOURLY_FIELDS`` tuples of the hours inside the UTC ranges ``gaps`` of
+    every city pk, with one query (two with compact storage).
+    """
+    records: dict[int, list[tuple]] = {}
+    if settings.COMPACT_STORAGE:
+        lo = min(first for ranges in gaps.values() for first, _ in ranges)
+        hi = max(last for ranges in gaps.values() for _, last in ranges)
+        series = hourly_series_many([city for city in cities if city.pk in gaps], lo, hi)
+        for city_id, ranges in gaps.items():
+            hours = series[city_id]
+            epochs = to_epochs(hours.date_time)
+            inside = np.zeros(len(hours), dtype=bool)
+            for first, last in ranges:
+                inside |= (epochs >= first.timestamp()) & (epochs <= last.timestamp())
+            if inside.any():
+                kept = HourlySeries(hours.date_time[inside], hours.temperature_2m[inside], hours.precipitation[inside])
+                records[city_id] = [tuple(row[f] for f in HOURLY_FIELDS) for row in kept.rows()]
+        return records
+
+    match = Q()
+    for city_id, ranges in gaps.items():
+        for bounds in ranges:
+            match |= Q(city_id=city_id, date_time__range=bounds)
+    for city_id, *record in (HourlyWeather.objects.filter(match)
+                             .order_by("city_id", "date_time")
+                             .values_list("city_id", *HOURLY_FIELDS)):
+        records.setdefault(city_id, []).append(tuple(record))
+    return records
@@ -0,0 +1,135 @@
+"""
+Server-side downsampling of the hourly series to hour/day/week/month
+buckets in a local timezone, one vectorized pandas groupby per page.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from meteo.models import City
+from meteo.services.compact import hourly_series
+from meteo.services.hotcache import hot_series
+from meteo.services.instrumentation import phase
+from meteo.services.open_meteo import HourlySeries
+from meteo.services.partitioning import next_period
+from meteo.services.timebuckets import day_keys, key_date, month_keys, to_epochs, utc_range, week_keys
+
+RESOLUTIONS = ("hour", "day", "week", "month")
+AGGREGATES = ("mean", "min", "max", "sum", "percentile")
+VARIABLES = ("temperature_2m", "precipitation")
+
+
+@dataclass
+class Bucket:
+    start: datetime | date
+    hours: int
+    temperature_2m: float | None
+    precipitation: float | None
+
+
+def page_end(page_start: date, resolution: str, limit: int) -> date:
+    """
+    Last local day of a page of at most ``limit`` buckets starting at
+    ``page_start``. Pages always cover whole local days, so an hourly page
+    holds ``limit // 24`` days (at least one).
+    """
+    if resolution == "hour":
+        return page_start + timedelta(days=max(limit // 24, 1) - 1)
+    if resolution == "day":
+        return page_start + timedelta(days=limit - 1)
+    if resolution == "week":
+        return page_start - timedelta(days=page_start.weekday()) + timedelta(days=7 * limit - 1)
+    upper = page_start
+    for _ in range(limit):
+        upper = next_period(upper, "month")
+    return upper - timedelta(days=1)
+
+
+def bucket_keys(epochs: np.ndarray, tz: ZoneInfo, resolution: str) -> np.ndarray:
+    """
+    Integer bucket key of every epoch second: the epoch itself for hourly
+    buckets, otherwise the day key (see :mod:`timebuckets`) of the first
+    local day of the bucket.
+    """
+    if resolution == "hour":
+        return epochs
+    days = day_keys(epochs, tz)
+    if resolution == "week":
+        return week_keys(days)
+    if resolution == "month":
+        return month_keys(days)
+    return days
+
+
+def bucket_start(key: int, tz: ZoneInfo, resolution: str) -> datetime | date:
+    if resolution == "hour":
+        return datetime.fromtimestamp(int(key), tz)
+    return key_date(key)
+
+
+def resample(
+    series: HourlySeries,
+    tz: ZoneInfo,
+    resolution: str,
+    aggregate: str,
+    percentile: float = 50.0,
+) -> list[Bucket]:
+    """
+    Aggregate ``series`` per bucket. Hourly buckets are real UTC hours shown
+    in ``tz`` (a repeated local hour stays two buckets); the other buckets
+    are local calendar days, ISO weeks and months. Missing values are
+    skipped; a bucket without values yields None, except precipitation
+    sums, where missing hours count as 0 as in the stats endpoints.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {aggregate}")
+    if not len(series):
+        return []
+
+    with phase("tz_convert"):
+        keys = bucket_keys(to_epochs(series.date_time), tz, resolution)
+    with phase("dataframe"):
+        frame = pd.DataFrame({"temperature_2m": series.temperature_2m,
+                              "precipitation": series.precipitation})
+    with phase("groupby"):
+        grouped = frame.groupby(keys, sort=True)
+        if aggregate == "sum":
+            values = grouped.sum(min_count=1)
+            values["precipitation"] = values["precipitation"].fillna(0.0)
+        elif aggregate == "percentile":
+            values = grouped.quantile(percentile / 100.0)
+        else:
+            values = grouped.agg(aggregate)
+        values["hours"] = grouped.size()
+        values = values.astype(object).where(values.notna(), None)
+
+    return [
+        Bucket(start=bucket_start(key, tz, resolution), hours=int(row.hours),
+               temperature_2m=row.temperature_2m, precipitation=row.precipitation)
+        for key, row in zip(values.index, values.itertuples(index=False))
+    ]
+
+
+def series_page(
+    city: City,
+    page_start: date,
+    end: date,
+    tz: ZoneInfo,
+    resolution: str,
+    aggregate: str,
+    limit: int,
+    percentile: float = 50.0,
+) -> tuple[list[Bucket], date | None]:
+    """Buckets of one page starting at ``page_start`` and the start of the next page (or None)."""
+    last = min(page_end(page_start, resolution, limit), end)
+    bounds = utc_range(page_start, last, tz)
+    series = hot_series(city, *bounds)
+    if series is None:
+        series = hourly_series(city, *bounds)
+    buckets = resample(series, tz, resolution, aggregate, percentile)
+    return buckets, (last + timedelta(days=1) if last < end else None)
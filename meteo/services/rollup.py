@@ -0,0 +1,177 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from meteo.models import City, DailyWeather, HourlyWeather, MonthlyWeather
+from meteo.services.compact import hourly_series
+from meteo.services.partitioning import next_period
+from meteo.services.sketches import PrecipitationHistogram, TemperatureSketch
+from meteo.services.timebuckets import day_keys, key_date, to_epochs, utc_range, zone
+
+HOURLY_FIELDS = ("date_time", "temperature_2m", "precipitation")
+ROLLUP_LOCK = 0x6D65_7465
+"""First key of the PostgreSQL advisory lock taken per city (second key) while re-rolling."""
+
+
+def rollup_timezones() -> list[str]:
+    return list(settings.ROLLUP_TIMEZONES)
+
+
+def daily_rows(records, tz: ZoneInfo) -> list[dict]:
+    """
+    Aggregate ``(date_time, temperature_2m, precipitation)`` records into one
+    dict per local day in ``tz``, with the same semantics as the raw-hour
+    aggregation (missing precipitation counts as 0, ties resolve to the
+    earliest hour). Each day also carries its temperature sketch and
+    precipitation intensity histogram (see :mod:`sketches`), serialized.
+    """
+    df = pd.DataFrame.from_records(list(records), columns=HOURLY_FIELDS)
+    if df.empty:
+        return []
+    df["date_time"] = pd.to_datetime(df["date_time"], utc=True)
+    df = df.sort_values("date_time", kind="stable").reset_index(drop=True)
+    df["date"] = day_keys(to_epochs(df["date_time"].dt.tz_localize(None).to_numpy()), tz)
+    df["temperature_2m"] = df["temperature_2m"].astype("float")
+    rain = df["precipitation"].astype("float").to_numpy()
+    df["precipitation"] = df["precipitation"].astype("float").fillna(0.0)
+
+    daily = df.groupby("date", sort=True).agg(
+        hours=("date_time", "size"),
+        temperature_hours=("temperature_2m", "count"),
+        temperature_mean=("temperature_2m", "mean"),
+        temperature_min=("temperature_2m", "min"),
+        temperature_max=("temperature_2m", "max"),
+        precipitation_total=("precipitation", "sum"),
+    )
+    temps = df.dropna(subset=["temperature_2m"]).groupby("date")["temperature_2m"]
+    min_at = df.loc[temps.idxmin(), ["date", "date_time"]].set_index("date")["date_time"]
+    max_at = df.loc[temps.idxmax(), ["date", "date_time"]].set_index("date")["date_time"]
+    positions = df.groupby("date").indices
+    temperatures = df["temperature_2m"].to_numpy()
+
+    out = []
+    for day, row in daily.iterrows():
+        has_temp = row["temperature_hours"] > 0
+        hours = positions[day]
+        out.append({
+            "date": key_date(day),
+            "hours": int(row["hours"]),
+            "temperature_hours": int(row["temperature_hours"]),
+            "temperature_mean": float(row["temperature_mean"]) if has_temp else None,
+            "temperature_min": float(row["temperature_min"]) if has_temp else None,
+            "temperature_min_at": min_at[day].to_pydatetime() if has_temp else None,
+            "temperature_max": float(row["temperature_max"]) if has_temp else None,
+            "temperature_max_at": max_at[day].to_pydatetime() if has_temp else None,
+            "precipitation_total": float(row["precipitation_total"]),
+            "temperature_sketch": TemperatureSketch.from_values(temperatures[hours]).to_bytes(),
+            "precipitation_histogram": PrecipitationHistogram.from_values(rain[hours]).to_bytes(),
+        })
+    return out
+
+
+def monthly_row(days) -> dict:
+    """
+    Merge the DailyWeather rows of one month (ascending dates) into the
+    MonthlyWeather fields. Extremes keep the earliest hour on ties and the
+    wettest day the earliest date, as the raw-hour aggregation does.
+    """
+    with_temp = [d for d in days if d.temperature_hours]
+    temperature_hours = sum(d.temperature_hours for d in with_temp)
+    coldest = min(with_temp, key=lambda d: (d.temperature_min, d.temperature_min_at), default=None)
+    hottest = min(with_temp, key=lambda d: (-d.temperature_max, d.temperature_max_at), default=None)
+    wettest = max(days, key=lambda d: d.precipitation_total, default=None)
+    return {
+        "hours": sum(d.hours for d in days),
+        "temperature_hours": temperature_hours,
+        "temperature_mean": (sum(d.temperature_mean * d.temperature_hours for d in with_temp) / temperature_hours
+                             if temperature_hours else None),
+        "temperature_min": coldest.temperature_min if coldest else None,
+        "temperature_min_at": coldest.temperature_min_at if coldest else None,
+        "temperature_max": hottest.temperature_max if hottest else None,
+        "temperature_max_at": hottest.temperature_max_at if hottest else None,
+        "precipitation_total": float(sum(d.precipitation_total for d in days)),
+        "precipitation_days": sum(1 for d in days if d.precipitation_total > 0),
+        "precipitation_max_date": wettest.date if wettest else None,
+        "precipitation_max": wettest.precipitation_total if wettest else None,
+        "temperature_sketch": TemperatureSketch.merge(
+            TemperatureSketch.from_bytes(d.temperature_sketch) for d in days).to_bytes(),
+        "precipitation_histogram": PrecipitationHistogram.merge(
+            PrecipitationHistogram.from_bytes(d.precipitation_histogram) for d in days).to_bytes(),
+    }
+
+
+def refresh_daily(
+    city: City,
+    start_dt: datetime,
+    end_dt: datetime,
+    timezones: list[str] | None = None,
+) -> int:
+    """
+    Recompute the DailyWeather rows of every local day touched by the
+    instants ``start_dt..end_dt``, then the MonthlyWeather rows of their
+    months. Returns the number of daily rollup rows written.
+
+    Chunks of one city loaded in parallel can share a boundary day or month
+    when a rollup zone differs from the one the chunks were cut in, so the
+    refresh holds a per-city lock until the surrounding transaction commits:
+    the later chunk waits and then re-reads the hours the earlier one wrote.
+    """
+    written = 0
+    with transaction.atomic():
+        _lock_city(city)
+        for tzname in timezones or rollup_timezones():
+            tz = zone(tzname)
+            first_day = start_dt.astimezone(tz).date()
+            last_day = end_dt.astimezone(tz).date()
+            written += _refresh_days(city, first_day, last_day, tz)
+            _refresh_months(city, first_day, last_day, tz)
+    return written
+
+
+def _lock_city(city: City) -> None:
+    # Other backends serialize writers on their own (SQLite locks the database).
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ROLLUP_LOCK, city.pk])
+
+
+def hourly_records(city: City, first_day: date, last_day: date, tz: ZoneInfo):
+    """``HOURLY_FIELDS`` tuples of the local days ``first_day..last_day``, from compact storage when enabled."""
+    if settings.COMPACT_STORAGE:
+        return [tuple(r[f] for f in HOURLY_FIELDS)
+                for r in hourly_series(city, *utc_range(first_day, last_day, tz)).rows()]
+    return (HourlyWeather.objects
+            .filter(city=city, date_time__range=utc_range(first_day, last_day, tz))
+            .values_list(*HOURLY_FIELDS))
+
+
+def _refresh_days(city: City, first_day: date, last_day: date, tz: ZoneInfo) -> int:
+    records = hourly_records(city, first_day, last_day, tz)
+    objs = [DailyWeather(city=city, timezone=tz.key, **row) for row in daily_rows(records, tz)]
+    with transaction.atomic():
+        (DailyWeather.objects
+         .filter(city=city, timezone=tz.key, date__range=(first_day, last_day))
+         .delete())
+        DailyWeather.objects.bulk_create(objs)
+    return len(objs)
+
+
+def _refresh_months(city: City, first_day: date, last_day: date, tz: ZoneInfo) -> int:
+    first_month = first_day.replace(day=1)
+    upper = next_period(last_day, "month")
+    by_month: dict[date, list[DailyWeather]] = {}
+    for day in (DailyWeather.objects
+                .filter(city=city, timezone=tz.key, date__gte=first_month, date__lt=upper)
+                .order_by("date")):
+        by_month.setdefault(day.date.replace(day=1), []).append(day)
+    objs = [MonthlyWeather(city=city, timezone=tz.key, month=month, **monthly_row(days))
+            for month, days in by_month.items()]
+    with transaction.atomic():
+        (MonthlyWeather.objects
+         .filter(city=city, timezone=tz.key, month__gte=first_month, month__lt=upper)
+         .delete())
+        MonthlyWeather.objects.bulk_create(objs)
+    return len(objs)
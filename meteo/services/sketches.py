@@ -0,0 +1,124 @@
+"""
+Mergeable per-day distribution summaries, stored with the daily rollup.
+
+Open-Meteo reports temperatures with one decimal, so a temperature sketch
+is a sparse histogram of exact 0.1 °C values (a few dozen entries per day
+at most). Merging the sketches of any number of days and cities is adding
+counts, and quantiles read from the merged sketch equal those of the raw
+hours. Precipitation intensity is counted in fixed mm/h bins.
+
+Both serialize to little-endian int32 arrays for ``BinaryField`` columns.
+"""
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+
+from meteo.services.compact import SCALE
+
+PRECIPITATION_BINS = (0.0, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0)
+"""Lower edges (mm/h) of the precipitation intensity bins; the last one is open."""
+
+_DTYPE = "<i4"
+
+
+def _array(data: bytes | memoryview | None) -> np.ndarray:
+    return np.frombuffer(bytes(data or b""), dtype=_DTYPE).astype(np.int64)
+
+
+@dataclass
+class TemperatureSketch:
+    values: np.ndarray
+    """Distinct temperatures × ``SCALE``, ascending."""
+    counts: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "TemperatureSketch":
+        return cls(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def from_values(cls, temperatures: np.ndarray) -> "TemperatureSketch":
+        temperatures = np.asarray(temperatures, dtype=float)
+        scaled = np.rint(temperatures[~np.isnan(temperatures)] * SCALE).astype(np.int64)
+        values, counts = np.unique(scaled, return_counts=True)
+        return cls(values, counts.astype(np.int64))
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview | None) -> "TemperatureSketch":
+        raw = _array(data)
+        half = len(raw) // 2
+        return cls(raw[:half], raw[half:])
+
+    def to_bytes(self) -> bytes:
+        return np.concatenate([self.values, self.counts]).astype(_DTYPE).tobytes()
+
+    @classmethod
+    def merge(cls, sketches: Iterable["TemperatureSketch"]) -> "TemperatureSketch":
+        sketches = list(sketches)
+        if not sketches:
+            return cls.empty()
+        values, inverse = np.unique(np.concatenate([s.values for s in sketches]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([s.counts for s in sketches]),
+                             minlength=len(values))
+        return cls(values, counts.astype(np.int64))
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def count_above(self, threshold: float) -> int:
+        """Hours strictly above ``threshold``."""
+        return int(self.counts[self.values / SCALE > threshold].sum())
+
+    def count_below(self, threshold: float) -> int:
+        """Hours strictly below ``threshold``."""
+        return int(self.counts[self.values / SCALE < threshold].sum())
+
+    def quantile(self, q: float) -> float | None:
+        """Quantile ``q`` (0..1) with linear interpolation between ranks, as ``numpy.quantile``."""
+        n = self.count
+        if not n:
+            return None
+        cumulative = np.cumsum(self.counts)
+        position = (n - 1) * q
+        lower = int(np.floor(position))
+        upper = min(lower + 1, n - 1)
+        below, above = self.values[np.searchsorted(cumulative, [lower, upper], side="right")]
+        return float(below + (above - below) * (position - lower)) / SCALE
+
+
+@dataclass
+class PrecipitationHistogram:
+    counts: np.ndarray
+    """Hours per bin of ``PRECIPITATION_BINS``; hours without a value are not counted."""
+
+    @classmethod
+    def empty(cls) -> "PrecipitationHistogram":
+        return cls(np.zeros(len(PRECIPITATION_BINS), dtype=np.int64))
+
+    @classmethod
+    def from_values(cls, precipitation: np.ndarray) -> "PrecipitationHistogram":
+        precipitation = np.asarray(precipitation, dtype=float)
+        present = precipitation[~np.isnan(precipitation)]
+        bins = np.clip(np.searchsorted(PRECIPITATION_BINS, present, side="right") - 1, 0, None)
+        return cls(np.bincount(bins, minlength=len(PRECIPITATION_BINS)).astype(np.int64))
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview | None) -> "PrecipitationHistogram":
+        counts = _array(data)
+        return cls(counts) if len(counts) == len(PRECIPITATION_BINS) else cls.empty()
+
+    def to_bytes(self) -> bytes:
+        return self.counts.astype(_DTYPE).tobytes()
+
+    @classmethod
+    def merge(cls, histograms: Iterable["PrecipitationHistogram"]) -> "PrecipitationHistogram":
+        merged = cls.empty()
+        for histogram in histograms:
+            merged.counts = merged.counts + histogram.counts
+        return merged
+
+    def bins(self) -> list[tuple[float, float | None, int]]:
+        """``(from, to, hours)`` per bin; ``to`` is None for the open last bin."""
+        upper = list(PRECIPITATION_BINS[1:]) + [None]
+        return [(lo, hi, int(n)) for lo, hi, n in zip(PRECIPITATION_BINS, upper, self.counts)]
@@ -0,0 +1,135 @@
+"""
+In-memory spatial index over City coordinates for bounding-box, radius
+and nearest-city lookups, without PostGIS.
+
+Cities are bucketed in a 1° latitude/longitude grid and kept as NumPy
+arrays sorted by cell, so a query only touches the cells overlapping its
+bounding box (one vectorized ``searchsorted`` per latitude band) before
+the exact bbox or haversine filter. The index is built lazily per process
+and rebuilt when the cities version token changes (see :mod:`cities`).
+The token lives in the stats cache: with a shared backend every worker
+picks up new cities, with the default per-process ``LocMemCache`` only
+the process that changed them does.
+"""
+import math
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from meteo.models import City
+from meteo.services.cities import cities_version
+
+EARTH_RADIUS_KM = 6371.0088
+LAT_CELLS = 180
+LON_CELLS = 360
+
+
+@dataclass(frozen=True)
+class Match:
+    pk: int
+    distance_km: float | None = None
+
+
+def haversine_km(lat: float, lon: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance from ``(lat, lon)`` to every point, in km."""
+    phi1, phi2 = math.radians(lat), np.radians(latitudes)
+    dphi = phi2 - phi1
+    dlambda = np.radians(longitudes) - math.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _wrap(lon: float) -> float:
+    return (lon + 180.0) % 360.0 - 180.0
+
+
+class CityIndex:
+    def __init__(self, pks, latitudes, longitudes):
+        pks = np.asarray(pks, dtype=np.int64)
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        cells = self._rows(latitudes) * LON_CELLS + self._cols(longitudes)
+        order = np.argsort(cells, kind="stable")
+        self.pks, self.latitudes, self.longitudes, self.cells = (
+            pks[order], latitudes[order], longitudes[order], cells[order])
+
+    @classmethod
+    def from_db(cls) -> "CityIndex":
+        rows = list(City.objects.values_list("pk", "latitude", "longitude"))
+        return cls(*zip(*rows)) if rows else cls([], [], [])
+
+    def __len__(self) -> int:
+        return len(self.pks)
+
+    @staticmethod
+    def _rows(latitudes):
+        return np.clip(np.floor(np.asarray(latitudes) + 90.0), 0, LAT_CELLS - 1).astype(np.int64)
+
+    @staticmethod
+    def _cols(longitudes):
+        return np.clip(np.floor(np.asarray(longitudes) + 180.0), 0, LON_CELLS - 1).astype(np.int64)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Positions of the cities in the grid cells overlapping the box (``min_lon > max_lon`` wraps)."""
+        rows = np.arange(self._rows(min_lat), self._rows(max_lat) + 1)
+        first, last = int(self._cols(min_lon)), int(self._cols(max_lon))
+        spans = [(first, last)] if first <= last else [(first, LON_CELLS - 1), (0, last)]
+        lows = np.concatenate([np.searchsorted(self.cells, rows * LON_CELLS + a, side="left") for a, _ in spans])
+        highs = np.concatenate([np.searchsorted(self.cells, rows * LON_CELLS + b, side="right") for _, b in spans])
+        keep = highs > lows
+        if not keep.any():
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(lo, hi) for lo, hi in zip(lows[keep], highs[keep])])
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> list[Match]:
+        """Cities inside the box, by pk. A box with ``min_lon > max_lon`` crosses the antimeridian."""
+        positions = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lat, lon = self.latitudes[positions], self.longitudes[positions]
+        inside = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            inside &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            inside &= (lon >= min_lon) | (lon <= max_lon)
+        return [Match(int(pk)) for pk in np.sort(self.pks[positions[inside]])]
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> list[Match]:
+        """Cities within ``radius_km`` of the point, nearest first."""
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        if min_lat <= -90.0 or max_lat >= 90.0 or angle >= math.pi / 2:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            dlon = math.degrees(math.asin(min(math.sin(angle) / math.cos(math.radians(lat)), 1.0)))
+            min_lon, max_lon = (-180.0, 180.0) if dlon >= 180.0 else (_wrap(lon - dlon), _wrap(lon + dlon))
+        positions = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        distances = haversine_km(lat, lon, self.latitudes[positions], self.longitudes[positions])
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((self.pks[positions], distances))
+        return [Match(int(self.pks[positions[i]]), float(distances[i])) for i in order]
+
+    def nearest(self, lat: float, lon: float, limit: int) -> list[Match]:
+        """The ``limit`` cities closest to the point, searching growing radii."""
+        radius = 50.0
+        while True:
+            matches = self.within_radius(lat, lon, radius)
+            if len(matches) >= limit or radius >= math.pi * EARTH_RADIUS_KM:
+                return matches[:limit]
+            radius *= 4
+
+
+_lock = threading.Lock()
+_index: CityIndex | None = None
+_version: str | None = None
+
+
+def city_index() -> CityIndex:
+    """The process-wide index, rebuilt when the cities version token changed."""
+    global _index, _version
+    version = cities_version()
+    with _lock:
+        if _index is None or version != _version:
+            _index, _version = CityIndex.from_db(), version
+        return _index
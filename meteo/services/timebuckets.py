@@ -0,0 +1,123 @@
+"""
+Shared timezone handling and local time bucketing.
+
+Zones and the UTC bounds of local date ranges are cached, and local day
+keys are computed with integer arithmetic over int64 epoch seconds: each
+instant is shifted by the UTC offset in force at that moment, looked up
+with ``searchsorted`` in a per-zone table of offset transitions (built
+once per zone and year from ``ZoneInfo``), then floor-divided by 86400.
+No Python object is created per row.
+
+Day keys are days since 1970-01-01 in local time; weeks start on Monday.
+"""
+from datetime import date, datetime, time, timedelta, timezone as py_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+DAY = 86400
+EPOCH_DATE = date(1970, 1, 1)
+
+
+@lru_cache(maxsize=None)
+def zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=4096)
+def _utc_range(start: date, end: date, tzname: str) -> tuple[datetime, datetime]:
+    tz = zone(tzname)
+    start_utc = datetime.combine(start, time.min).replace(tzinfo=tz).astimezone(py_timezone.utc)
+    end_utc = datetime.combine(end, time.max).replace(tzinfo=tz).astimezone(py_timezone.utc)
+    return start_utc, end_utc
+
+
+def utc_range(start: date, end: date, tz: ZoneInfo) -> tuple[datetime, datetime]:
+    """UTC bounds of the local days ``start..end`` (both inclusive)."""
+    return _utc_range(start, end, tz.key)
+
+
+def _offset(tz: ZoneInfo, epoch: int) -> int:
+    return int(datetime.fromtimestamp(epoch, tz).utcoffset().total_seconds())
+
+
+@lru_cache(maxsize=1024)
+def _year_transitions(tzname: str, year: int) -> tuple[tuple[int, int], ...]:
+    """``(epoch, offset)`` pairs: the offset at the start of ``year`` (UTC) and at every change in it."""
+    tz = zone(tzname)
+    lo = int(datetime(year, 1, 1, tzinfo=py_timezone.utc).timestamp())
+    hi = int(datetime(year + 1, 1, 1, tzinfo=py_timezone.utc).timestamp())
+    out = [(lo, _offset(tz, lo))]
+    prev = lo
+    for probe in range(lo + DAY, hi + DAY, DAY):
+        probe = min(probe, hi - 1)
+        current = _offset(tz, probe)
+        if current != out[-1][1]:
+            # Bisect down to the first second with the new offset.
+            left, right = prev, probe
+            while right - left > 1:
+                mid = (left + right) // 2
+                if _offset(tz, mid) == current:
+                    right = mid
+                else:
+                    left = mid
+            out.append((right, current))
+        prev = probe
+        if probe == hi - 1:
+            break
+    return tuple(out)
+
+
+def offset_table(tz: ZoneInfo, first_epoch: int, last_epoch: int) -> tuple[np.ndarray, np.ndarray]:
+    """Transition instants and the UTC offsets (seconds) starting at each, covering the range."""
+    first_year = datetime.fromtimestamp(first_epoch, py_timezone.utc).year
+    last_year = datetime.fromtimestamp(last_epoch, py_timezone.utc).year
+    starts, offsets = [], []
+    for year in range(first_year, last_year + 1):
+        for epoch, offset in _year_transitions(tz.key, year):
+            if not offsets or offset != offsets[-1]:
+                starts.append(epoch)
+                offsets.append(offset)
+    return np.array(starts, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def to_epochs(times: np.ndarray) -> np.ndarray:
+    """int64 epoch seconds of a ``datetime64`` (UTC) array."""
+    return np.asarray(times).astype("datetime64[s]").astype(np.int64)
+
+
+def utc_offsets(epochs: np.ndarray, tz: ZoneInfo) -> np.ndarray:
+    """UTC offset in seconds in force at every epoch second."""
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if not len(epochs):
+        return np.zeros(0, dtype=np.int64)
+    starts, offsets = offset_table(tz, int(epochs.min()), int(epochs.max()))
+    index = np.searchsorted(starts, epochs, side="right") - 1
+    return offsets[np.clip(index, 0, None)]
+
+
+def day_keys(epochs: np.ndarray, tz: ZoneInfo) -> np.ndarray:
+    """Local day of every instant as days since 1970-01-01."""
+    epochs = np.asarray(epochs, dtype=np.int64)
+    return (epochs + utc_offsets(epochs, tz)) // DAY
+
+
+def week_keys(days: np.ndarray) -> np.ndarray:
+    """Day key of the Monday starting the week of every day key (1970-01-01 was a Thursday)."""
+    return days - (days + 3) % 7
+
+
+def month_keys(days: np.ndarray) -> np.ndarray:
+    """Day key of the first day of the month of every day key."""
+    months = np.asarray(days).astype("datetime64[D]").astype("datetime64[M]")
+    return months.astype("datetime64[D]").astype(np.int64)
+
+
+def key_date(key: int) -> date:
+    return EPOCH_DATE + timedelta(days=int(key))
+
+
+def local_dates(times: np.ndarray, tz: ZoneInfo) -> np.ndarray:
+    """Local calendar day (``datetime64[D]``) of every UTC ``datetime64`` instant."""
+    return day_keys(to_epochs(times), tz).astype("datetime64[D]")
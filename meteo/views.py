@@ -1,18 +1,124 @@
-from datetime import datetime, time, timezone as py_timezone
-from zoneinfo import ZoneInfo
-import pandas as pd
-import numpy as np
-from django.db.models import QuerySet
+from collections import Counter
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import City, HourlyWeather
+from .models import City, ClimateNormal
 from .serializers import (
     TemperatureQuerySerializer,
     PrecipitationQuerySerializer,
-    SummaryQuerySerializer
+    SummaryQuerySerializer,
+    SeriesQuerySerializer,
+    ExportQuerySerializer,
+    DistributionQuerySerializer,
+    AnomalyQuerySerializer,
+    RegionQuerySerializer
 )
+from .services.aggregation import (
+    asummary_stats,
+    precipitation_stats,
+    region_stats,
+    summary_stats,
+    temperature_stats
+)
+from .services.distribution import DistributionAggregate, distribution_stats
+from .services.cities import cities_by_name, resolve_city, suggest
+from .services.cache import aget_or_compute, cache_key, get_or_compute, last_modified
+from .services import metrics
+from .services.export import CONTENT_TYPES, EXTENSIONS, export_chunks
+from .services.instrumentation import phase
+from .services.normals import Anomaly, anomaly_stats
+from .services.resample import series_page
+from .services.spatial import city_index
+from .services.names import name_key
+from .services.timebuckets import utc_range, zone
+
+
+def not_found(names: list[str]) -> dict:
+    """404 body for unknown cities, with 'did you mean' suggestions when there are any."""
+    body = {"detail": f"City not found: {', '.join(names)}"}
+    suggestions = {name: suggest(name) for name in names}
+    if any(suggestions.values()):
+        body["suggestions"] = suggestions
+    return body
+
+
+def missing_city(name: str) -> dict:
+    """Per-city entry for an unknown city in multi-city payloads."""
+    entry = {"info": f"City not found: {name}"}
+    suggestions = suggest(name)
+    if suggestions:
+        entry["suggestions"] = suggestions
+    return entry
+
+
+def city_labels(cities: list[City]) -> dict[int, str]:
+    """Display name per city pk: the name, followed by the country when another city has the same name."""
+    counts = Counter(name_key(city.name) for city in cities)
+    return {city.pk: f"{city.name} ({city.country})" if counts[name_key(city.name)] > 1 else city.name
+            for city in cities}
+
+
+def cached_response(request, view: str, params: dict, cities: list[City], compute) -> Response:
+    """
+    Serve ``compute()`` through the stats cache, with ETag/Last-Modified
+    validators so repeated dashboard requests can be answered with a 304.
+    """
+    def timed_compute():
+        with phase("compute"):
+            return compute()
+
+    payload, etag = get_or_compute(cache_key(view, params, cities), timed_compute)
+    return conditional_response(request, etag, cities, lambda: Response(payload))
+
+
+async def acached_response(request, view: str, params: dict, cities: list[City], compute) -> HttpResponse:
+    """:func:`cached_response` for the async views; ``compute`` is a coroutine function."""
+    async def timed_compute():
+        with phase("compute"):
+            return await compute()
+
+    payload, etag = await aget_or_compute(cache_key(view, params, cities), timed_compute)
+    return conditional_response(request, etag, cities, lambda: json_response(payload))
+
+
+def conditional_response(request, etag: str, cities: list[City], make_response) -> HttpResponse:
+    modified = last_modified(cities)
+    modified_ts = int(modified.timestamp()) if modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=modified_ts)
+    if response is None:
+        response = make_response()
+    response["ETag"] = etag
+    if modified_ts is not None:
+        response["Last-Modified"] = http_date(modified_ts)
+    return response
+
+
+def json_response(data, status: int = 200) -> JsonResponse:
+    # Same bytes as DRF's JSONRenderer (compact, unescaped unicode).
+    return JsonResponse(data, status=status, safe=False,
+                        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")})
+
+
+def city_names(data: dict) -> list[str]:
+    names = [data["city"]] if data.get("city") else []
+    if data.get("cities"):
+        names += [c.strip() for c in data["cities"].split(",") if c.strip()]
+    return names
+
+
+def iso_minutes(dt: datetime) -> str:
+    return dt.replace(second=0, microsecond=0).isoformat()
+
+
+def fmt_dt_no_seconds(dt: datetime) -> str:
+    return dt.replace(second=0, microsecond=0).strftime("%Y-%m-%dT%H:%M")
 
 
 class TemperatureStatsView(APIView):
@@ -25,67 +131,46 @@ class TemperatureStatsView(APIView):
         threshold = temperature_query_serializer.validated_data["threshold"]
         threshold_low = temperature_query_serializer.validated_data["threshold_low"]
         tzname = temperature_query_serializer.validated_data["timezone"]
-        tz = ZoneInfo(tzname)
+        tz = zone(tzname)
 
-        try:
-            city = City.objects.get(name=city_name)
-        except City.DoesNotExist:
-            return Response({"detail": f"City not found: {city_name}"}, status=status.HTTP_404_NOT_FOUND)
-
-        start_dt_local = datetime.combine(start, time.min).replace(tzinfo=tz)
-        end_dt_local = datetime.combine(end, time.max).replace(tzinfo=tz)
-        start_dt_utc = start_dt_local.astimezone(py_timezone.utc)
-        end_dt_utc = end_dt_local.astimezone(py_timezone.utc)
-
-        qs: QuerySet[HourlyWeather] = (
-            HourlyWeather.objects
-            .filter(city=city, date_time__range=(start_dt_utc, end_dt_utc))
-            .values("date_time", "temperature_2m")
-        )
-        rows = list(qs)
-        if not rows:
-            return Response({"temperature": {}}, status=status.HTTP_200_OK)
-
-        df = pd.DataFrame(rows)
-        df["date_time"] = pd.to_datetime(df["date_time"], utc=True).dt.tz_convert(tz)
-        df["date"] = df["date_time"].dt.date
-        temps = df["temperature_2m"].astype("float")
-        arr = temps.to_numpy(dtype=float)
-
-        avg = float(np.nanmean(arr))
-        idx_max = int(np.nanargmax(arr))
-        idx_min = int(np.nanargmin(arr))
-
-        avg_by_day = {
-            d.isoformat(): float(np.nanmean(g["temperature_2m"].to_numpy(dtype=float)))
-            for d, g in df.groupby("date")
-        }
-        max_row = df.loc[idx_max]
-        min_row = df.loc[idx_min]
-
-        def iso_minutes(dt: pd.Timestamp) -> str:
-            return dt.to_pydatetime().replace(second=0, microsecond=0).isoformat()
+        city = resolve_city(city_name)
+        if city is None:
+            return Response(not_found([city_name]), status=status.HTTP_404_NOT_FOUND)
 
-        hours_above = int(np.sum(arr > float(threshold)))
-        hours_below = int(np.sum(arr < float(threshold_low)))
+        return cached_response(
+            request, "temperature", temperature_query_serializer.validated_data, [city],
+            lambda: self.payload(city, start, end, tz, threshold, threshold_low),
+        )
 
-        payload = {
+    @staticmethod
+    def payload(city, start, end, tz, threshold, threshold_low) -> dict:
+        stats = temperature_stats(city, start, end, tz,
+                                  threshold=float(threshold),
+                                  threshold_low=float(threshold_low))
+        if not stats.hours:
+            return {"temperature": {}}
+
+        # Hours without any temperature leave the average and extremes empty.
+        measured = stats.average is not None
+        return {
             "temperature": {
-                "average": round(avg, 1),
-                "average_by_day": {k: round(v, 1) for k, v in avg_by_day.items()},
-                "max": {
-                    "value": round(float(max_row["temperature_2m"]), 1),
-                    "date_time": iso_minutes(max_row["date_time"]),
+                "average": round(stats.average, 1) if measured else None,
+                "average_by_day": {
+                    d.isoformat(): round(v, 1) if v is not None else None
+                    for d, v in stats.average_by_day.items()
                 },
+                "max": {
+                    "value": round(stats.max.value, 1),
+                    "date_time": iso_minutes(stats.max.date_time),
+                } if measured else None,
                 "min": {
-                    "value": round(float(min_row["temperature_2m"]), 1),
-                    "date_time": iso_minutes(min_row["date_time"]),
-                },
-                "hours_above_threshold": hours_above,
-                "hours_below_threshold": hours_below,
+                    "value": round(stats.min.value, 1),
+                    "date_time": iso_minutes(stats.min.date_time),
+                } if measured else None,
+                "hours_above_threshold": stats.hours_above,
+                "hours_below_threshold": stats.hours_below,
             }
         }
-        return Response(payload)
 
 
 class PrecipitationStatsView(APIView):
@@ -96,45 +181,34 @@ class PrecipitationStatsView(APIView):
         start = precipitation_query_serializer.validated_data["start"]
         end = precipitation_query_serializer.validated_data["end"]
         tzname = precipitation_query_serializer.validated_data["timezone"]
-        tz = ZoneInfo(tzname)
-
-        try:
-            city = City.objects.get(name__iexact=city_name)
-        except City.DoesNotExist:
-            return Response({"detail": f"City not found: {city_name}"}, status=status.HTTP_404_NOT_FOUND)
+        tz = zone(tzname)
 
-        start_dt_utc = datetime.combine(start, time.min).replace(tzinfo=tz).astimezone(py_timezone.utc)
-        end_dt_utc = datetime.combine(end, time.max).replace(tzinfo=tz).astimezone(py_timezone.utc)
+        city = resolve_city(city_name)
+        if city is None:
+            return Response(not_found([city_name]), status=status.HTTP_404_NOT_FOUND)
 
-        rows = list(
-            HourlyWeather.objects
-            .filter(city=city, date_time__range=(start_dt_utc, end_dt_utc))
-            .values("date_time", "precipitation")
+        return cached_response(
+            request, "precipitation", precipitation_query_serializer.validated_data, [city],
+            lambda: self.payload(city, start, end, tz),
         )
-        if not rows:
-            return Response({"precipitation": {}}, status=status.HTTP_200_OK)
 
-        df = pd.DataFrame(rows)
-        df["date_time"] = pd.to_datetime(df["date_time"], utc=True).dt.tz_convert(tz)
-        df["date"] = df["date_time"].dt.date
-        df["precipitation"] = df["precipitation"].astype("float").fillna(0.0)
+    @staticmethod
+    def payload(city, start, end, tz) -> dict:
+        stats = precipitation_stats(city, start, end, tz)
+        if not stats.hours:
+            return {"precipitation": {}}
 
-        daily = df.groupby("date")["precipitation"].sum()
-        total = float(np.nansum(daily.to_numpy(dtype=float)))
-        total_by_day = {d.isoformat(): round(float(v), 1) for d, v in daily.items()}
-        days_with_precip = int(np.sum(daily.to_numpy(dtype=float) > 0))
-
-        max_date = daily.idxmax()
-        max_value = float(daily.loc[max_date]) if len(daily) else 0.0
+        total = stats.total
+        max_date, max_value = stats.max_day
 
         num_days = (end - start).days + 1
         average = total / num_days if num_days > 0 else 0.0
 
-        payload = {
+        return {
             "precipitation": {
                 "total": round(total, 1),
-                "total_by_day": total_by_day,
-                "days_with_precipitation": days_with_precip,
+                "total_by_day": {d.isoformat(): round(v, 1) for d, v in stats.total_by_day.items()},
+                "days_with_precipitation": stats.days_with_precipitation,
                 "max": {
                     "value": round(max_value, 1),
                     "date": max_date.isoformat(),
@@ -142,7 +216,6 @@ class PrecipitationStatsView(APIView):
                 "average": round(average, 2),
             }
         }
-        return Response(payload)
 
 
 class SummaryStatsView(APIView):
@@ -151,88 +224,374 @@ class SummaryStatsView(APIView):
         summary_query_serializer.is_valid(raise_exception=True)
         start = summary_query_serializer.validated_data["start"]
         end = summary_query_serializer.validated_data["end"]
-        tz = ZoneInfo(summary_query_serializer.validated_data["timezone"])
+        tz = zone(summary_query_serializer.validated_data["timezone"])
+
+        names = city_names(summary_query_serializer.validated_data)
 
-        names = []
-        if summary_query_serializer.validated_data.get("city"):
-            names = [summary_query_serializer.validated_data["city"]]
-        if summary_query_serializer.validated_data.get("cities"):
-            names += [c.strip() for c in summary_query_serializer.validated_data["cities"].split(",") if c.strip()]
+        cities = cities_by_name(names)
+        return cached_response(
+            request, "summary", {**summary_query_serializer.validated_data, "names": names},
+            list(cities.values()),
+            lambda: self.payload(names, cities, start, end, tz),
+        )
 
-        start_utc = datetime.combine(start, time.min).replace(tzinfo=tz).astimezone(py_timezone.utc)
-        end_utc = datetime.combine(end, time.max).replace(tzinfo=tz).astimezone(py_timezone.utc)
+    @staticmethod
+    def payload(names, cities, start, end, tz) -> dict:
+        return SummaryStatsView.render(names, cities, start, end,
+                                       summary_stats(list(cities.values()), start, end, tz))
 
+    @staticmethod
+    def render(names, cities, start, end, stats) -> dict:
         result = {}
         for name in names:
-            try:
-                city = City.objects.get(name__iexact=name)
-            except City.DoesNotExist:
-                result[name] = {"info": f"City not found: {name}"}
+            city = cities.get(name_key(name))
+            if city is None:
+                result[name] = missing_city(name)
                 continue
 
-            qs = (HourlyWeather.objects
-                  .filter(city=city, date_time__range=(start_utc, end_utc))
-                  .values("date_time", "temperature_2m", "precipitation"))
-            rows = list(qs)
-            if not rows:
-                result[city.name] = {
-                    "start_date": start.isoformat(),
-                    "end_date": end.isoformat(),
-                    "temperature_average": None,
-                    "precipitation_total": 0.0,
-                    "days_with_precipitation": 0,
-                    "precipitation_max": None,
-                    "temperature_max": None,
-                    "temperature_min": None,
-                }
-                continue
-
-            df = pd.DataFrame(rows)
-            df["date_time"] = pd.to_datetime(df["date_time"], utc=True).dt.tz_convert(tz)
-            df["date"] = df["date_time"].dt.date
-            df["temperature_2m"] = df["temperature_2m"].astype("float")
-            df["precipitation"] = df["precipitation"].astype("float").fillna(0.0)
+            result[city.name] = SummaryStatsView.city_summary(start, end, *stats[city.pk])
+        return result
 
-            t_arr = df["temperature_2m"].to_numpy(dtype=float)
-            t_avg = round(float(np.nanmean(t_arr)), 1)
-            t_max_row = df.iloc[int(np.nanargmax(t_arr))]
-            t_min_row = df.iloc[int(np.nanargmin(t_arr))]
-
-            def fmt_dt_no_seconds(ts: pd.Timestamp) -> str:
-                return ts.to_pydatetime().replace(second=0,
-                                                  microsecond=0
-                                                  ).strftime("%Y-%m-%dT%H:%M")
+    @staticmethod
+    def city_summary(start, end, temperature, precipitation) -> dict:
+        if not temperature.hours:
+            return {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "temperature_average": None,
+                "precipitation_total": 0.0,
+                "days_with_precipitation": 0,
+                "precipitation_max": None,
+                "temperature_max": None,
+                "temperature_min": None,
+            }
 
+        if temperature.average is not None:
             temperature_max = {
-                "date": fmt_dt_no_seconds(t_max_row["date_time"]),
-                "value": round(float(t_max_row["temperature_2m"]), 1),
+                "date": fmt_dt_no_seconds(temperature.max.date_time),
+                "value": round(temperature.max.value, 1),
             }
             temperature_min = {
-                "date": fmt_dt_no_seconds(t_min_row["date_time"]),
-                "value": round(float(t_min_row["temperature_2m"]), 1),
+                "date": fmt_dt_no_seconds(temperature.min.date_time),
+                "value": round(temperature.min.value, 1),
             }
+        else:
+            temperature_max = temperature_min = None
+
+        if precipitation.max_day is not None:
+            p_max_date, p_max_value = precipitation.max_day
+            precipitation_max = {"date": p_max_date.isoformat(),
+                                 "value": round(p_max_value, 1)}
+        else:
+            precipitation_max = None
+
+        return {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "temperature_average": round(temperature.average, 1) if temperature.average is not None else None,
+            "precipitation_total": round(precipitation.total, 1),
+            "days_with_precipitation": precipitation.days_with_precipitation,
+            "precipitation_max": precipitation_max,
+            "temperature_max": temperature_max,
+            "temperature_min": temperature_min,
+        }
+
 
-            daily_prec = df.groupby("date")["precipitation"].sum()
-            dp_arr = daily_prec.to_numpy(dtype=float)
-            precipitation_total = round(float(np.nansum(dp_arr)), 1)
-            days_with_prec = int(np.sum(dp_arr > 0))
-            if len(daily_prec):
-                p_max_date = daily_prec.idxmax()
-                p_max_value = round(float(daily_prec.loc[p_max_date]), 1)
-                precipitation_max = {"date": p_max_date.isoformat(),
-                                     "value": p_max_value}
+class RegionSummaryView(APIView):
+    """Summary of the cities in a bounding box, within a radius of a point, or nearest to it."""
+
+    def get(self, request):
+        region_query_serializer = RegionQuerySerializer(data=request.query_params)
+        region_query_serializer.is_valid(raise_exception=True)
+        data = region_query_serializer.validated_data
+        tz = zone(data["timezone"])
+
+        with phase("spatial"):
+            index = city_index()
+            if "bbox" in data:
+                matches = index.within_bbox(*data["bbox"])
+            elif "nearest" in data:
+                matches = index.nearest(data["lat"], data["lon"], data["nearest"])
             else:
-                precipitation_max = None
+                matches = index.within_radius(data["lat"], data["lon"], data["radius_km"])
+        truncated = len(matches) > data["limit"]
+        matches = matches[:data["limit"]]
+        by_pk = City.objects.in_bulk([m.pk for m in matches])
+        found = [(by_pk[m.pk], m.distance_km) for m in matches if m.pk in by_pk]
+
+        return cached_response(
+            request, "region", {**data, "pks": [city.pk for city, _ in found]}, [city for city, _ in found],
+            lambda: self.payload(found, data["start"], data["end"], tz, truncated),
+        )
 
-            result[city.name] = {
-                "start_date": start.isoformat(),
-                "end_date": end.isoformat(),
-                "temperature_average": t_avg,
-                "precipitation_total": precipitation_total,
-                "days_with_precipitation": days_with_prec,
-                "precipitation_max": precipitation_max,
-                "temperature_max": temperature_max,
-                "temperature_min": temperature_min,
+    @staticmethod
+    def payload(found, start, end, tz, truncated) -> dict:
+        cities = {city.pk: city for city, _ in found}
+        labels = city_labels(list(cities.values()))
+        stats = summary_stats(list(cities.values()), start, end, tz)
+        region = region_stats(stats)
+
+        def extreme(item):
+            if item is None:
+                return None
+            pk, ext = item
+            return {"city": labels[pk], "date": fmt_dt_no_seconds(ext.date_time), "value": round(ext.value, 1)}
+
+        return {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "timezone": tz.key,
+            "truncated": truncated,
+            "cities": [
+                {
+                    "name": city.name,
+                    "country": city.country,
+                    "latitude": city.latitude,
+                    "longitude": city.longitude,
+                    "distance_km": round(distance, 1) if distance is not None else None,
+                }
+                for city, distance in found
+            ],
+            "region": {
+                "cities": region.cities,
+                "temperature_average": round(region.average, 1) if region.average is not None else None,
+                "temperature_max": extreme(region.max),
+                "temperature_min": extreme(region.min),
+                "precipitation_total_mean": (round(region.precipitation_mean, 1)
+                                             if region.precipitation_mean is not None else None),
+                "precipitation_total_max": ({"city": labels[region.precipitation_max[0]],
+                                             "value": round(region.precipitation_max[1], 1)}
+                                            if region.precipitation_max else None),
+            },
+            "summary": {labels[pk]: SummaryStatsView.city_summary(start, end, *stats[pk]) for pk in cities},
+        }
+
+
+class SeriesView(APIView):
+    def get(self, request):
+        series_query_serializer = SeriesQuerySerializer(data=request.query_params)
+        series_query_serializer.is_valid(raise_exception=True)
+        data = series_query_serializer.validated_data
+        city_name = data["city"]
+        tz = zone(data["timezone"])
+
+        city = resolve_city(city_name)
+        if city is None:
+            return Response(not_found([city_name]), status=status.HTTP_404_NOT_FOUND)
+
+        response = cached_response(
+            request, "series", data, [city],
+            lambda: self.payload(city, data, tz),
+        )
+        if response.status_code == status.HTTP_200_OK and response.data["next_cursor"]:
+            params = request.query_params.copy()
+            params["cursor"] = response.data["next_cursor"]
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+            response.data = {**response.data, "next": next_url}
+        return response
+
+    @staticmethod
+    def payload(city, data, tz) -> dict:
+        resolution = data["resolution"]
+        buckets, next_start = series_page(
+            city, data.get("cursor") or data["start"], data["end"], tz,
+            resolution, data["aggregate"], data["limit"], data["percentile"],
+        )
+
+        def label(start):
+            return iso_minutes(start) if resolution == "hour" else start.isoformat()
+
+        def value(v):
+            return round(v, 2) if v is not None else None
+
+        return {
+            "city": city.name,
+            "timezone": tz.key,
+            "resolution": resolution,
+            "aggregate": data["aggregate"],
+            "results": [
+                {
+                    "start": label(b.start),
+                    "hours": b.hours,
+                    "temperature": value(b.temperature_2m),
+                    "precipitation": value(b.precipitation),
+                }
+                for b in buckets
+            ],
+            "next_cursor": next_start.isoformat() if next_start else None,
+            "next": None,
+        }
+
+
+class ExportView(APIView):
+    def get(self, request):
+        export_query_serializer = ExportQuerySerializer(data=request.query_params)
+        export_query_serializer.is_valid(raise_exception=True)
+        data = export_query_serializer.validated_data
+        tz = zone(data["timezone"])
+        fmt = data["output"]
+
+        names = city_names(data)
+        cities = cities_by_name(names)
+        missing = [name for name in names if name_key(name) not in cities]
+        if missing:
+            return Response(not_found(missing), status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            chunks = export_chunks(cities.values(), *utc_range(data["start"], data["end"], tz), fmt)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+        filename = f"hourly_{data['start'].isoformat()}_{data['end'].isoformat()}.{EXTENSIONS[fmt]}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class DistributionView(APIView):
+    def get(self, request):
+        distribution_query_serializer = DistributionQuerySerializer(data=request.query_params)
+        distribution_query_serializer.is_valid(raise_exception=True)
+        data = distribution_query_serializer.validated_data
+        tz = zone(data["timezone"])
+
+        names = city_names(data)
+        cities = cities_by_name(names)
+        return cached_response(
+            request, "distribution", {**data, "names": names}, list(cities.values()),
+            lambda: self.payload(names, cities, data, tz),
+        )
+
+    @staticmethod
+    def payload(names, cities, data, tz) -> dict:
+        stats = distribution_stats(list(cities.values()), data["start"], data["end"], tz,
+                                   data["base_temperature"])
+
+        def block(aggregate: DistributionAggregate) -> dict:
+            def value(v):
+                return round(v, 2) if v is not None else None
+
+            return {
+                "days": aggregate.days,
+                "temperature_hours": aggregate.temperature.count,
+                "temperature_percentiles": {
+                    f"p{p:g}": value(aggregate.temperature.quantile(p / 100.0)) for p in data["percentiles"]
+                },
+                "precipitation_histogram": [
+                    {"from": lo, "to": hi, "hours": n} for lo, hi, n in aggregate.precipitation.bins()
+                ],
+                "heating_degree_days": round(aggregate.heating_degree_days, 1),
+                "cooling_degree_days": round(aggregate.cooling_degree_days, 1),
             }
 
-        return Response(result)
+        result = {}
+        for name in names:
+            city = cities.get(name_key(name))
+            result[city.name if city else name] = (block(stats[city.pk]) if city
+                                                   else missing_city(name))
+        return {
+            "start_date": data["start"].isoformat(),
+            "end_date": data["end"].isoformat(),
+            "timezone": tz.key,
+            "base_temperature": data["base_temperature"],
+            "cities": result,
+            "combined": block(DistributionAggregate.merge(list(stats.values()))),
+        }
+
+
+class AnomalyView(APIView):
+    """
+    How the requested window compares with the city's climate normals
+    (precomputed by the ``compute_normals`` command for the same zone).
+    """
+
+    def get(self, request):
+        anomaly_query_serializer = AnomalyQuerySerializer(data=request.query_params)
+        anomaly_query_serializer.is_valid(raise_exception=True)
+        data = anomaly_query_serializer.validated_data
+        tz = zone(data["timezone"])
+
+        names = city_names(data)
+        cities = cities_by_name(names)
+        normals = {row.city_id: row
+                   for row in ClimateNormal.objects.filter(city__in=cities.values(), timezone=tz.key)}
+        computed = sorted((pk, row.computed_at.isoformat()) for pk, row in normals.items())
+        return cached_response(
+            request, "anomaly", {**data, "names": names, "normals": computed}, list(cities.values()),
+            lambda: self.payload(names, cities, normals, data["start"], data["end"], tz),
+        )
+
+    @staticmethod
+    def payload(names, cities, normals, start, end, tz) -> dict:
+        stats = anomaly_stats(list(cities.values()), normals, start, end, tz)
+
+        def value(v, digits=1):
+            return round(v, digits) if v is not None else None
+
+        def block(city, anomaly: Anomaly) -> dict:
+            row = normals[city.pk]
+            return {
+                "normals": {"first_year": row.first_year, "last_year": row.last_year, "years": row.years},
+                "temperature": {
+                    "hours": anomaly.hours,
+                    "observed_mean": value(anomaly.observed_mean),
+                    "normal_mean": value(anomaly.normal_mean),
+                    "anomaly": value(anomaly.temperature),
+                    "anomaly_by_day": {d.isoformat(): value(v) for d, v in anomaly.by_day.items()},
+                },
+                "precipitation": {
+                    "days": anomaly.precipitation_days,
+                    "observed_total": value(anomaly.observed_precipitation),
+                    "normal_total": value(anomaly.normal_precipitation),
+                    "anomaly": value(anomaly.precipitation),
+                },
+            }
+
+        result = {}
+        for name in names:
+            city = cities.get(name_key(name))
+            if city is None:
+                result[name] = missing_city(name)
+            elif city.pk not in stats:
+                result[city.name] = {"info": f"No climate normals for {city.name} in {tz.key}; "
+                                             "run the compute_normals command."}
+            else:
+                result[city.name] = block(city, stats[city.pk])
+        return {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "timezone": tz.key,
+            "cities": result,
+        }
+
+
+class AsyncSummaryStatsView(View):
+    """
+    ASGI variant of :class:`SummaryStatsView`. The cities are split into at
+    most ``SUMMARY_CONCURRENCY`` groups whose aggregates run concurrently,
+    each in a ``sync_to_async`` thread with its own connection. There are
+    no single-city async views: the aggregation is synchronous ORM code, so
+    they would only move the same work to a worker thread.
+    """
+
+    async def get(self, request):
+        serializer = SummaryQuerySerializer(data=request.GET)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        start, end = data["start"], data["end"]
+        tz = zone(data["timezone"])
+        names = city_names(data)
+        cities = await sync_to_async(cities_by_name)(names)
+
+        async def compute():
+            stats = await asummary_stats(list(cities.values()), start, end, tz)
+            return SummaryStatsView.render(names, cities, start, end, stats)
+
+        return await acached_response(request, "summary", {**data, "names": names},
+                                      list(cities.values()), compute)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the request metrics of this process."""
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
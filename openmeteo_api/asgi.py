@@ -0,0 +1,11 @@
+"""
+ASGI entry point, e.g. ``uvicorn openmeteo_api.asgi:application``.
+The ``/api/async/`` views run natively on the event loop here.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openmeteo_api.settings")
+
+application = get_asgi_application()
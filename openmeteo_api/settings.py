@@ -22,9 +22,44 @@ OPEN_METEO_ARCHIVE_URL = os.getenv(
     "OPEN_METEO_ARCHIVE_URL",
     "https://archive-api.open-meteo.com/v1/archive",
 )
+OPEN_METEO_CONNECT_TIMEOUT = float(os.getenv("OPEN_METEO_CONNECT_TIMEOUT", "5"))
+OPEN_METEO_READ_TIMEOUT = float(os.getenv("OPEN_METEO_READ_TIMEOUT", "60"))
+OPEN_METEO_POOL_SIZE = int(os.getenv("OPEN_METEO_POOL_SIZE", "10"))
+OPEN_METEO_GEOCODE_CACHE_SIZE = int(os.getenv("OPEN_METEO_GEOCODE_CACHE_SIZE", "1024"))
+OPEN_METEO_BATCH_SIZE = int(os.getenv("OPEN_METEO_BATCH_SIZE", "50"))
 DEFAULT_TZ = os.getenv("DEFAULT_TZ", TIME_ZONE)
 DEFAULT_TEMP_THRESHOLD_HIGH = float(os.getenv("DEFAULT_TEMP_THRESHOLD_HIGH", "30.0"))
 DEFAULT_TEMP_THRESHOLD_LOW = float(os.getenv("DEFAULT_TEMP_THRESHOLD_LOW", "0.0"))
+DEFAULT_DEGREE_DAY_BASE = float(os.getenv("DEFAULT_DEGREE_DAY_BASE", "18.0"))
+DEFAULT_PERCENTILES = os.getenv("DEFAULT_PERCENTILES", "5,50,95")
+SERIES_PAGE_SIZE = int(os.getenv("SERIES_PAGE_SIZE", "1000"))
+SERIES_MAX_PAGE_SIZE = int(os.getenv("SERIES_MAX_PAGE_SIZE", "5000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "20000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+REGION_MAX_CITIES = int(os.getenv("REGION_MAX_CITIES", "200"))
+METRICS_LATENCY_BUCKETS = [
+    float(b) for b in os.getenv(
+        "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+    ).split(",")
+]
+ROLLUP_TIMEZONES = [
+    tz.strip() for tz in os.getenv("ROLLUP_TIMEZONES", DEFAULT_TZ).split(",") if tz.strip()
+]
+COMPACT_STORAGE = os.getenv("COMPACT_STORAGE", "0") == "1"
+HOT_CACHE_DIR = os.getenv("HOT_CACHE_DIR", "")
+HOT_CACHE_DAYS = int(os.getenv("HOT_CACHE_DAYS", "90"))
+STATS_CACHE_ALIAS = "stats"
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    STATS_CACHE_ALIAS: {
+        "BACKEND": os.getenv("STATS_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("STATS_CACHE_LOCATION", "meteo-stats"),
+        "TIMEOUT": int(os.getenv("STATS_CACHE_TTL", "300")),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("STATS_CACHE_MAX_ENTRIES", "1000"))},
+    },
+}
 
 SECRET_KEY = "dev-only-change-me"
 DEBUG = True
@@ -41,6 +76,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "meteo.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -51,3 +87,5 @@ MIDDLEWARE = [
 ]
 STATIC_URL = "/static/"
 ROOT_URLCONF = "openmeteo_api.urls"
+WSGI_APPLICATION = "openmeteo_api.wsgi.application"
+ASGI_APPLICATION = "openmeteo_api.asgi.application"
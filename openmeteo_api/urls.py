@@ -2,7 +2,14 @@ from django.urls import path
 from meteo.views import (
     TemperatureStatsView,
     PrecipitationStatsView,
-    SummaryStatsView
+    SummaryStatsView,
+    RegionSummaryView,
+    SeriesView,
+    ExportView,
+    DistributionView,
+    AnomalyView,
+    AsyncSummaryStatsView,
+    metrics_view
 )
 
 urlpatterns = [
@@ -21,4 +28,35 @@ urlpatterns = [
         SummaryStatsView.as_view(),
         name="summary-stats"
     ),
+    path(
+        "api/region/",
+        RegionSummaryView.as_view(),
+        name="region-summary"
+    ),
+    path(
+        "api/series/",
+        SeriesView.as_view(),
+        name="series"
+    ),
+    path(
+        "api/export/",
+        ExportView.as_view(),
+        name="export"
+    ),
+    path(
+        "api/distribution/",
+        DistributionView.as_view(),
+        name="distribution"
+    ),
+    path(
+        "api/anomaly/",
+        AnomalyView.as_view(),
+        name="anomaly"
+    ),
+    path(
+        "api/async/summary/",
+        AsyncSummaryStatsView.as_view(),
+        name="async-summary-stats"
+    ),
+    path("metrics", metrics_view, name="metrics"),
 ]
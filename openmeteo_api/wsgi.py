@@ -0,0 +1,8 @@
+"""WSGI entry point, e.g. ``gunicorn openmeteo_api.wsgi:application``."""
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openmeteo_api.settings")
+
+application = get_wsgi_application()
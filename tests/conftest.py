@@ -2,9 +2,28 @@ import datetime as dt
 import pytest
 from django.utils.timezone import make_aware
 from django.conf import settings
+from django.db import connection
+from zoneinfo import ZoneInfo
 from meteo.models import City, HourlyWeather
+from meteo.services.cache import stats_cache
 
-TZ = settings.TIME_ZONE
+TZ = ZoneInfo(settings.TIME_ZONE)
+
+
+def pytest_collection_modifyitems(config, items):
+    if connection.vendor == "postgresql":
+        return
+    skip = pytest.mark.skip(reason="needs the PostgreSQL backend")
+    for item in items:
+        if "postgresql" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def clear_stats_cache():
+    stats_cache().clear()
+    yield
+    stats_cache().clear()
 
 
 @pytest.fixture
@@ -0,0 +1,98 @@
+"""Minimal local stand-in for the Open-Meteo archive and geocoding APIs."""
+import json
+import threading
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def hourly_payload(start: str, end: str, latitude: float = 0.0, unixtime: bool = False) -> dict:
+    """Synthetic archive body; local times are treated as UTC when ``unixtime`` is requested."""
+    first = datetime.combine(date.fromisoformat(start), datetime.min.time())
+    hours = ((date.fromisoformat(end) - date.fromisoformat(start)).days + 1) * 24
+    times = [first + timedelta(hours=h) for h in range(hours)]
+    return {
+        "latitude": latitude,
+        "hourly_units": {"time": "unixtime" if unixtime else "iso8601", "temperature_2m": "°C"},
+        "hourly": {
+            "time": [int(t.replace(tzinfo=timezone.utc).timestamp()) if unixtime else t.strftime("%Y-%m-%dT%H:%M")
+                     for t in times],
+            "temperature_2m": [round(10 + latitude / 10 + (t.hour % 12), 1) for t in times],
+            "precipitation": [0.5 if t.hour == 6 else 0.0 for t in times],
+        },
+    }
+
+
+class StubOpenMeteo:
+    """
+    Threaded HTTP server answering ``/v1/archive`` with a synthetic series
+    and ``/v1/search`` with a single geocoding hit. ``failures`` maps an
+    archive ``start_date`` to the number of 503 answers to give before
+    succeeding.
+    """
+
+    def __init__(self, failures: dict[str, int] | None = None):
+        self.failures = dict(failures or {})
+        self.requests: list[dict] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                with stub._lock:
+                    stub.requests.append({"path": url.path, **params})
+                    remaining = stub.failures.get(params.get("start_date"), 0)
+                    if remaining:
+                        stub.failures[params["start_date"]] = remaining - 1
+                if remaining:
+                    return self.reply(503, {"error": True, "reason": "try again"})
+                if url.path.endswith("/search"):
+                    return self.reply(200, {"results": [{
+                        "name": params.get("name", ""), "country": "Stubland",
+                        "latitude": 40.0, "longitude": -3.0,
+                    }]})
+                return self.reply(200, stub.archive(params))
+
+            def reply(self, code, body):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def archive(self, params: dict) -> dict | list[dict]:
+        """One payload, or a list of them when several comma separated latitudes are given."""
+        payloads = [hourly_payload(params["start_date"], params["end_date"], float(lat),
+                                   unixtime=params.get("timeformat") == "unixtime")
+                    for lat in str(params.get("latitude", "0")).split(",")]
+        return payloads[0] if len(payloads) == 1 else payloads
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def archive_url(self) -> str:
+        return f"{self.base_url}/v1/archive"
+
+    @property
+    def geocode_url(self) -> str:
+        return f"{self.base_url}/v1/search"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
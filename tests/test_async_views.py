@@ -0,0 +1,43 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from meteo.models import City, HourlyWeather
+from tests.conftest import aware
+
+QUERIES = [
+    "summary/?cities=Madrid,Sevilla,Bilbao,Nowhere&start=2024-07-01&end=2024-07-03",
+    "summary/?city=madrid&start=2024-07-01&end=2024-07-03",
+]
+
+
+def async_get(url, **headers):
+    return async_to_sync(AsyncClient().get)(url, headers=headers)
+
+
+@pytest.fixture
+def three_cities(transactional_db, sample_hours_madrid):
+    for i, name in enumerate(["Sevilla", "Bilbao"]):
+        city = City.objects.create(name=name, country="Spain", latitude=37.0 + i, longitude=-5.0)
+        HourlyWeather.objects.create(city=city, date_time=aware(2024, 7, 2, 12), temperature_2m=25.0 + i,
+                                     precipitation=0.5 * i)
+
+
+@pytest.mark.parametrize("concurrency", [1, 2])
+def test_async_views_match_sync_payloads(three_cities, settings, concurrency):
+    settings.SUMMARY_CONCURRENCY = concurrency
+    for query in QUERIES:
+        expected = APIClient().get(f"/api/{query}")
+        response = async_get(f"/api/async/{query}")
+        assert response.status_code == 200
+        assert response.json() == expected.json()
+        assert response["ETag"] == expected["ETag"]
+
+
+def test_async_views_errors_and_conditional_requests(sample_hours_madrid):
+    assert async_get("/api/async/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03").status_code == 404
+    assert async_get("/api/async/summary/?start=2024-07-01&end=2024-07-03").status_code == 400
+
+    url = "/api/async/" + QUERIES[1]
+    etag = async_get(url)["ETag"]
+    assert async_get(url, if_none_match=etag).status_code == 304
@@ -0,0 +1,56 @@
+import datetime as dt
+from django.core.management import call_command
+from meteo.models import City, DailyWeather, HourlyWeather
+from meteo.services.backfill import split_range
+from tests.stub_server import StubOpenMeteo
+
+
+def test_split_range_by_month_and_year():
+    assert split_range(dt.date(2024, 1, 20), dt.date(2024, 3, 5), "month") == [
+        (dt.date(2024, 1, 20), dt.date(2024, 1, 31)),
+        (dt.date(2024, 2, 1), dt.date(2024, 2, 29)),
+        (dt.date(2024, 3, 1), dt.date(2024, 3, 5)),
+    ]
+    assert split_range(dt.date(2023, 12, 31), dt.date(2024, 1, 1), "year") == [
+        (dt.date(2023, 12, 31), dt.date(2023, 12, 31)),
+        (dt.date(2024, 1, 1), dt.date(2024, 1, 1)),
+    ]
+
+
+def test_backfill_chunks_in_parallel_with_retries(monkeypatch, transactional_db, settings, tmp_path):
+    settings.DEFAULT_TZ = "UTC"
+    settings.ROLLUP_TIMEZONES = ["UTC"]
+    cities_file = tmp_path / "cities.txt"
+    cities_file.write_text("# backfill\nMadrid\nSevilla\n")
+
+    from meteo.services import open_meteo as svc
+    with StubOpenMeteo(failures={"2024-02-01": 2}) as stub:
+        monkeypatch.setattr(svc, "ARCHIVE_URL", stub.archive_url)
+        monkeypatch.setattr(svc, "GEOCODE_URL", stub.geocode_url)
+        call_command("load_weather", cities_file=str(cities_file), start="2024-01-30", end="2024-03-02",
+                     chunk="month", workers=3, backoff=0.01, batch_size=1)
+
+    archive_calls = [r for r in stub.requests if r["path"] == "/v1/archive"]
+    assert len(archive_calls) == 2 * 3 + 2
+    assert set(City.objects.values_list("name", flat=True)) == {"Madrid", "Sevilla"}
+    for city in City.objects.all():
+        assert HourlyWeather.objects.filter(city=city).count() == 33 * 24
+        assert DailyWeather.objects.filter(city=city).count() == 33
+
+
+def test_backfill_batches_cities_per_chunk(monkeypatch, transactional_db, settings):
+    settings.DEFAULT_TZ = "UTC"
+    settings.ROLLUP_TIMEZONES = ["UTC"]
+
+    from meteo.services import open_meteo as svc
+    with StubOpenMeteo(failures={"2024-02-01": 1}) as stub:
+        monkeypatch.setattr(svc, "ARCHIVE_URL", stub.archive_url)
+        monkeypatch.setattr(svc, "GEOCODE_URL", stub.geocode_url)
+        call_command("load_weather", cities="Madrid,Sevilla,Bilbao", start="2024-01-30", end="2024-03-02",
+                     chunk="month", workers=2, backoff=0.01, batch_size=2)
+
+    archive_calls = [r for r in stub.requests if r["path"] == "/v1/archive"]
+    assert len(archive_calls) == 3 * 2 + 1
+    assert sorted(len(r["latitude"].split(",")) for r in archive_calls if r["start_date"] == "2024-01-30") == [1, 2]
+    for city in City.objects.all():
+        assert HourlyWeather.objects.filter(city=city).count() == 33 * 24
@@ -0,0 +1,33 @@
+from rest_framework.test import APIClient
+from meteo.models import City
+from meteo.services.cities import cities_by_name, suggest
+from meteo.services.names import name_key
+
+
+def test_name_key_folds_case_accents_and_spaces():
+    assert name_key("  MÁLAGA ") == "malaga"
+    assert name_key("São  Paulo") == "sao paulo"
+    assert name_key("Zürich") == name_key("zurich")
+
+
+def test_all_views_resolve_normalized_names(sample_hours_madrid):
+    City.objects.create(name="Málaga", country="Spain", latitude=36.72, longitude=-4.42)
+    client = APIClient()
+    for url in ("/api/temperature/?city=MADRID&start=2024-07-01&end=2024-07-03",
+                "/api/precipitation/?city=madrid&start=2024-07-01&end=2024-07-03",
+                "/api/summary/?cities=Madrid,malaga&start=2024-07-01&end=2024-07-03"):
+        assert client.get(url).status_code == 200
+    assert set(cities_by_name(["MALAGA", "madrid"])) == {"malaga", "madrid"}
+
+    response = client.get("/api/temperature/?city=Madird&start=2024-07-01&end=2024-07-03")
+    assert response.status_code == 404
+    assert response.json()["suggestions"] == {"Madird": ["Madrid"]}
+
+
+def test_suggestions_pick_up_new_cities(db):
+    City.objects.bulk_create([City(name=f"Town {i}", name_key=f"town {i}", latitude=0, longitude=0)
+                              for i in range(20000)])
+    City.objects.create(name="Valladolid", country="Spain", latitude=41.65, longitude=-4.72)
+    assert suggest("Valladollid") == ["Valladolid"]
+    City.objects.create(name="Villalba", country="Spain", latitude=40.63, longitude=-4.0)
+    assert suggest("Vilalba") == ["Villalba"]
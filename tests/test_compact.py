@@ -0,0 +1,116 @@
+import datetime as dt
+import numpy as np
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from meteo.models import City, DailyWeather, HourlyWeather, PackedHourlyWeather
+from meteo.services.aggregation import summary_stats
+from meteo.services.compact import decode, encode
+from meteo.services.ingest import missing_ranges
+from meteo.services.planner import planned_periods
+from meteo.services.rollup import refresh_daily
+from meteo.services.timebuckets import zone
+
+URLS = [
+    "/api/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03&threshold=30&threshold_low=15",
+    "/api/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03&timezone=America/New_York",
+    "/api/precipitation/?city=Madrid&start=2024-07-01&end=2024-07-03",
+    "/api/summary/?city=Madrid&start=2024-07-01&end=2024-07-03",
+]
+
+
+def test_encode_decode_round_trip():
+    values = np.array([-12.3, 0.0, 33.4, np.nan, 1.25])
+    decoded = decode(encode(values))
+    assert np.isnan(decoded[3])
+    assert decoded[[0, 1, 2]].tolist() == [-12.3, 0.0, 33.4]
+    assert round(abs(decoded[4] - 1.25), 6) <= 0.05
+
+
+def test_compacted_months_serve_identical_payloads(sample_hours_madrid, settings):
+    client = APIClient()
+    raw = [client.get(url).json() for url in URLS]
+
+    settings.COMPACT_STORAGE = True
+    updated_at = sample_hours_madrid.data_updated_at
+    call_command("compact_hourly", city="Madrid", before="2024-08-01", drop_hourly=True)
+    assert not HourlyWeather.objects.filter(city=sample_hours_madrid).exists()
+    assert PackedHourlyWeather.objects.filter(city=sample_hours_madrid).count() == 2
+    sample_hours_madrid.refresh_from_db()
+    assert sample_hours_madrid.data_updated_at != updated_at
+
+    assert [client.get(url).json() for url in URLS] == raw
+
+
+def test_drop_hourly_requires_compact_storage(sample_hours_madrid, settings):
+    settings.COMPACT_STORAGE = False
+    with pytest.raises(CommandError):
+        call_command("compact_hourly", city="Madrid", before="2024-08-01", drop_hourly=True)
+    assert HourlyWeather.objects.filter(city=sample_hours_madrid).count() == 4
+
+
+def test_raw_rows_override_packed_hours(sample_hours_madrid, settings):
+    settings.COMPACT_STORAGE = True
+    call_command("compact_hourly", city="Madrid", before="2024-08-01", drop_hourly=True)
+    HourlyWeather.objects.create(city=sample_hours_madrid,
+                                 date_time=dt.datetime(2024, 7, 3, 15, tzinfo=dt.timezone.utc),
+                                 temperature_2m=35.0, precipitation=0.0)
+
+    payload = APIClient().get(URLS[0]).json()["temperature"]
+    assert payload["max"] == {"value": 35.0, "date_time": "2024-07-03T17:00:00+02:00"}
+    assert missing_ranges(sample_hours_madrid, dt.date(2024, 7, 2), dt.date(2024, 7, 2)) == [
+        (dt.date(2024, 7, 2), dt.date(2024, 7, 2))
+    ]
+
+
+def test_compact_summary_reads_all_cities_in_fixed_queries(sample_hours_madrid, settings):
+    cities = [sample_hours_madrid]
+    for name in ("Toledo", "Segovia"):
+        city = City.objects.create(name=name, country="Spain", latitude=40.0, longitude=-4.0)
+        HourlyWeather.objects.bulk_create(
+            HourlyWeather(city=city, date_time=hour.date_time, temperature_2m=hour.temperature_2m - 2,
+                          precipitation=hour.precipitation)
+            for hour in HourlyWeather.objects.filter(city=sample_hours_madrid))
+        cities.append(city)
+    tz = zone("Europe/Madrid")
+    args = (dt.date(2024, 7, 1), dt.date(2024, 7, 3), tz)
+    raw = summary_stats(cities, *args)
+
+    settings.COMPACT_STORAGE = True
+    call_command("compact_hourly", all=True, before="2024-08-01", drop_hourly=True)
+    with CaptureQueriesContext(connection) as one:
+        summary_stats(cities[:1], *args)
+    with CaptureQueriesContext(connection) as many:
+        compact = summary_stats(cities, *args)
+    assert len(many) == len(one)
+    assert {pk: (t.average, t.max, p.total) for pk, (t, p) in compact.items()} == {
+        pk: (t.average, t.max, p.total) for pk, (t, p) in raw.items()}
+
+
+def test_planner_fills_rollup_gaps_from_packed_months(sample_hours_madrid, settings):
+    refresh_daily(sample_hours_madrid, dt.datetime(2024, 7, 1, tzinfo=dt.timezone.utc),
+                  dt.datetime(2024, 7, 4, tzinfo=dt.timezone.utc), ["Europe/Madrid"])
+    DailyWeather.objects.filter(city=sample_hours_madrid, date__gte=dt.date(2024, 7, 2)).delete()
+    settings.COMPACT_STORAGE = True
+    call_command("compact_hourly", city="Madrid", before="2024-08-01", drop_hourly=True)
+
+    periods = planned_periods([sample_hours_madrid], dt.date(2024, 7, 1), dt.date(2024, 7, 3),
+                              zone("Europe/Madrid"), months=False)[sample_hours_madrid.pk]
+    assert [(d.date.day, d.hours) for d in periods.days] == [(1, 2), (2, 1), (3, 1)]
+
+
+def test_single_city_stats_prefer_rollups_over_packed_months(sample_hours_madrid, settings):
+    refresh_daily(sample_hours_madrid, dt.datetime(2024, 7, 1, tzinfo=dt.timezone.utc),
+                  dt.datetime(2024, 7, 4, tzinfo=dt.timezone.utc), ["Europe/Madrid"])
+    client = APIClient()
+    urls = URLS[:1] + URLS[2:] + ["/api/distribution/?cities=Madrid&start=2024-07-01&end=2024-07-03"]
+    raw = [client.get(url).json() for url in urls]
+    assert raw[-1]["cities"]["Madrid"]["temperature_percentiles"]
+
+    settings.COMPACT_STORAGE = True
+    call_command("compact_hourly", city="Madrid", before="2024-08-01", drop_hourly=True)
+    with CaptureQueriesContext(connection) as queries:
+        assert [client.get(url).json() for url in urls] == raw
+    assert not any(PackedHourlyWeather._meta.db_table in q["sql"] for q in queries)
@@ -0,0 +1,48 @@
+import datetime as dt
+import numpy as np
+from rest_framework.test import APIClient
+from meteo.models import DailyWeather
+from meteo.services.cache import stats_cache
+from meteo.services.rollup import refresh_daily
+from meteo.services.sketches import PrecipitationHistogram, TemperatureSketch
+
+URL = "/api/distribution/?cities=Madrid,Nowhere&start=2024-07-01&end=2024-07-03&percentiles=5,50,95"
+
+
+def test_merged_sketches_give_exact_quantiles():
+    rng = np.random.default_rng(7)
+    values = np.round(rng.normal(15, 8, 5000), 1)
+    values[::97] = np.nan
+    parts = [TemperatureSketch.from_bytes(TemperatureSketch.from_values(chunk).to_bytes())
+             for chunk in np.array_split(values, 37)]
+    merged = TemperatureSketch.merge(parts)
+    assert merged.count == int((~np.isnan(values)).sum())
+    for q in (0.0, 0.05, 0.5, 0.95, 1.0):
+        assert round(merged.quantile(q), 6) == round(float(np.nanquantile(values, q)), 6)
+
+    histogram = PrecipitationHistogram.merge([PrecipitationHistogram.from_values(np.array([0.0, 0.3, np.nan])),
+                                              PrecipitationHistogram.from_values(np.array([25.0, 0.1]))])
+    assert [n for _, _, n in histogram.bins()] == [1, 2, 0, 0, 0, 0, 0, 1]
+
+
+def test_distribution_from_rollup_matches_raw_hours(sample_hours_madrid):
+    client = APIClient()
+    raw = client.get(URL).json()
+    madrid = raw["cities"]["Madrid"]
+    assert madrid["temperature_percentiles"]["p50"] == 24.0
+    assert (madrid["heating_degree_days"], madrid["cooling_degree_days"]) == (3.5, 21.4)
+    assert [b["hours"] for b in madrid["precipitation_histogram"]] == [1, 1, 0, 1, 1, 0, 0, 0]
+    assert raw["cities"]["Nowhere"] == {"info": "City not found: Nowhere"}
+    assert raw["combined"] == madrid
+
+    refresh_daily(sample_hours_madrid,
+                  dt.datetime(2024, 6, 30, 22, tzinfo=dt.timezone.utc),
+                  dt.datetime(2024, 7, 3, 15, tzinfo=dt.timezone.utc))
+    stats_cache().clear()
+    assert client.get(URL + "&base_temperature=18").json() == raw
+
+    # Days without a rollup row are filled from their raw hours.
+    DailyWeather.objects.filter(city=sample_hours_madrid, date__gte=dt.date(2024, 7, 2)).delete()
+    stats_cache().clear()
+    assert client.get(URL).json() == raw
+    assert client.get(URL.replace("percentiles=5,50,95", "percentiles=101")).status_code == 400
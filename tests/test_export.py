@@ -0,0 +1,87 @@
+import datetime as dt
+import numpy as np
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from meteo.models import HourlyWeather
+from meteo.services.export import _copy_csv, _csv_chunks, _csv_values, batches
+
+EXPECTED_CSV = (
+    "city,date_time,temperature_2m,precipitation\n"
+    "Madrid,2024-06-30T22:00:00Z,18.0,0.2\n"
+    "Madrid,2024-07-01T13:00:00Z,30.0,1.3\n"
+    "Madrid,2024-07-02T05:00:00Z,14.5,0.0\n"
+    "Madrid,2024-07-03T15:00:00Z,33.4,3.7\n"
+)
+
+
+def test_export_streams_csv_in_chunks(sample_hours_madrid, settings):
+    settings.EXPORT_CHUNK_SIZE = 3
+    response = APIClient().get("/api/export/?city=madrid&start=2024-07-01&end=2024-07-03")
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    assert b"".join(response.streaming_content).decode() == EXPECTED_CSV
+
+    start, end = dt.datetime(2024, 6, 30, tzinfo=dt.timezone.utc), dt.datetime(2024, 7, 4, tzinfo=dt.timezone.utc)
+    chunks = list(_csv_chunks(batches([sample_hours_madrid], start, end, chunk_size=3)))
+    assert len(chunks) == 2
+    assert b"".join(chunks).decode() == EXPECTED_CSV
+
+
+# Edge values and their PostgreSQL ``double precision`` text (``.0`` added on whole numbers).
+EDGE_VALUES = {
+    -0.0: "-0.0",
+    0.1: "0.1",
+    123456.789: "123456.789",
+    1e15: "1e+15",
+    1e15 + 0.5: "1.0000000000000005e+15",
+    -9.5e15: "-9.5e+15",
+    1e16: "1e+16",
+    123456789012345678.0: "1.2345678901234568e+17",
+    1e-4: "0.0001",
+    1.5e-5: "1.5e-05",
+    float("inf"): "Infinity",
+}
+
+
+def test_csv_floats_use_the_postgresql_text_format():
+    values = np.array([*EDGE_VALUES, np.nan])
+    assert _csv_values(values) == [*EDGE_VALUES.values(), ""]
+
+
+@pytest.mark.postgresql
+def test_copy_csv_matches_python_csv(sample_hours_madrid):
+    rows = [(20, -2.0, None), (21, None, 12.0)]
+    rows += [(22 + i, value, value) for i, value in enumerate(EDGE_VALUES)]
+    for hour, temperature, precipitation in rows:
+        HourlyWeather.objects.create(city=sample_hours_madrid,
+                                     date_time=dt.datetime(2024, 7, 3, tzinfo=dt.timezone.utc)
+                                     + dt.timedelta(hours=hour),
+                                     temperature_2m=temperature, precipitation=precipitation)
+    start, end = dt.datetime(2024, 6, 30, tzinfo=dt.timezone.utc), dt.datetime(2024, 7, 5, tzinfo=dt.timezone.utc)
+    copied = b"".join(_copy_csv([sample_hours_madrid], start, end)).decode()
+    assert copied == b"".join(_csv_chunks(batches([sample_hours_madrid], start, end))).decode()
+    assert "Madrid,2024-07-03T20:00:00Z,-2.0,\nMadrid,2024-07-03T21:00:00Z,,12.0\n" in copied
+    assert copied.endswith("Madrid,2024-07-04T08:00:00Z,Infinity,Infinity\n")
+
+
+def test_export_validation(sample_hours_madrid):
+    client = APIClient()
+    assert client.get("/api/export/?city=Nowhere&start=2024-07-01&end=2024-07-03").status_code == 404
+    assert client.get("/api/export/?city=Madrid&start=2024-07-01&end=2024-07-03&output=xml").status_code == 400
+
+
+def test_export_command_writes_parquet(sample_hours_madrid, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    target = tmp_path / "madrid.parquet"
+    call_command("export_hourly", city="Madrid", start="2024-07-01", end="2024-07-03",
+                 format="parquet", output=str(target), chunk_size=2)
+    table = pq.read_table(target)
+    assert table.column("temperature_2m").to_pylist() == [18.0, 30.0, 14.5, 33.4]
+
+
+def test_export_command_writes_csv(sample_hours_madrid, tmp_path):
+    target = tmp_path / "madrid.csv"
+    call_command("export_hourly", cities="Madrid", start="2024-07-01", end="2024-07-03", output=str(target))
+    assert target.read_text() == EXPECTED_CSV
@@ -0,0 +1,89 @@
+import datetime as dt
+import os
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from meteo.models import City
+from meteo.services import hotcache
+from meteo.services.aggregation import summary_stats
+from meteo.services.cache import mark_city_updated, stats_cache
+from meteo.services.ingest import UPSERT, save_hourly
+from meteo.services.timebuckets import utc_range, zone
+
+TZ = zone("Europe/Madrid")
+
+
+def rows(first, days, bump=0.0):
+    start = dt.datetime.combine(first, dt.time.min, TZ).astimezone(dt.timezone.utc)
+    return [{"date_time": start + dt.timedelta(hours=h),
+             "temperature_2m": round(12.3 + (h % 24) * 0.6 + bump, 1),
+             "precipitation": 0.4 if h % 24 == 5 else 0.0}
+            for h in range(days * 24)]
+
+
+def test_hot_cache_serves_recent_ranges(city_madrid, settings, tmp_path,
+                                        django_capture_on_commit_callbacks, django_assert_num_queries):
+    settings.HOT_CACHE_DIR = str(tmp_path)
+    today = timezone.now().astimezone(TZ).date()
+    first, last = today - dt.timedelta(days=10), today - dt.timedelta(days=3)
+    with django_capture_on_commit_callbacks(execute=True):
+        save_hourly(city_madrid, rows(first, 8))
+    assert os.path.exists(hotcache.path(city_madrid.pk))
+
+    url = f"/api/summary/?city=Madrid&start={first}&end={last}"
+    client = APIClient()
+    cached = client.get(url).json()
+    settings.HOT_CACHE_DIR = ""
+    stats_cache().clear()
+    assert client.get(url).json() == cached
+    settings.HOT_CACHE_DIR = str(tmp_path)
+
+    with django_assert_num_queries(0):
+        stats = summary_stats([city_madrid], first, last, TZ)[city_madrid.pk]
+    assert stats[0].hours == 8 * 24
+
+    # An upsert re-reads only the hours it wrote.
+    day = first + dt.timedelta(days=2)
+    with django_capture_on_commit_callbacks() as callbacks:
+        save_hourly(city_madrid, rows(day, 1, bump=5.0), mode=UPSERT)
+    with django_assert_num_queries(1):
+        callbacks[0]()
+    series = hotcache.hot_series(city_madrid, *utc_range(day, day, TZ))
+    assert series.temperature_2m.tolist() == [r["temperature_2m"] for r in rows(day, 1, bump=5.0)]
+
+    # A stale file is rebuilt on read; ranges older than the window go to the database.
+    mark_city_updated(city_madrid)
+    assert len(hotcache.hot_series(city_madrid, *utc_range(first, last, TZ))) == 8 * 24
+    assert hotcache.hot_series(city_madrid, *utc_range(today - dt.timedelta(days=400), last, TZ)) is None
+
+
+def test_batched_summaries_skip_stale_files(city_madrid, settings, tmp_path, django_capture_on_commit_callbacks):
+    settings.HOT_CACHE_DIR = str(tmp_path)
+    today = timezone.now().astimezone(TZ).date()
+    first, last = today - dt.timedelta(days=6), today - dt.timedelta(days=2)
+    toledo = City.objects.create(name="Toledo", country="Spain", latitude=39.9, longitude=-4.0)
+    with django_capture_on_commit_callbacks(execute=True):
+        save_hourly(city_madrid, rows(first, 5))
+        save_hourly(toledo, rows(first, 5, bump=1.0))
+    expected = summary_stats([city_madrid, toledo], first, last, TZ)
+
+    # A stale and a truncated file go to the database without being rebuilt.
+    mark_city_updated(city_madrid)
+    with open(hotcache.path(toledo.pk), "r+b") as f:
+        f.truncate(100)
+    toledo.refresh_from_db()
+    with CaptureQueriesContext(connection) as queries:
+        stats = summary_stats([city_madrid, toledo], first, last, TZ)
+    settings.HOT_CACHE_DIR = ""
+    with CaptureQueriesContext(connection) as database:
+        summary_stats([city_madrid, toledo], first, last, TZ)
+    settings.HOT_CACHE_DIR = str(tmp_path)
+    assert len(queries) == len(database)
+    assert os.path.getsize(hotcache.path(toledo.pk)) == 100
+    assert {pk: (t.average, p.total) for pk, (t, p) in stats.items()} == {
+        pk: (t.average, p.total) for pk, (t, p) in expected.items()}
+
+    # A single-city read rebuilds the truncated file.
+    assert len(hotcache.hot_series(toledo, *utc_range(first, last, TZ))) == 5 * 24
+    assert os.path.getsize(hotcache.path(toledo.pk)) > 100
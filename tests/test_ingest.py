@@ -0,0 +1,26 @@
+import datetime as dt
+from meteo.models import HourlyWeather
+from meteo.services.ingest import UPSERT, save_hourly
+
+UTC = dt.timezone.utc
+
+
+def rows(values):
+    return [{"date_time": dt.datetime(2024, 7, 1, h, tzinfo=UTC), "temperature_2m": t, "precipitation": 0.0}
+            for h, t in values]
+
+
+def test_save_hourly_counts_inserted_updated_and_unchanged(city_madrid):
+    first = save_hourly(city_madrid, rows([(0, 20.0), (1, 21.0)]))
+    assert (first.inserted, first.updated, first.unchanged) == (2, 0, 0)
+
+    again = save_hourly(city_madrid, rows([(0, 20.0), (1, 22.5), (2, 23.0)]))
+    assert (again.inserted, again.updated, again.unchanged) == (1, 0, 2)
+    assert HourlyWeather.objects.get(
+        city=city_madrid, date_time=dt.datetime(2024, 7, 1, 1, tzinfo=UTC)).temperature_2m == 21.0
+
+    revised = save_hourly(city_madrid, rows([(0, 20.0), (1, 22.5), (2, 23.0)]), mode=UPSERT)
+    assert (revised.inserted, revised.updated, revised.unchanged) == (0, 1, 2)
+    assert HourlyWeather.objects.get(
+        city=city_madrid, date_time=dt.datetime(2024, 7, 1, 1, tzinfo=UTC)).temperature_2m == 22.5
+    assert HourlyWeather.objects.filter(city=city_madrid).count() == 3
@@ -0,0 +1,33 @@
+import re
+from rest_framework.test import APIClient
+
+
+def server_timing(response) -> dict[str, str]:
+    return {part.split(";")[0].strip(): part for part in response["Server-Timing"].split(",")}
+
+
+def test_server_timing_reports_queries_and_phases(sample_hours_madrid, django_assert_num_queries):
+    client = APIClient()
+    response = client.get("/api/series/?city=Madrid&start=2024-07-01&end=2024-07-03")
+    timing = server_timing(response)
+    queries = int(re.search(r'desc="(\d+) queries', timing["db"]).group(1))
+    assert queries >= 2
+    assert {"compute", "tz_convert", "groupby", "total"} <= timing.keys()
+
+    with django_assert_num_queries(queries):
+        client.get("/api/series/?city=Madrid&start=2024-07-01&end=2024-07-02")
+
+
+def test_metrics_endpoint_exposes_latency_histograms(sample_hours_madrid):
+    client = APIClient()
+    client.get("/api/summary/?city=Madrid&start=2024-07-01&end=2024-07-03")
+    client.get("/api/summary/?city=Madrid&start=2024-07-01&end=2024-07-03")
+
+    response = client.get("/metrics")
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    count = re.search(r'^meteo_request_duration_seconds_count\{view="summary-stats"\} (\d+)$', body, re.M)
+    assert int(count.group(1)) >= 2
+    assert 'meteo_request_duration_seconds_bucket{view="summary-stats",le="+Inf"}' in body
+    assert re.search(r'^meteo_queries_total\{view="summary-stats"\} [1-9]', body, re.M)
+    assert 'meteo_requests_total{view="summary-stats",status="200"}' in body
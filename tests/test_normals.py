@@ -0,0 +1,62 @@
+import datetime as dt
+import numpy as np
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from meteo.models import ClimateNormal, HourlyWeather
+from meteo.services.normals import day_of_year
+from meteo.services.timebuckets import zone
+
+TZ = zone("Europe/Madrid")
+URL = "/api/anomaly/?cities=Madrid,Nowhere&start=2024-02-28&end=2024-03-01"
+
+
+def hours(city, first, last, warming):
+    """Hourly rows whose temperature depends only on the local hour, plus ``warming``."""
+    rows, t = [], dt.datetime.combine(first, dt.time.min, TZ).astimezone(dt.timezone.utc)
+    end = dt.datetime.combine(last, dt.time.max, TZ)
+    while t <= end:
+        local = t.astimezone(TZ)
+        rows.append(HourlyWeather(city=city, date_time=t, temperature_2m=10 + local.hour / 2 + warming,
+                                  precipitation=0.1 * (1 + warming) if local.hour == 6 else 0.0))
+        t += dt.timedelta(hours=1)
+    HourlyWeather.objects.bulk_create(rows)
+
+
+def test_day_of_year_counts_february_29_every_year():
+    days = np.array(["2023-01-01", "2023-03-01", "2024-02-29", "2024-03-01", "2023-12-31"], dtype="datetime64[D]")
+    assert day_of_year(days.astype(np.int64)).tolist() == [0, 60, 59, 60, 365]
+
+
+def test_anomaly_against_computed_normals(city_madrid):
+    hours(city_madrid, dt.date(2022, 1, 1), dt.date(2023, 12, 31), warming=0.0)
+    hours(city_madrid, dt.date(2024, 2, 28), dt.date(2024, 3, 1), warming=2.0)
+    client = APIClient()
+    assert client.get(URL).json()["cities"]["Madrid"] == {
+        "info": "No climate normals for Madrid in Europe/Madrid; run the compute_normals command."}
+
+    call_command("compute_normals", "--city", "madrid", "--last-year", "2023", "--years", "3")
+    row = ClimateNormal.objects.get(city=city_madrid, timezone="Europe/Madrid")
+    assert (row.first_year, row.last_year, row.years, row.hours) == (2021, 2023, 2, 17520)
+    assert len(bytes(row.temperature)) == 366 * 24 * 4
+
+    body = client.get(URL).json()
+    madrid = body["cities"]["Madrid"]
+    assert madrid["normals"] == {"first_year": 2021, "last_year": 2023, "years": 2}
+    # 29 February only exists in the window; its normals are interpolated from the neighbouring days.
+    assert madrid["temperature"]["hours"] == 72
+    assert madrid["temperature"]["anomaly"] == 2.0
+    assert madrid["temperature"]["anomaly_by_day"] == {"2024-02-28": 2.0, "2024-02-29": 2.0, "2024-03-01": 2.0}
+    assert madrid["temperature"]["normal_mean"] == 15.8
+    assert madrid["precipitation"] == {"days": 3, "observed_total": 0.9, "normal_total": 0.3, "anomaly": 0.6}
+    assert body["cities"]["Nowhere"] == {"info": "City not found: Nowhere"}
+
+
+def test_all_includes_cities_with_only_packed_hours(city_madrid, settings):
+    settings.COMPACT_STORAGE = True
+    hours(city_madrid, dt.date(2023, 1, 1), dt.date(2023, 3, 31), warming=0.0)
+    call_command("compact_hourly", "--all", "--before", "2024-01-01", "--drop-hourly")
+    assert not HourlyWeather.objects.filter(city=city_madrid).exists()
+
+    call_command("compute_normals", "--all", "--last-year", "2023", "--years", "1")
+    row = ClimateNormal.objects.get(city=city_madrid, timezone="Europe/Madrid")
+    assert (row.years, row.hours) == (1, 90 * 24 - 1)  # 26 March has 23 hours
@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pytest
+from meteo.services.open_meteo import HourlyStreamParser, _series_from_parser, fetch_hourly
+from tests.stub_server import StubOpenMeteo, hourly_payload
+
+
+def test_stream_parser_handles_arbitrary_chunk_boundaries():
+    body = hourly_payload("2024-07-01", "2024-07-03", unixtime=True)
+    body["hourly"]["temperature_2m"][5] = None
+    body["note"] = 'escaped \\" quote, [brackets]'
+    raw = json.dumps(body, indent=1).encode()
+    for size in (1, 7, 4096):
+        parser = HourlyStreamParser()
+        for i in range(0, len(raw), size):
+            parser.feed(raw[i:i + size])
+        times = parser.column("time", np.int64)
+        temps = parser.column("temperature_2m", np.float64)
+        assert times.tolist() == body["hourly"]["time"]
+        assert np.isnan(temps[5]) and temps[6] == body["hourly"]["temperature_2m"][6]
+
+
+def test_columnar_fetch_matches_row_mode(monkeypatch, settings):
+    settings.DEFAULT_TZ = "UTC"
+    from meteo.services import open_meteo as svc
+    with StubOpenMeteo() as stub:
+        monkeypatch.setattr(svc, "ARCHIVE_URL", stub.archive_url)
+        rows = fetch_hourly(40.0, -3.0, "2024-07-01", "2024-07-02")
+        series = fetch_hourly(40.0, -3.0, "2024-07-01", "2024-07-02", columnar=True)
+
+    assert series.date_time.dtype == np.dtype("datetime64[s]")
+    assert series.temperature_2m.dtype == np.float64
+    assert list(series.rows()) == rows
+
+
+def test_client_reuses_session_and_caches_geocoding(monkeypatch, db):
+    from meteo.services import open_meteo as svc
+    from meteo.services.ingest import get_or_create_city
+    with StubOpenMeteo() as stub:
+        client = svc.OpenMeteoClient(geocode_url=stub.geocode_url, archive_url=stub.archive_url)
+        assert client.geocode_city("Toledo") == client.geocode_city(" toledo ")
+        assert len(stub.requests) == 1
+
+        monkeypatch.setattr(svc, "_default_client", client)
+        city = get_or_create_city("Cuenca")
+        assert get_or_create_city("CUENCA") == city
+        assert [r["name"] for r in stub.requests] == ["Toledo", "Cuenca"]
+
+
+def test_stream_parser_demultiplexes_locations():
+    body = json.dumps([hourly_payload("2024-01-01", "2024-01-02", latitude=lat, unixtime=True)
+                       for lat in (10.0, 20.0, 30.0)]).encode()
+    parser = HourlyStreamParser()
+    for i in range(0, len(body), 97):
+        parser.feed(body[i:i + 97])
+    assert parser.location_count == 3
+    for location, lat in enumerate((10.0, 20.0, 30.0)):
+        temps = parser.column("temperature_2m", np.float64, location)
+        assert len(temps) == 48
+        assert temps[0] == round(10 + lat / 10, 1)
+
+
+def test_malformed_archive_response_raises():
+    body = hourly_payload("2024-07-01", "2024-07-01", unixtime=True)
+    raw = json.dumps(body).encode().replace(b"10.0,", b"10.0x,", 1)
+    parser = HourlyStreamParser()
+    with pytest.raises(ValueError):
+        parser.feed(raw)
+
+    body["hourly"]["precipitation"] = body["hourly"]["precipitation"][:-3]
+    parser = HourlyStreamParser()
+    parser.feed(json.dumps(body).encode())
+    with pytest.raises(ValueError, match="precipitation"):
+        _series_from_parser(parser, "UTC")
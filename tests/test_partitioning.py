@@ -0,0 +1,66 @@
+import datetime as dt
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from meteo.models import City, HourlyWeather
+from meteo.services import partitioning
+from meteo.services.partitioning import partition_ranges
+
+
+def test_partition_ranges_are_aligned_and_exclusive():
+    assert partition_ranges(dt.date(2023, 11, 15), dt.date(2024, 1, 1), "month") == [
+        ("meteo_hourlyweather_p202311", dt.date(2023, 11, 1), dt.date(2023, 12, 1)),
+        ("meteo_hourlyweather_p202312", dt.date(2023, 12, 1), dt.date(2024, 1, 1)),
+        ("meteo_hourlyweather_p202401", dt.date(2024, 1, 1), dt.date(2024, 2, 1)),
+    ]
+    assert [name for name, *_ in partition_ranges(dt.date(2023, 6, 1), dt.date(2024, 6, 1), "year")] == [
+        "meteo_hourlyweather_p2023", "meteo_hourlyweather_p2024",
+    ]
+
+
+def test_partition_command_requires_postgresql(db):
+    if connection.vendor == "postgresql":
+        pytest.skip("the conversion itself is covered below")
+    with pytest.raises(CommandError):
+        call_command("partition_hourly")
+
+
+def _count(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.postgresql
+def test_convert_and_extend_partitions(db):
+    # The DDL runs inside the test transaction and is rolled back with it.
+    madrid = City.objects.create(name="Madrid", country="Spain", latitude=40.4, longitude=-3.7)
+    toledo = City.objects.create(name="Toledo", country="Spain", latitude=39.9, longitude=-4.0)
+    first = dt.datetime(2024, 1, 30, tzinfo=dt.timezone.utc)
+    for city in (madrid, toledo):
+        HourlyWeather.objects.bulk_create(
+            HourlyWeather(city=city, date_time=first + dt.timedelta(hours=h), temperature_2m=5.0, precipitation=0.0)
+            for h in range(24 * 4)
+        )
+
+    names = partitioning.convert_to_partitioned("month", dt.date(2024, 3, 1), keep_old=True)
+    assert names == ["meteo_hourlyweather_p202401", "meteo_hourlyweather_p202402", "meteo_hourlyweather_p202403"]
+    assert partitioning.is_partitioned()
+    assert HourlyWeather.objects.count() == 2 * 24 * 4
+    assert _count("meteo_hourlyweather_p202401") == 2 * 24 * 2
+    assert _count("meteo_hourlyweather_unpartitioned") == 2 * 24 * 4
+
+    # Hours past the last partition land in DEFAULT and move on extension.
+    late = dt.datetime(2024, 5, 10, tzinfo=dt.timezone.utc)
+    HourlyWeather.objects.create(city=madrid, date_time=late, temperature_2m=20.0, precipitation=0.0)
+    assert _count(partitioning.DEFAULT_PARTITION) == 1
+    assert partitioning.ensure_partitions(dt.date(2024, 3, 1), dt.date(2024, 5, 1), "month") == [
+        "meteo_hourlyweather_p202404", "meteo_hourlyweather_p202405"]
+    assert _count(partitioning.DEFAULT_PARTITION) == 0
+    assert _count("meteo_hourlyweather_p202405") == 1
+    assert partitioning.ensure_partitions(dt.date(2024, 3, 1), dt.date(2024, 5, 1), "month") == []
+
+    # The kept heap table no longer references meteo_city.
+    madrid.delete()
+    connection.check_constraints()
+    assert HourlyWeather.objects.count() == 24 * 4
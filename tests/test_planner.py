@@ -0,0 +1,50 @@
+import datetime as dt
+from rest_framework.test import APIClient
+from meteo.models import DailyWeather, HourlyWeather, MonthlyWeather
+from meteo.services.cache import stats_cache
+from meteo.services.planner import plan_range, planned_periods
+from meteo.services.rollup import refresh_daily
+from meteo.services.timebuckets import zone
+
+URLS = [
+    "/api/temperature/?city=Madrid&start=2024-01-20&end=2024-04-05&threshold=14&threshold_low=3",
+    "/api/precipitation/?city=Madrid&start=2024-01-20&end=2024-04-05",
+    "/api/summary/?city=Madrid&start=2024-01-20&end=2024-04-05",
+    "/api/summary/?city=Madrid&start=2024-02-01&end=2024-03-31",
+]
+
+
+def test_plan_splits_whole_months_and_edges():
+    plan = plan_range(dt.date(2024, 1, 20), dt.date(2024, 4, 5))
+    assert plan.months == [dt.date(2024, 2, 1), dt.date(2024, 3, 1)]
+    assert plan.edges == [(dt.date(2024, 1, 20), dt.date(2024, 1, 31)), (dt.date(2024, 4, 1), dt.date(2024, 4, 5))]
+    assert plan_range(dt.date(2024, 2, 1), dt.date(2024, 2, 29)).edges == []
+    assert plan_range(dt.date(2024, 2, 3), dt.date(2024, 2, 20)).months == []
+
+
+def test_planned_rollups_match_raw_hours(city_madrid, settings):
+    first = dt.datetime(2024, 1, 10, tzinfo=dt.timezone.utc)
+    HourlyWeather.objects.bulk_create([
+        HourlyWeather(city=city_madrid, date_time=first + dt.timedelta(hours=h),
+                      temperature_2m=round(5 + (h * 7 % 23) * 0.5, 1) if h % 50 else None,
+                      precipitation=round((h % 37) * 0.3, 1) if h % 5 == 0 else 0.0)
+        for h in range(24 * 100)
+    ])
+    client = APIClient()
+    settings.ROLLUP_TIMEZONES = []
+    raw = [client.get(url).json() for url in URLS]
+
+    settings.ROLLUP_TIMEZONES = ["Europe/Madrid"]
+    refresh_daily(city_madrid, first, first + dt.timedelta(days=100), ["Europe/Madrid"])
+    assert MonthlyWeather.objects.filter(city=city_madrid).count() == 4
+    # An edge day without rollup is read from the raw hours; a month without
+    # a monthly row falls back to its days.
+    DailyWeather.objects.filter(city=city_madrid, date=dt.date(2024, 4, 2)).delete()
+    MonthlyWeather.objects.filter(city=city_madrid, month=dt.date(2024, 3, 1)).delete()
+    stats_cache().clear()
+    assert [client.get(url).json() for url in URLS] == raw
+
+    periods = planned_periods([city_madrid], dt.date(2024, 1, 20), dt.date(2024, 4, 5),
+                              zone("Europe/Madrid"))[city_madrid.pk]
+    assert [m.month for m in periods.months] == [dt.date(2024, 2, 1)]
+    assert len(periods.days) == 12 + 31 + 5
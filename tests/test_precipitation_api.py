@@ -10,3 +10,13 @@ def test_precipitation_stats_ok(sample_hours_madrid):
     assert payload["total"] >= 0.0
     assert payload["days_with_precipitation"] >= 0
     assert "max" in payload and "value" in payload["max"] and "date" in payload["max"]
+
+
+def test_precipitation_stats_totals_by_day(sample_hours_madrid):
+    client = APIClient()
+    url = "/api/precipitation/?city=madrid&start=2024-07-01&end=2024-07-03"
+    payload = client.get(url).json()["precipitation"]
+    assert payload["total_by_day"] == {"2024-07-01": 1.5, "2024-07-02": 0.0, "2024-07-03": 3.7}
+    assert payload["total"] == 5.2
+    assert payload["max"] == {"value": 3.7, "date": "2024-07-03"}
+    assert payload["average"] == 1.73
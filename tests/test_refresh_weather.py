@@ -0,0 +1,60 @@
+import datetime as dt
+import io
+from django.core.management import call_command
+from meteo.management.commands import refresh_weather
+from meteo.models import City, HourlyWeather
+from meteo.services import open_meteo
+from meteo.services.ingest import save_hourly
+from tests.stub_server import StubOpenMeteo
+
+
+def test_refresh_fetches_only_new_hours_in_batches(monkeypatch, transactional_db, settings):
+    settings.DEFAULT_TZ = "UTC"
+    settings.ROLLUP_TIMEZONES = ["UTC"]
+    cities = [City.objects.create(name=f"City{i}", latitude=40.0 + i, longitude=-3.0) for i in range(3)]
+
+    with StubOpenMeteo() as stub:
+        monkeypatch.setattr(open_meteo, "ARCHIVE_URL", stub.archive_url)
+        for city in cities[:2]:
+            save_hourly(city, open_meteo.fetch_hourly(city.latitude, city.longitude,
+                                                      "2024-07-01", "2024-07-01", columnar=True))
+        stub.requests.clear()
+
+        call_command("refresh_weather", once=True, until="2024-07-03", batch_size=2, initial_days=3,
+                     workers=2)
+        archive_calls = [r for r in stub.requests if r["path"] == "/v1/archive"]
+        assert len(archive_calls) == 2
+        assert {(r["start_date"], r["latitude"]) for r in archive_calls} == {
+            ("2024-07-02", "40.0,41.0"), ("2024-07-01", "42.0"),
+        }
+
+        stub.requests.clear()
+        call_command("refresh_weather", once=True, until="2024-07-03")
+        assert stub.requests == []
+
+    for city in City.objects.all():
+        assert city.loaded_until == dt.datetime(2024, 7, 3, 23, tzinfo=dt.timezone.utc)
+        assert HourlyWeather.objects.filter(city=city).count() == 72
+    assert HourlyWeather.objects.filter(city=cities[1], temperature_2m=10 + 41.0 / 10).exists()
+
+
+def test_refresh_reports_failures_per_city(monkeypatch, transactional_db, settings):
+    settings.DEFAULT_TZ = "UTC"
+    settings.ROLLUP_TIMEZONES = ["UTC"]
+    cities = [City.objects.create(name=f"City{i}", latitude=40.0 + i, longitude=-3.0) for i in range(2)]
+
+    def save_or_fail(city, hours, **kwargs):
+        if city.pk == cities[1].pk:
+            raise RuntimeError("disk full")
+        return save_hourly(city, hours, **kwargs)
+
+    monkeypatch.setattr(refresh_weather, "save_hourly", save_or_fail)
+    out, err = io.StringIO(), io.StringIO()
+    with StubOpenMeteo() as stub:
+        monkeypatch.setattr(open_meteo, "ARCHIVE_URL", stub.archive_url)
+        call_command("refresh_weather", once=True, until="2024-07-01", batch_size=2, initial_days=1,
+                     stdout=out, stderr=err)
+
+    assert "cities=1 inserted=24 updated=0 failed=1" in out.getvalue()
+    assert err.getvalue().splitlines() == ["refresh | City1 | 2024-07-01..2024-07-01 | failed: disk full"]
+    assert HourlyWeather.objects.filter(city=cities[0]).count() == 24
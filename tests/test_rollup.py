@@ -0,0 +1,62 @@
+import datetime as dt
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from django.db import connections
+from rest_framework.test import APIClient
+from meteo.models import City, DailyWeather, MonthlyWeather
+from meteo.services.ingest import save_hourly
+from meteo.services.rollup import HOURLY_FIELDS, daily_rows, refresh_daily
+from meteo.services.timebuckets import zone
+
+URLS = [
+    "/api/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03&threshold=30",
+    "/api/precipitation/?city=Madrid&start=2024-07-01&end=2024-07-03",
+    "/api/summary/?city=Madrid&start=2024-07-01&end=2024-07-03",
+]
+
+
+def test_rollup_payloads_match_raw_hours(sample_hours_madrid):
+    client = APIClient()
+    raw = [client.get(url).json() for url in URLS]
+
+    written = refresh_daily(sample_hours_madrid,
+                            dt.datetime(2024, 6, 30, 22, tzinfo=dt.timezone.utc),
+                            dt.datetime(2024, 7, 3, 15, tzinfo=dt.timezone.utc))
+    assert written == 3
+    day = DailyWeather.objects.get(city=sample_hours_madrid, date=dt.date(2024, 7, 1))
+    assert (day.hours, day.temperature_mean, day.temperature_max) == (2, 24.0, 30.0)
+    assert round(day.precipitation_total, 1) == 1.5
+
+    assert [client.get(url).json() for url in URLS] == raw
+
+
+@pytest.mark.postgresql
+@pytest.mark.django_db(transaction=True)
+def test_parallel_chunks_share_boundary_rollups(settings):
+    # Chunks cut in Europe/Madrid days overlap on New York days and months.
+    settings.ROLLUP_TIMEZONES = ["America/New_York"]
+    city = City.objects.create(name="Madrid", country="Spain", latitude=40.4, longitude=-3.7)
+    first = dt.datetime(2024, 6, 29, 22, tzinfo=dt.timezone.utc)
+    hours = [{"date_time": first + dt.timedelta(hours=h), "temperature_2m": 15.0 + h % 17,
+              "precipitation": 0.2 if h % 5 == 0 else 0.0} for h in range(24 * 6)]
+    chunks = [hours[i:i + 24] for i in range(0, len(hours), 24)]
+    barrier = threading.Barrier(len(chunks))
+
+    def load(rows):
+        try:
+            barrier.wait()
+            save_hourly(City.objects.get(pk=city.pk), rows)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(len(chunks)) as pool:
+        list(pool.map(load, chunks))
+
+    tz = zone("America/New_York")
+    expected = daily_rows([tuple(r[f] for f in HOURLY_FIELDS) for r in hours], tz)
+    stored = DailyWeather.objects.filter(city=city, timezone=tz.key).order_by("date")
+    assert [(d.date, d.hours, d.temperature_max) for d in stored] == [
+        (row["date"], row["hours"], row["temperature_max"]) for row in expected]
+    assert ([m.hours for m in MonthlyWeather.objects.filter(city=city, timezone=tz.key).order_by("month")]
+            == [sum(r["hours"] for r in expected if r["date"].month == month) for month in (6, 7)])
@@ -0,0 +1,45 @@
+from rest_framework.test import APIClient
+
+
+def test_series_daily_mean(sample_hours_madrid):
+    response = APIClient().get("/api/series/?city=madrid&start=2024-07-01&end=2024-07-03")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["resolution"] == "day" and payload["aggregate"] == "mean"
+    assert payload["results"] == [
+        {"start": "2024-07-01", "hours": 2, "temperature": 24.0, "precipitation": 0.75},
+        {"start": "2024-07-02", "hours": 1, "temperature": 14.5, "precipitation": 0.0},
+        {"start": "2024-07-03", "hours": 1, "temperature": 33.4, "precipitation": 3.7},
+    ]
+    assert payload["next"] is None
+
+
+def test_series_weekly_sum_and_hourly_labels(sample_hours_madrid):
+    client = APIClient()
+    weekly = client.get("/api/series/?city=Madrid&start=2024-06-30&end=2024-07-03"
+                        "&resolution=week&aggregate=sum").json()["results"]
+    assert weekly == [{"start": "2024-07-01", "hours": 4, "temperature": 95.9, "precipitation": 5.2}]
+
+    hourly = client.get("/api/series/?city=Madrid&start=2024-07-01&end=2024-07-01"
+                        "&resolution=hour&aggregate=max").json()["results"]
+    assert [b["start"] for b in hourly] == ["2024-07-01T00:00:00+02:00", "2024-07-01T15:00:00+02:00"]
+
+
+def test_series_cursor_pages_cover_the_range(sample_hours_madrid):
+    client = APIClient()
+    url = "/api/series/?city=Madrid&start=2024-07-01&end=2024-07-03&limit=2&aggregate=percentile&percentile=100"
+    first = client.get(url).json()
+    assert [b["start"] for b in first["results"]] == ["2024-07-01", "2024-07-02"]
+    assert first["results"][0]["temperature"] == 30.0
+    assert first["next_cursor"] == "2024-07-03"
+
+    second = client.get(first["next"]).json()
+    assert [b["start"] for b in second["results"]] == ["2024-07-03"]
+    assert second["next"] is None
+
+
+def test_series_validation(sample_hours_madrid):
+    client = APIClient()
+    assert client.get("/api/series/?city=Madrid&start=2024-07-03&end=2024-07-01").status_code == 400
+    assert client.get("/api/series/?city=Madrid&start=2024-07-01&end=2024-07-03&resolution=year").status_code == 400
+    assert client.get("/api/series/?city=Nowhere&start=2024-07-01&end=2024-07-03").status_code == 404
@@ -0,0 +1,71 @@
+import numpy as np
+from rest_framework.test import APIClient
+from meteo.models import City, HourlyWeather
+from meteo.services.cache import stats_cache
+from meteo.services.rollup import refresh_daily
+from meteo.services.spatial import CityIndex, haversine_km
+from tests.conftest import aware
+
+
+def test_index_matches_brute_force():
+    rng = np.random.default_rng(3)
+    lat, lon = rng.uniform(-90, 90, 3000), rng.uniform(-180, 180, 3000)
+    index = CityIndex(np.arange(3000), lat, lon)
+
+    for box in ((30.0, -10.0, 45.0, 5.0), (-20.0, 170.0, 10.0, -175.0)):
+        min_lat, min_lon, max_lat, max_lon = box
+        in_lon = (lon >= min_lon) & (lon <= max_lon) if min_lon <= max_lon else (lon >= min_lon) | (lon <= max_lon)
+        expected = np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & in_lon).tolist()
+        assert [m.pk for m in index.within_bbox(*box)] == expected
+
+    for point, radius in (((40.4, -3.7), 800.0), ((-5.0, 179.5), 1500.0), ((88.0, 10.0), 600.0)):
+        distances = haversine_km(*point, lat, lon)
+        expected = sorted(np.flatnonzero(distances <= radius).tolist(), key=lambda i: distances[i])
+        assert [m.pk for m in index.within_radius(*point, radius)] == expected
+
+    assert [m.pk for m in index.nearest(40.4, -3.7, 5)] == np.argsort(haversine_km(40.4, -3.7, lat, lon))[:5].tolist()
+
+
+def test_region_summary_uses_current_cities(sample_hours_madrid):
+    City.objects.create(name="Toledo", country="Spain", latitude=39.8628, longitude=-4.0273)
+    client = APIClient()
+    url = "/api/region/?lat=40.4168&lon=-3.7038&radius_km=100&start=2024-07-01&end=2024-07-03"
+    data = client.get(url).json()
+    assert [(c["name"], c["distance_km"]) for c in data["cities"]] == [("Madrid", 0.0), ("Toledo", 67.5)]
+    assert data["region"]["temperature_max"] == {"city": "Madrid", "date": "2024-07-03T17:00", "value": 33.4}
+    assert data["summary"]["Madrid"] == client.get(
+        "/api/summary/?city=Madrid&start=2024-07-01&end=2024-07-03").json()["Madrid"]
+
+    City.objects.create(name="Getafe", country="Spain", latitude=40.3057, longitude=-3.7329)
+    bbox = client.get("/api/region/?bbox=40,-4,41,-3&start=2024-07-01&end=2024-07-03").json()
+    assert [c["name"] for c in bbox["cities"]] == ["Madrid", "Getafe"]
+    nearest = client.get("/api/region/?lat=40&lon=-4&nearest=1&start=2024-07-01&end=2024-07-03").json()
+    assert [c["name"] for c in nearest["cities"]] == ["Toledo"]
+    assert client.get("/api/region/?lat=40&lon=-4&start=2024-07-01&end=2024-07-03").status_code == 400
+
+
+def test_region_keeps_cities_with_the_same_name(sample_hours_madrid):
+    other = City.objects.create(name="Madrid", country="Philippines", latitude=40.5, longitude=-3.6)
+    HourlyWeather.objects.create(city=other, date_time=aware(2024, 7, 2, 12), temperature_2m=40.0, precipitation=0.0)
+    data = APIClient().get("/api/region/?bbox=40,-4,41,-3&start=2024-07-01&end=2024-07-03").json()
+    assert [(c["name"], c["country"]) for c in data["cities"]] == [("Madrid", "Spain"), ("Madrid", "Philippines")]
+    assert data["region"]["cities"] == 2
+    assert data["region"]["temperature_max"]["city"] == "Madrid (Philippines)"
+    assert data["summary"]["Madrid (Spain)"]["temperature_max"]["value"] == 33.4
+    assert data["summary"]["Madrid (Philippines)"]["temperature_average"] == 40.0
+
+
+def test_region_average_weights_hours_with_a_temperature(sample_hours_madrid):
+    getafe = City.objects.create(name="Getafe", country="Spain", latitude=40.3057, longitude=-3.7329)
+    HourlyWeather.objects.bulk_create(
+        HourlyWeather(city=getafe, date_time=aware(2024, 7, 2, hour), temperature_2m=10.0 if hour == 0 else None,
+                      precipitation=0.0)
+        for hour in range(4))
+    url = "/api/region/?bbox=40,-4,41,-3&start=2024-07-01&end=2024-07-03"
+    # (Madrid 23.975 over 4 hours + Getafe 10.0 over 1 hour) / 5
+    assert APIClient().get(url).json()["region"]["temperature_average"] == 21.2
+
+    for city in (sample_hours_madrid, getafe):
+        refresh_daily(city, aware(2024, 7, 1, 0), aware(2024, 7, 4, 0), ["Europe/Madrid"])
+    stats_cache().clear()
+    assert APIClient().get(url).json()["region"]["temperature_average"] == 21.2
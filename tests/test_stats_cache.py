@@ -0,0 +1,42 @@
+import datetime as dt
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+URL = "/api/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03"
+
+
+def test_repeated_request_is_served_from_cache(sample_hours_madrid, django_assert_num_queries):
+    client = APIClient()
+    first = client.get(URL)
+    assert first.status_code == 200
+    assert first["ETag"]
+
+    with django_assert_num_queries(1):
+        second = client.get(URL)
+    assert second.json() == first.json()
+
+    not_modified = client.get(URL, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert not_modified.status_code == 304
+
+
+def test_load_weather_invalidates_city_results(monkeypatch, sample_hours_madrid):
+    client = APIClient()
+    before = client.get(URL)
+    assert before.json()["temperature"]["max"]["value"] == 33.4
+    assert "Last-Modified" not in before
+
+    tz = ZoneInfo(settings.TIME_ZONE)
+    from meteo.services import open_meteo as svc
+    monkeypatch.setattr(svc, "geocode_city", lambda name: svc.GeocodeResult(
+        name="Madrid", country="Spain", latitude=40.4168, longitude=-3.7038))
+    monkeypatch.setattr(svc, "fetch_hourly", lambda lat, lon, start, end, **kwargs: [
+        {"date_time": dt.datetime(2024, 7, 2, 16, tzinfo=tz), "temperature_2m": 41.0, "precipitation": 0.0},
+    ])
+    call_command("load_weather", city="Madrid", start="2024-07-02", end="2024-07-02")
+
+    after = client.get(URL, HTTP_IF_NONE_MATCH=before["ETag"])
+    assert after.status_code == 200
+    assert after.json()["temperature"]["max"]["value"] == 41.0
+    assert after["Last-Modified"]
@@ -12,3 +12,25 @@ def test_summary_ok(sample_hours_madrid):
     assert madrid["precipitation_total"] >= 0.0
     assert "temperature_max" in madrid and "temperature_min" in madrid
     assert "precipitation_max" in madrid
+
+
+def test_summary_many_cities_uses_constant_queries(sample_hours_madrid, django_assert_max_num_queries):
+    from meteo.models import City, HourlyWeather
+    for i in range(5):
+        city = City.objects.create(name=f"Town{i}", country="Spain", latitude=40.0, longitude=-3.0)
+        for hour in sample_hours_madrid.hourly.all():
+            HourlyWeather.objects.create(city=city, date_time=hour.date_time,
+                                         temperature_2m=hour.temperature_2m + i,
+                                         precipitation=hour.precipitation)
+
+    client = APIClient()
+    names = ",".join(["Madrid", "Nowhere"] + [f"town{i}" for i in range(5)])
+    # The first unknown name also builds the process' "did you mean" index (one query).
+    with django_assert_max_num_queries(7):
+        client.get(f"/api/summary/?cities={names}&start=2024-07-01&end=2024-07-02")
+    with django_assert_max_num_queries(6):
+        response = client.get(f"/api/summary/?cities={names}&start=2024-07-01&end=2024-07-03")
+    data = response.json()
+    assert data["Nowhere"] == {"info": "City not found: Nowhere"}
+    assert data["Town4"]["temperature_max"]["value"] == 37.4
+    assert data["Town4"]["precipitation_total"] == data["Madrid"]["precipitation_total"]
@@ -1,4 +1,5 @@
 from rest_framework.test import APIClient
+from meteo.models import HourlyWeather
 
 
 def test_temperature_stats_ok(sample_hours_madrid):
@@ -13,3 +14,29 @@ def test_temperature_stats_ok(sample_hours_madrid):
     assert "min" in payload
     assert "hours_above_threshold" in payload
     assert "hours_below_threshold" in payload
+
+
+def test_temperature_stats_daily_buckets_follow_timezone(sample_hours_madrid):
+    client = APIClient()
+    url = "/api/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03&timezone=America/New_York"
+    response = client.get(url)
+    assert response.status_code == 200
+    payload = response.json()["temperature"]
+    assert payload["average_by_day"] == {"2024-07-01": 30.0, "2024-07-02": 14.5, "2024-07-03": 33.4}
+    assert payload["max"] == {"value": 33.4, "date_time": "2024-07-03T11:00:00-04:00"}
+    assert payload["hours_above_threshold"] == 1
+
+
+def test_hours_without_temperature_render_null_extremes(sample_hours_madrid):
+    HourlyWeather.objects.filter(city=sample_hours_madrid).update(temperature_2m=None)
+    client = APIClient()
+    response = client.get("/api/temperature/?city=Madrid&start=2024-07-01&end=2024-07-03")
+    assert response.status_code == 200
+    payload = response.json()["temperature"]
+    assert (payload["average"], payload["max"], payload["min"]) == (None, None, None)
+    assert payload["average_by_day"] == {"2024-07-01": None, "2024-07-02": None, "2024-07-03": None}
+
+    summary = client.get("/api/summary/?city=Madrid&start=2024-07-01&end=2024-07-03").json()["Madrid"]
+    assert (summary["temperature_average"], summary["temperature_max"], summary["temperature_min"]) == (
+        None, None, None)
+    assert summary["precipitation_total"] == 5.2
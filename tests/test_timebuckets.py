@@ -0,0 +1,31 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+from meteo.services.timebuckets import day_keys, key_date, month_keys, to_epochs, utc_range, week_keys, zone
+
+ZONES = ["Europe/Madrid", "America/New_York", "Australia/Lord_Howe", "Asia/Kathmandu",
+         "America/Santiago", "Pacific/Apia", "UTC"]
+
+
+@pytest.mark.parametrize("tzname", ZONES)
+def test_day_keys_match_pandas_across_dst(tzname):
+    times = np.arange(np.datetime64("2010-01-01T00:00"), np.datetime64("2013-01-01T00:00"),
+                      np.timedelta64(15, "m")).astype("datetime64[ns]")
+    expected = (pd.DatetimeIndex(times).tz_localize("UTC").tz_convert(tzname)
+                .tz_localize(None).to_numpy().astype("datetime64[D]").astype(np.int64))
+    assert np.array_equal(day_keys(to_epochs(times), zone(tzname)), expected)
+
+
+def test_week_and_month_keys():
+    days = np.array([(dt.date(2024, 7, 3) - dt.date(1970, 1, 1)).days])
+    assert key_date(week_keys(days)[0]) == dt.date(2024, 7, 1)
+    assert key_date(month_keys(days)[0]) == dt.date(2024, 7, 1)
+
+
+def test_zone_and_utc_range_are_cached():
+    tz = zone("Europe/Madrid")
+    assert zone("Europe/Madrid") is tz
+    first = utc_range(dt.date(2024, 3, 31), dt.date(2024, 3, 31), tz)
+    assert utc_range(dt.date(2024, 3, 31), dt.date(2024, 3, 31), tz) is first
+    assert first[0] == dt.datetime(2024, 3, 30, 23, tzinfo=dt.timezone.utc)